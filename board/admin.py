@@ -1,8 +1,11 @@
 from django.contrib import admin
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db.models import Count
 from django.utils.html import format_html
 from board.models import Meet, Problem, Session
+from board.scraping import is_kattis_contest
+from cheatsheet import search
 
 
 admin.site.site_header = "Edit website"
@@ -16,9 +19,24 @@ class MeetAdmin(admin.ModelAdmin):
     list_filter = ('session',)
     search_fields = ('description', 'contest_link')
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('session').annotate(
+            num_problems=Count('problems', distinct=True)
+        )
+
     def problem_count(self, obj):
-        return obj.problems.count()
+        return obj.num_problems
     problem_count.short_description = '# Problems'
+    problem_count.admin_order_field = 'num_problems'
+
+    actions = ['refresh_contest_problems']
+
+    def refresh_contest_problems(self, request, queryset):
+        meets = [meet for meet in queryset if is_kattis_contest(meet.contest_link)]
+        for meet in meets:
+            meet.refresh_contest_problems()
+        self.message_user(request, f"Queued Kattis problem import for {len(meets)} meets.")
+    refresh_contest_problems.short_description = "Re-import Kattis contest problems"
 
 
 admin.site.register(Meet, MeetAdmin)
@@ -60,16 +78,26 @@ class HasDifficultyFilter(admin.SimpleListFilter):
 
 
 class ProblemAdmin(admin.ModelAdmin):
-    search_fields = ['platform', 'link', 'solution_link']
+    search_fields = ['platform', 'title', 'slug', 'link', 'solution_link']
     filter_horizontal = ('meets', 'categories')
     list_display = ('__str__', 'platform', 'difficulty_display', 'categories_list', 'meets_list')
-    list_filter = ('platform', 'categories', HasDifficultyFilter)
+    list_filter = ('platform', 'difficulty_level', 'categories', HasDifficultyFilter)
     ordering = ['-id']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('categories', 'meets')
+
+    def get_search_results(self, request, queryset, search_term):
+        # Full-text index (title, platform, categories, links) instead of LIKE scans
+        matches = search.matching_ids('problem', search_term)
+        if matches is None:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=matches), False
+
     def difficulty_display(self, obj):
         if not obj.difficulty:
             return format_html('<span style="color:#999">—</span>')
-        level = obj.get_difficulty_level()
+        level = obj.difficulty_level
         colors = {'easy': '#5cb85c', 'medium': '#f0ad4e', 'hard': '#d9534f'}
         color = colors.get(level, '#333')
         return format_html('<span style="color:{}">{}</span>', color, obj.difficulty)
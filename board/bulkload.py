@@ -0,0 +1,272 @@
+"""
+Bulk loading of serialized objects, shared by the fastload and
+import_backup commands.
+
+Rows in the serializers' format ({"model", "pk", "fields"}) are turned into
+instances and inserted with bulk_create instead of one save() at a time.
+Through rows are inserted separately once both sides exist. Foreign keys
+given as natural keys are looked up, and pks that changed since the data
+was dumped (content types, permissions, link-keyed problems) are remapped.
+"""
+import gzip
+import json
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
+from django.core.management.base import CommandError
+from django.core.management.color import no_style
+from django.db import connection
+
+from events.models import kind_for
+
+# Rows matched to those created by `migrate` instead of being inserted
+NATURAL_KEY_MODELS = ('contenttypes.contenttype', 'auth.permission')
+
+# Models whose fixture pk used to be this field; they now get an auto pk
+LEGACY_PK_FIELDS = {'board.problem': 'link'}
+
+
+def iter_json_array(stream, chunk_size=1 << 16):
+    """Yield the items of the top-level JSON array in `stream` one by one,
+    reading it in chunks instead of parsing the whole file at once."""
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = '', 0, False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+    def peek():
+        """Next non-blank character, or '' at the end of the stream."""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or eof:
+                return buffer[pos:pos + 1]
+            fill()
+
+    if peek() != '[':
+        raise ValueError('Fixture must be a JSON array')
+    pos += 1
+    if peek() == ']':
+        return
+    while True:
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        pos = end
+        yield item
+        separator = peek()
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ValueError(f'Expected "," or "]" in fixture, got {separator!r}')
+        pos += 1
+        peek()
+
+
+def open_ndjson(path, mode):
+    """Open an NDJSON file as text ('r' or 'w'), gzipped if its name ends in .gz."""
+    if str(path).endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def iter_ndjson(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def dependency_order(labels):
+    """Model labels sorted so that every model comes after those it has a
+    foreign key to; ties keep the fixture order."""
+    present = {label: apps.get_model(label) for label in labels}
+    labels_by_model = {model: label for label, model in present.items()}
+    depends_on = {
+        label: {
+            labels_by_model[field.related_model] for field in model._meta.concrete_fields
+            if field.many_to_one or field.one_to_one
+            if field.related_model in labels_by_model and field.related_model is not model
+        }
+        for label, model in present.items()
+    }
+    ordered, done = [], set()
+    while len(ordered) < len(labels):
+        ready = [label for label in labels if label not in done and depends_on[label] <= done]
+        if not ready:
+            raise CommandError(f'Circular foreign keys between: {", ".join(sorted(set(labels) - done))}')
+        ordered.extend(ready)
+        done.update(ready)
+    return ordered
+
+
+def prepare(obj):
+    """What save() would compute for objects inserted in bulk."""
+    label = obj._meta.label_lower
+    if label == 'board.problem':
+        obj.refresh_derived_fields()
+    elif label == 'cheatsheet.algorithm':
+        obj.highlight_code()
+    elif label == 'events.event':
+        obj.ensure_slug()
+        obj.render_summary()
+    elif label == 'events.media':
+        obj.kind = kind_for(obj.file.name)
+
+
+class FixtureLoader:
+    """Turns grouped fixture rows into model instances and through rows,
+    remapping primary keys that changed since the fixture was dumped."""
+
+    def __init__(self, groups=None):
+        self.groups = groups or {}
+        self.pk_maps = {}
+        self.natural_keys = {}
+        self.dropped_fields = defaultdict(set)
+        self.dropped_links = Counter()
+
+    def map_natural_keys(self):
+        content_types = {(ct.app_label, ct.model): ct.pk for ct in ContentType.objects.all()}
+        self.pk_maps[ContentType] = {
+            row['pk']: content_types.get((row['fields']['app_label'], row['fields']['model']))
+            for row in self.groups.get('contenttypes.contenttype', ())
+        }
+        permissions = {(p.content_type_id, p.codename): p.pk for p in Permission.objects.all()}
+        self.pk_maps[Permission] = {
+            row['pk']: permissions.get((self.remap(ContentType, row['fields']['content_type']),
+                                        row['fields']['codename']))
+            for row in self.groups.get('auth.permission', ())
+        }
+
+    def remap(self, model, pk):
+        if isinstance(pk, list):
+            return self.natural_pk(model, tuple(pk))
+        if model in self.pk_maps:
+            return self.pk_maps[model].get(pk)
+        return pk
+
+    def natural_pk(self, model, key):
+        """Local pk of the object with this natural key, or None."""
+        if (model, key) not in self.natural_keys:
+            try:
+                pk = model._default_manager.get_by_natural_key(*key).pk
+            except ObjectDoesNotExist:
+                pk = None
+            self.natural_keys[model, key] = pk
+        return self.natural_keys[model, key]
+
+    def build(self, label, rows):
+        """(instances, [(instance, m2m field, fixture pks)]) for one model."""
+        model = apps.get_model(label)
+        legacy_pk = LEGACY_PK_FIELDS.get(label)
+        instances, links = [], []
+        for row in rows:
+            data = {}
+            if row.get('pk') is not None:
+                if legacy_pk and not isinstance(row['pk'], int):
+                    data[legacy_pk] = row['pk']
+                else:
+                    data[model._meta.pk.attname] = model._meta.pk.to_python(row['pk'])
+            row_links = []
+            for name, value in row['fields'].items():
+                try:
+                    field = model._meta.get_field(name)
+                except FieldDoesNotExist:
+                    self.dropped_fields[label].add(name)
+                    continue
+                if field.many_to_many:
+                    if not field.remote_field.through._meta.auto_created:
+                        raise CommandError(f'{label}.{name} has a custom through model; use loaddata')
+                    row_links.append((field, value))
+                elif field.is_relation:
+                    data[field.attname] = None if value is None else self.remap(field.related_model, value)
+                else:
+                    data[field.attname] = field.to_python(value)
+            obj = model(**data)
+            prepare(obj)
+            instances.append(obj)
+            links.extend((obj, field, values) for field, values in row_links)
+        return instances, links
+
+    def record_pks(self, label, instances):
+        """Remember the pks given to rows whose fixture pk was not kept."""
+        legacy_pk = LEGACY_PK_FIELDS.get(label)
+        if not legacy_pk:
+            return
+        model = apps.get_model(label)
+        keys = [getattr(obj, legacy_pk) for obj in instances]
+        pks = dict(model.objects.filter(**{f'{legacy_pk}__in': keys}).values_list(legacy_pk, 'pk'))
+        self.pk_maps[model] = pks
+        for obj in instances:
+            obj.pk = pks[getattr(obj, legacy_pk)]
+
+    def targets(self, field, values):
+        """Local pks for the fixture pks listed in an M2M field."""
+        pks = []
+        for value in values:
+            pk = self.remap(field.related_model, value)
+            if pk is None:
+                self.dropped_links[str(field)] += 1
+            else:
+                pks.append(pk)
+        return pks
+
+    def through_rows(self, links):
+        rows = defaultdict(list)
+        for obj, field, values in links:
+            through = field.remote_field.through
+            source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+            rows[through].extend(
+                through(**{f'{source}_id': obj.pk, f'{target}_id': pk}) for pk in self.targets(field, values)
+            )
+        return rows
+
+    def insert(self, model, instances, batch_size, upsert=False):
+        """bulk_create `instances`; with `upsert`, rows whose pk exists are updated."""
+        # The insert sets auto_now fields to the current time, unlike loaddata
+        timestamps = [field.attname for field in model._meta.concrete_fields
+                      if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)]
+        stored = [[getattr(obj, name) for name in timestamps] for obj in instances]
+        options = {}
+        if upsert:
+            options = {'update_conflicts': True, 'unique_fields': [model._meta.pk.name],
+                       'update_fields': [f.name for f in model._meta.concrete_fields if not f.primary_key]}
+        model._default_manager.bulk_create(instances, batch_size=batch_size, **options)
+        if timestamps and any(value is not None for values in stored for value in values):
+            for obj, values in zip(instances, stored):
+                for name, value in zip(timestamps, values):
+                    if value is not None:
+                        setattr(obj, name, value)
+            model._default_manager.bulk_update(instances, timestamps, batch_size=batch_size)
+
+    def insert_links(self, links, batch_size, replace=False):
+        """Insert the through rows of `links`; with `replace`, the objects'
+        previous links are deleted first. Returns rows inserted per through model."""
+        counts = {}
+        for through, rows in self.through_rows(links).items():
+            if replace:
+                for field in {field for _, field, _ in links if field.remote_field.through is through}:
+                    sources = {obj.pk for obj, link_field, _ in links if link_field is field}
+                    through._default_manager.filter(**{f'{field.m2m_field_name()}_id__in': sources}).delete()
+            through._default_manager.bulk_create(rows, batch_size=batch_size)
+            counts[through] = len(rows)
+        return counts
+
+
+def reset_sequences(loaded):
+    """Rows were inserted with explicit pks; move sequences past them."""
+    statements = connection.ops.sequence_reset_sql(no_style(), loaded)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
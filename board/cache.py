@@ -0,0 +1,46 @@
+"""
+Rendered /meets pages, cached per session.
+
+Pages are stored without expiry and deleted by the receivers in
+board.signals whenever something they display changes.
+"""
+from django.core.cache import cache
+
+from board.models import Meet, Session, current_season
+
+SESSION_PAGE_KEY = 'board:meets:session:{}'
+DEFAULT_PAGE_KEY = 'board:meets:default:{}-{}'
+
+
+def session_page_key(session_id):
+    return SESSION_PAGE_KEY.format(session_id)
+
+
+def default_page_key():
+    """Key of the page shown without ?session=, i.e. for the current season."""
+    season, year = current_season()
+    return DEFAULT_PAGE_KEY.format(season, year)
+
+
+def invalidate_sessions(session_ids):
+    """Drop the cached pages of the given sessions (and the default page)."""
+    from info import prerender
+
+    keys = [session_page_key(pk) for pk in set(session_ids) if pk is not None]
+    keys.append(default_page_key())
+    cache.delete_many(keys)
+    # Bulk writes send no signals: pre-rendered pages are made stale here too
+    prerender.invalidate()
+
+
+def invalidate_all():
+    """Drop every cached page, e.g. when the session list itself changes."""
+    invalidate_sessions(Session.objects.values_list('pk', flat=True))
+
+
+def sessions_of_meets(meet_ids):
+    return Meet.objects.filter(pk__in=meet_ids).values_list('session_id', flat=True).distinct()
+
+
+def sessions_of_problems(problem_ids):
+    return Meet.objects.filter(problems__in=problem_ids).values_list('session_id', flat=True).distinct()
@@ -0,0 +1,95 @@
+"""
+Conditional GET for the public pages.
+
+A page's ETag comes from the rows it shows: for each queryset given by the
+view, the latest change timestamp (the model's auto_now field, if it has
+one) and the number of rows. Row counts catch deletions and, for M2M
+through tables, links added or removed. Everything is read in a single
+query of scalar subqueries, once per request, and hashed with the build id
+(templates and static files, see info.prerender) and any extra values the
+view depends on, such as renderer versions.
+
+No Last-Modified is sent: the latest timestamp does not move when rows are
+deleted, so If-Modified-Since alone would keep a page that lost rows.
+Rows without a timestamp of their own are covered by whoever changes them,
+e.g. board.signals touches the meets of a renamed manager.
+
+Repeat visitors get a 304 without the page being rendered. Responses
+carry `Cache-Control: public, no-cache`, so browsers revalidate on every
+visit.
+"""
+import hashlib
+import json
+from datetime import timezone as dt_timezone
+from functools import wraps
+
+from django.db import connection
+from django.db.models import F, Func
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+
+def timestamp_field(model):
+    """Name of the model's auto_now field, or None."""
+    for field in model._meta.concrete_fields:
+        if getattr(field, 'auto_now', False):
+            return field.name
+    return None
+
+
+def _as_datetime(value):
+    # SQLite hands raw subquery results back as text
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value, dt_timezone.utc)
+    return value
+
+
+def page_etag(querysets, extra=()):
+    """ETag of the rows of `querysets` and the `extra` values, in one query."""
+    selects, params, timestamped = [], [], []
+    for queryset in querysets:
+        queryset = queryset.order_by()
+        # Plain functions, not aggregates: no GROUP BY, one row per subquery
+        columns = [queryset.values(n=Func(F('pk'), function='COUNT'))]
+        field = timestamp_field(queryset.model)
+        timestamped.append(field is not None)
+        if field:
+            columns.append(queryset.values(latest=Func(F(field), function='MAX')))
+        for column in columns:
+            sql, column_params = column.query.sql_with_params()
+            selects.append(f'({sql})')
+            params.extend(column_params)
+    values = []
+    if selects:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT ' + ', '.join(selects), params)
+            values = list(cursor.fetchone())
+
+    key = []
+    for has_timestamp in timestamped:
+        count = values.pop(0)
+        latest = _as_datetime(values.pop(0)) if has_timestamp else None
+        key.append([count, latest.isoformat() if latest else None])
+
+    from info.prerender import build_id
+
+    return hashlib.sha1(json.dumps([build_id(), list(extra), key], default=str).encode()).hexdigest()[:20]
+
+
+def conditional_page(querysets_for, extra_for=None):
+    """View decorator: ETag from the querysets returned by
+    `querysets_for(request, *args, **kwargs)` and the values returned by
+    `extra_for` (see page_etag), and 304 when the client has it."""
+    def etag(request, *args, **kwargs):
+        extra = extra_for(request, *args, **kwargs) if extra_for else ()
+        return page_etag(querysets_for(request, *args, **kwargs), extra)
+
+    def decorator(view):
+        conditional = condition(etag_func=etag)(view)
+        return wraps(view)(cache_control(public=True, no_cache=True)(conditional))
+
+    return decorator
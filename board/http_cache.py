@@ -0,0 +1,256 @@
+"""
+On-disk HTTP cache shared by every scraper (board.scraping).
+
+Each URL gets a body file and a JSON metadata file holding its ETag,
+Last-Modified, fetch time and the results parsers already computed from
+that body. Within SCRAPE_CACHE_MAX_AGE seconds a page is served from disk
+without any request; after that it is revalidated with If-None-Match /
+If-Modified-Since, and a 304 reuses both the body and the stored parse
+results. The directory is capped at SCRAPE_CACHE_MAX_BYTES, evicting the
+least recently used pages first.
+
+Each process keeps one cache object per directory (get_cache). Counters
+for the stats command are added up in memory and merged into stats.json
+when the process exits, so a hit costs no write besides the LRU touch;
+concurrent processes may lose an increment now and then, which is fine
+for a ratio. The directory size is tracked from the pages this process
+stores and only rescanned to evict, so it may overshoot by what other
+processes stored in the meantime.
+"""
+import atexit
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+import requests
+from django.conf import settings
+
+# hit: served from disk, revalidated: upstream 304, miss: downloaded
+STAT_NAMES = ('hit', 'revalidated', 'miss')
+
+_stats_lock = threading.Lock()
+
+
+@dataclass
+class Page:
+    url: str
+    text: str
+    unchanged: bool  # same body as the last fetch: stored parse results apply
+
+
+def _write_atomic(path: Path, data: bytes):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class DiskHTTPCache:
+    def __init__(self, directory, max_age: int, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        # Bytes on disk, known after the first store
+        self._size = None
+
+    def _paths(self, url):
+        name = hashlib.sha256(url.encode()).hexdigest()
+        return self.directory / f'{name}.json', self.directory / f'{name}.body'
+
+    def _load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text())
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def _save_meta(self, url, meta):
+        _write_atomic(self._paths(url)[0], json.dumps(meta).encode())
+
+    def fetch(self, url, http=None, headers=None, timeout=10) -> Page:
+        """GET `url` through the cache; raises `requests.RequestException`."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        meta, body = self._load(url)
+        if meta is not None and time.time() - meta['fetched_at'] < self.max_age:
+            self._touch(url)
+            self.count('hit')
+            return Page(url, body.decode(meta['encoding'], errors='replace'), unchanged=True)
+
+        headers = dict(headers or {})
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        response = (http or requests).get(url, headers=headers, timeout=timeout)
+
+        if meta is not None and response.status_code == 304:
+            meta['fetched_at'] = time.time()
+            self._save_meta(url, meta)
+            self.count('revalidated')
+            return Page(url, body.decode(meta['encoding'], errors='replace'), unchanged=True)
+
+        response.raise_for_status()
+        meta = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'encoding': response.encoding or 'utf-8',
+            'fetched_at': time.time(),
+            'parsed': {},
+        }
+        replaced = self._entry_size(url)
+        _write_atomic(self._paths(url)[1], response.content)
+        self._save_meta(url, meta)
+        self.count('miss')
+        self._stored(self._entry_size(url) - replaced)
+        return Page(url, response.text, unchanged=False)
+
+    def parsed(self, page: Page, name: str):
+        """(True, result) if parser `name` already ran on this body."""
+        if not page.unchanged:
+            return False, None
+        meta, _ = self._load(page.url)
+        if meta is None or name not in meta.get('parsed', {}):
+            return False, None
+        return True, meta['parsed'][name]
+
+    def store_parsed(self, page: Page, name: str, result):
+        meta, _ = self._load(page.url)
+        if meta is not None:
+            meta.setdefault('parsed', {})[name] = result
+            self._save_meta(page.url, meta)
+
+    def _touch(self, url):
+        try:
+            os.utime(self._paths(url)[0])
+        except OSError:
+            pass
+
+    def _entry_size(self, url):
+        size = 0
+        for path in self._paths(url):
+            try:
+                size += path.stat().st_size
+            except OSError:
+                pass
+        return size
+
+    def _stored(self, added):
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, _, size in self.entries())
+            else:
+                self._size += added
+            if self._size <= self.max_bytes:
+                return
+            self._size = self.evict()
+
+    def entries(self):
+        """(meta path, last use, bytes) for every cached page."""
+        entries = []
+        for meta_path in self.directory.glob('*.json'):
+            if meta_path.name == 'stats.json':
+                continue
+            body_path = meta_path.with_suffix('.body')
+            try:
+                stat = meta_path.stat()
+                size = stat.st_size + body_path.stat().st_size
+            except OSError:
+                continue
+            entries.append((meta_path, stat.st_mtime, size))
+        return entries
+
+    def evict(self):
+        """Drop least recently used pages until the cache fits in max_bytes;
+        returns the bytes left."""
+        entries = self.entries()
+        total = sum(size for _, _, size in entries)
+        for meta_path, _, size in sorted(entries, key=lambda e: e[1]):
+            if total <= self.max_bytes:
+                break
+            for path in (meta_path, meta_path.with_suffix('.body')):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            total -= size
+        return total
+
+    def count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def _stored_stats(self):
+        try:
+            stored = json.loads((self.directory / 'stats.json').read_text())
+        except (OSError, ValueError):
+            stored = {}
+        return {name: stored.get(name, 0) for name in STAT_NAMES}
+
+    def stats(self):
+        """Counters on disk plus those of this process not flushed yet."""
+        stats = self._stored_stats()
+        with self._lock:
+            for name in STAT_NAMES:
+                stats[name] += self._counts[name]
+        return stats
+
+    def flush_stats(self):
+        """Add this process's counters to stats.json (run at exit)."""
+        with _stats_lock:
+            with self._lock:
+                counts, self._counts = self._counts, Counter()
+            if not counts:
+                return
+            stats = self._stored_stats()
+            for name in STAT_NAMES:
+                stats[name] += counts[name]
+            try:
+                _write_atomic(self.directory / 'stats.json', json.dumps(stats).encode())
+            except OSError:
+                pass
+
+    def reset_stats(self):
+        with _stats_lock:
+            with self._lock:
+                self._counts.clear()
+            try:
+                (self.directory / 'stats.json').unlink()
+            except OSError:
+                pass
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache():
+    """The scrape cache as configured in settings, or None if disabled."""
+    if not settings.SCRAPE_CACHE_DIR:
+        return None
+    # One per directory and process, so counters and size are kept in memory
+    with _caches_lock:
+        cache = _caches.get(settings.SCRAPE_CACHE_DIR)
+        if cache is None:
+            cache = DiskHTTPCache(settings.SCRAPE_CACHE_DIR, settings.SCRAPE_CACHE_MAX_AGE,
+                                  settings.SCRAPE_CACHE_MAX_BYTES)
+            _caches[settings.SCRAPE_CACHE_DIR] = cache
+            atexit.register(cache.flush_stats)
+    cache.max_age = settings.SCRAPE_CACHE_MAX_AGE
+    cache.max_bytes = settings.SCRAPE_CACHE_MAX_BYTES
+    return cache
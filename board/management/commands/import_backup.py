@@ -0,0 +1,87 @@
+"""
+Load a backup written by export_backup (NDJSON, gzipped if the file name
+ends in .gz) with bulk inserts.
+
+The file is read line by line and inserted in batches per model, in the
+order export_backup wrote them, all in one transaction. Rows whose pk
+already exists are updated and their M2M links replaced, so incremental
+backups can be applied on top of the last full one.
+
+Usage:
+    python manage.py import_backup backup.ndjson.gz
+"""
+import time
+from collections import Counter
+from itertools import groupby
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from board.bulkload import FixtureLoader, iter_ndjson, open_ndjson, reset_sequences
+from board.cache import invalidate_all
+from cheatsheet import search
+
+
+def batches(rows, size):
+    """(model label, rows) for consecutive rows of the same model, at most `size` at a time."""
+    for label, group in groupby(rows, key=lambda row: row['model'].lower()):
+        batch = []
+        for row in group:
+            batch.append(row)
+            if len(batch) == size:
+                yield label, batch
+                batch = []
+        if batch:
+            yield label, batch
+
+
+class Command(BaseCommand):
+    help = 'Bulk-load a backup written by export_backup.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='Backup file; gzipped if it ends in .gz')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows read and inserted at a time (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        loader = FixtureLoader()
+        counts = Counter()
+        loaded = []
+        try:
+            with open_ndjson(options['input'], 'r') as f, transaction.atomic():
+                for label, rows in batches(iter_ndjson(f), max(1, options['batch_size'])):
+                    try:
+                        model = apps.get_model(label)
+                    except (LookupError, ValueError):
+                        raise CommandError(f'Unknown model in backup: {label}')
+                    instances, links = loader.build(label, rows)
+                    loader.insert(model, instances, options['batch_size'], upsert=True)
+                    for through, count in loader.insert_links(links, options['batch_size'], replace=True).items():
+                        counts[through._meta.label_lower] += count
+                    counts[label] += len(instances)
+                    if model not in loaded:
+                        loaded.append(model)
+                reset_sequences(loaded)
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f'Cannot read {options["input"]}: {e}')
+        except IntegrityError as e:
+            raise CommandError(f'Backup conflicts with existing rows: {e}')
+        # Bulk writes send no signals
+        invalidate_all()
+        search.rebuild()
+
+        elapsed = time.monotonic() - start
+        for label, count in counts.items():
+            self.stdout.write(f'  {label}: {count}')
+        for field, count in sorted(loader.dropped_links.items()):
+            self.stdout.write(self.style.WARNING(f'Dropped {count} links of {field} to missing objects'))
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {total} rows in {elapsed:.2f}s ({total / max(elapsed, 1e-6):,.0f} rows/s)'
+        ))
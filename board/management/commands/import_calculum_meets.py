@@ -0,0 +1,257 @@
+"""
+Import meets and problems from the Calculum website (https://calculum.aediroum.ca/)
+and their associated Kattis contests into the local database.
+
+Runs in three stages:
+  1. index  - fetch the list of posts
+  2. fetch  - fetch every post (and its Kattis contest page) concurrently
+  3. upsert - write sessions, users, meets, problems and M2M links in bulk,
+              in one transaction
+
+Usage:
+    python manage.py import_calculum_meets
+    python manage.py import_calculum_meets --since 2025-09-01 --dry-run
+"""
+import time
+import unicodedata
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from urllib.parse import urlsplit
+
+import requests
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from board.cache import invalidate_all
+from board.models import Meet, Problem, Session, season_for_month
+from board.scraping import (
+    CALCULUM_URL, HostSessionPool, fetch_parsed, is_kattis_contest, parse_calculum_index,
+    parse_calculum_post, parse_kattis_contest_problems,
+)
+from cheatsheet import search
+
+# Defaults for sessions created by the import, same as Meet.save()
+SESSION_DEFAULTS = {'local': 'AA-3189', 'time': '18:00'}
+
+
+def split_name(full_name):
+    """(username, first name, last name) for a manager's full name."""
+    parts = full_name.split()
+    first_name, last_name = parts[0], ' '.join(parts[1:])
+
+    def normalize(name):
+        nfkd_form = unicodedata.normalize('NFKD', name.lower().strip())
+        return ''.join(c for c in nfkd_form if not unicodedata.combining(c))
+
+    username = normalize(first_name)
+    if last_name:
+        username += f'_{normalize(last_name)}'
+    return username[:150], first_name, last_name
+
+
+class Command(BaseCommand):
+    help = 'Import meets and problems from the Calculum website and their Kattis contests.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=date.fromisoformat,
+            help='Only import posts published on or after this date (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Fetch and report what would change without writing anything',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help='Number of pages fetched in parallel (default: 8)',
+        )
+        parser.add_argument(
+            '--per-host',
+            type=int,
+            default=4,
+            help='Maximum simultaneous requests to a single host (default: 4)',
+        )
+
+    def handle(self, *args, **options):
+        self.failures = Counter()
+        timings = {}
+        pool = HostSessionPool(per_host=max(1, options['per_host']))
+        try:
+            start = time.monotonic()
+            posts = self.select_posts(fetch_parsed(CALCULUM_URL, parse_calculum_index, http=pool), options['since'])
+            timings['index'] = time.monotonic() - start
+
+            start = time.monotonic()
+            fetched = []
+            with ThreadPoolExecutor(max_workers=max(1, options['concurrency'])) as executor:
+                # Workers return their failures; only this thread touches the counter
+                for meet, failures in executor.map(lambda post: self.fetch_post(post, pool), posts):
+                    self.failures.update(failures)
+                    if meet:
+                        fetched.append(meet)
+            timings['fetch'] = time.monotonic() - start
+        finally:
+            pool.close()
+
+        start = time.monotonic()
+        with transaction.atomic():
+            counts = self.upsert(fetched)
+            if options['dry_run']:
+                transaction.set_rollback(True)
+        if not options['dry_run']:
+            # Bulk writes send no signals
+            invalidate_all()
+        timings['upsert'] = time.monotonic() - start
+
+        self.report(posts, fetched, counts, timings, options['dry_run'])
+
+    def select_posts(self, index, since):
+        """Meet posts from the index, in page order, with their date parsed."""
+        posts = []
+        for post in index:
+            if 'présentation' in post['title'].lower():
+                continue
+            try:
+                post['date'] = datetime.fromisoformat(post['datetime']).date()
+            except ValueError:
+                self.stderr.write(f"Skipping {post['title']}: invalid date {post['datetime']!r}")
+                continue
+            if since is None or post['date'] >= since:
+                posts.append(post)
+        return posts
+
+    def fetch_post(self, post, pool):
+        """
+        Fetch and parse a post and its contest page.
+
+        Returns (meet, failure reasons); meet is None if the post failed.
+        """
+        failures = []
+        try:
+            meet = fetch_parsed(post['url'], parse_calculum_post, http=pool)
+        except requests.RequestException as e:
+            failures.append(f'network error ({urlsplit(post["url"]).netloc})')
+            self.stderr.write(f"Error fetching {post['url']}: {e}")
+            return None, failures
+        meet.update(date=post['date'], description=post['description'])
+        if is_kattis_contest(meet['contest_link']):
+            try:
+                links = fetch_parsed(meet['contest_link'], parse_kattis_contest_problems, meet['contest_link'], http=pool)
+                meet['problems'] = [(link, 'Kattis') for link in links]
+            except requests.RequestException as e:
+                failures.append(f'network error ({urlsplit(meet["contest_link"]).netloc})')
+                self.stderr.write(f"Error fetching contest {meet['contest_link']}: {e}")
+        return meet, failures
+
+    def upsert(self, fetched):
+        """Write everything in a fixed number of queries; return created/updated counts."""
+        counts = Counter()
+
+        # Sessions
+        keys = {(season_for_month(m['date'].month), m['date'].year) for m in fetched}
+        sessions = {(s.season, s.year): s for s in Session.objects.filter(year__in={y for _, y in keys})}
+        missing = [Session(season=season, year=year, **SESSION_DEFAULTS) for season, year in keys - sessions.keys()]
+        Session.objects.bulk_create(missing)
+        counts['sessions created'] = len(missing)
+        if missing:
+            sessions = {(s.season, s.year): s for s in Session.objects.filter(year__in={y for _, y in keys})}
+
+        # Managers
+        names = {name: split_name(name) for m in fetched for name in m['managers']}
+        usernames = {username for username, _, _ in names.values()}
+        users = {u.username: u for u in User.objects.filter(username__in=usernames)}
+        missing = {}
+        for username, first_name, last_name in names.values():
+            if username not in users and username not in missing:
+                missing[username] = User(
+                    username=username, first_name=first_name, last_name=last_name,
+                    password=make_password(None), is_staff=True,
+                )
+        User.objects.bulk_create(missing.values())
+        counts['users created'] = len(missing)
+        if missing:
+            users = {u.username: u for u in User.objects.filter(username__in=usernames)}
+
+        # Meets, matched by date as before
+        meets = {}
+        for meet in Meet.objects.filter(date__in={m['date'] for m in fetched}).order_by('pk'):
+            meets.setdefault(meet.date, meet)
+        new_meets, changed = [], []
+        for m in fetched:
+            session = sessions[(season_for_month(m['date'].month), m['date'].year)]
+            meet = meets.get(m['date'])
+            if meet is None:
+                meet = Meet(date=m['date'], session=session, description=m['description'],
+                            contest_link=m['contest_link'])
+                meets[m['date']] = meet
+                new_meets.append(meet)
+            elif (meet.description, meet.contest_link) != (m['description'], m['contest_link']):
+                meet.description, meet.contest_link = m['description'], m['contest_link']
+                # bulk_update leaves auto_now fields alone
+                meet.updated_at = timezone.now()
+                changed.append(meet)
+        Meet.objects.bulk_create(new_meets)
+        Meet.objects.bulk_update(changed, ['description', 'contest_link', 'updated_at'])
+        counts['meets created'] = len(new_meets)
+        counts['meets updated'] = len(changed)
+        if new_meets and any(meet.pk is None for meet in new_meets):
+            for meet in Meet.objects.filter(date__in=[m.date for m in new_meets]).order_by('pk'):
+                if meets[meet.date].pk is None:
+                    meets[meet.date] = meet
+
+        # Problems
+        platforms = {link: platform for m in fetched for link, platform in m['problems']}
+        existing = set(Problem.objects.filter(link__in=platforms).values_list('link', flat=True))
+        new_problems = [Problem(link=link, platform=platform) for link, platform in platforms.items()
+                        if link not in existing]
+        for problem in new_problems:
+            problem.refresh_derived_fields()
+        Problem.objects.bulk_create(new_problems, ignore_conflicts=True)
+        counts['problems created'] = len(new_problems)
+        problem_ids = dict(Problem.objects.filter(link__in=platforms).values_list('link', 'pk'))
+        search.index_problems(problem_ids[problem.link] for problem in new_problems if problem.link in problem_ids)
+
+        # M2M links; rows already present are skipped by the unique constraints, so
+        # what was actually added is counted from the tables rather than the rows sent
+        ProblemMeets = Problem.meets.through
+        MeetManagers = Meet.managers.through
+        meet_ids = [meet.pk for meet in meets.values()]
+        problem_links = ProblemMeets.objects.filter(meet_id__in=meet_ids)
+        manager_links = MeetManagers.objects.filter(meet_id__in=meet_ids)
+        before = problem_links.count(), manager_links.count()
+        problem_rows = [
+            ProblemMeets(problem_id=problem_ids[link], meet_id=meets[m['date']].pk)
+            for m in fetched for link, _ in m['problems'] if link in problem_ids
+        ]
+        manager_rows = [
+            MeetManagers(meet_id=meets[m['date']].pk, user_id=users[names[name][0]].pk)
+            for m in fetched for name in m['managers']
+        ]
+        ProblemMeets.objects.bulk_create(problem_rows, ignore_conflicts=True, batch_size=500)
+        MeetManagers.objects.bulk_create(manager_rows, ignore_conflicts=True, batch_size=500)
+        counts['problem links added'] = problem_links.count() - before[0]
+        counts['manager links added'] = manager_links.count() - before[1]
+        return counts
+
+    def report(self, posts, fetched, counts, timings, dry_run):
+        if dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN - nothing was written'))
+        self.stdout.write(f'Posts: {len(posts)} selected, {len(fetched)} fetched')
+        for name, count in counts.items():
+            self.stdout.write(f'  {name}: {count}')
+        if self.failures:
+            self.stdout.write(self.style.WARNING(
+                f'Failed: {sum(self.failures.values())} (' +
+                ', '.join(f'{reason}: {count}' for reason, count in self.failures.most_common()) + ')'
+            ))
+        self.stdout.write('Timings: ' + ', '.join(f'{stage} {seconds:.2f}s' for stage, seconds in timings.items())
+                          + f', total {sum(timings.values()):.2f}s')
+        self.stdout.write(self.style.SUCCESS('Import complete.'))
@@ -0,0 +1,52 @@
+"""
+Report on the on-disk cache of scraped pages (board.http_cache).
+
+Counters of processes still running (web workers, a long scrape) are
+added when they exit.
+
+Usage:
+    python manage.py scrape_cache_stats
+    python manage.py scrape_cache_stats --reset   # zero the counters
+"""
+from django.core.management.base import BaseCommand
+
+from board.http_cache import STAT_NAMES, get_cache
+
+
+class Command(BaseCommand):
+    help = 'Show size and hit ratio of the scraped pages cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Reset the hit/miss counters after reporting',
+        )
+
+    def handle(self, *args, **options):
+        cache = get_cache()
+        if cache is None:
+            self.stdout.write(self.style.WARNING('Scrape cache disabled (SCRAPE_CACHE_DIR is empty).'))
+            return
+
+        entries = cache.entries() if cache.directory.exists() else []
+        size = sum(entry_size for _, _, entry_size in entries)
+        stats = cache.stats()
+        total = sum(stats.values())
+
+        self.stdout.write(f'Directory: {cache.directory}')
+        self.stdout.write(
+            f'Pages: {len(entries)}, {size / 1024 / 1024:.1f} MB of {cache.max_bytes / 1024 / 1024:.0f} MB '
+            f'(max age {cache.max_age}s)'
+        )
+        for name in STAT_NAMES:
+            share = stats[name] / total * 100 if total else 0.0
+            self.stdout.write(f'  {name:<12} {stats[name]:>8}  ({share:.1f}%)')
+        # A 304 still costs a round trip but no download and no parsing
+        served = stats['hit'] + stats['revalidated']
+        ratio = served / total * 100 if total else 0.0
+        self.stdout.write(self.style.SUCCESS(f'Hit ratio: {ratio:.1f}% of {total} fetches'))
+
+        if options['reset']:
+            cache.reset_stats()
+            self.stdout.write('Counters reset.')
@@ -1,16 +1,97 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import requests
 from django.core.management.base import BaseCommand
+from django.utils import timezone
+from board.cache import invalidate_sessions, sessions_of_problems
 from board.models import Problem
+from board.scraping import HostSessionPool, difficulty_parser, scrape_difficulty
+
 
 class Command(BaseCommand):
     help = 'Fetch and update difficulties for all problems from Kattis/LeetCode.'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='Number of pages fetched in parallel (default: 1)',
+        )
+        parser.add_argument(
+            '--per-host',
+            type=int,
+            default=4,
+            help='Maximum simultaneous requests to a single host (default: 4)',
+        )
+        parser.add_argument(
+            '--missing',
+            action='store_true',
+            help='Only problems without a difficulty, e.g. from cron to retry failed scrapes',
+        )
+
     def handle(self, *args, **options):
-        updated = 0
-        for problem in Problem.objects.all():
-            if 'kattis.com' in problem.link:
-                if problem._fetch_kattis_difficulty():
-                    updated += 1
-            elif 'leetcode.com' in problem.link:
-                if problem._fetch_leetcode_difficulty():
-                    updated += 1
-        self.stdout.write(self.style.SUCCESS(f'Updated difficulties for {updated} problems.'))
+        concurrency = max(1, options['concurrency'])
+        pool = HostSessionPool(per_host=max(1, options['per_host']))
+
+        problems = Problem.objects.all()
+        if options['missing']:
+            problems = problems.filter(difficulty='')
+        problems = [p for p in problems if difficulty_parser(p.link)]
+        updated, fields = [], set()
+        failures = Counter()
+
+        start = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                futures = {
+                    executor.submit(scrape_difficulty, problem.link, pool): problem
+                    for problem in problems
+                }
+                for future in as_completed(futures):
+                    problem = futures[future]
+                    try:
+                        scraped = future.result()
+                    except requests.RequestException as e:
+                        failures[f'network error ({urlsplit(problem.link).netloc})'] += 1
+                        self.stderr.write(f'Error fetching {problem.link}: {e}')
+                        continue
+                    except Exception as e:
+                        failures['parse error'] += 1
+                        self.stderr.write(f'Error parsing {problem.link}: {e}')
+                        continue
+                    if not scraped:
+                        failures['no difficulty on page'] += 1
+                        continue
+                    for name, value in scraped.items():
+                        setattr(problem, name, value)
+                    problem.refresh_derived_fields()
+                    fields.update(scraped, ['difficulty_level'])
+                    updated.append(problem)
+        finally:
+            pool.close()
+        elapsed = time.monotonic() - start
+
+        if updated:
+            # bulk_update leaves auto_now fields alone
+            now = timezone.now()
+            for problem in updated:
+                problem.updated_at = now
+            Problem.objects.bulk_update(updated, sorted(fields | {'updated_at'}), batch_size=200)
+            # bulk_update skips signals, so drop the affected /meets pages here
+            invalidate_sessions(sessions_of_problems([p.pk for p in updated]))
+
+        rate = len(problems) / elapsed if elapsed else 0.0
+        self.stdout.write(
+            f'Fetched {len(problems)} pages in {elapsed:.1f}s '
+            f'({rate:.1f} pages/s, concurrency {concurrency}, {pool.per_host} per host)'
+        )
+        if failures:
+            self.stdout.write(self.style.WARNING(
+                f'Failed: {sum(failures.values())} (' +
+                ', '.join(f'{reason}: {count}' for reason, count in failures.most_common()) + ')'
+            ))
+        self.stdout.write(self.style.SUCCESS(f'Updated difficulties for {len(updated)} problems.'))
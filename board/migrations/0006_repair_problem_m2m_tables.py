@@ -0,0 +1,48 @@
+from django.db import migrations
+
+
+def repair_problem_m2m_tables(apps, schema_editor):
+    """
+    0005 gave Problem an integer pk, but the meets/categories through tables
+    created while `link` was the pk still reference board_problem.link, so
+    every new M2M row fails its foreign key. Rebuild those tables against
+    the id column, carrying existing rows over by link.
+    """
+    Problem = apps.get_model('board', 'Problem')
+    connection = schema_editor.connection
+    quote = schema_editor.quote_name
+
+    for field_name in ('meets', 'categories'):
+        through = Problem._meta.get_field(field_name).remote_field.through
+        table = through._meta.db_table
+        with connection.cursor() as cursor:
+            relations = connection.introspection.get_relations(cursor, table)
+        if relations.get('problem_id', (None, None))[0] != 'link':
+            continue
+
+        other = next(f for f in through._meta.concrete_fields
+                     if f.is_relation and f.attname != 'problem_id')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT p.id, t.{quote(other.column)} FROM {quote(table)} t "
+                f"JOIN {quote(Problem._meta.db_table)} p ON p.link = t.problem_id"
+            )
+            rows = cursor.fetchall()
+
+        schema_editor.delete_model(through)
+        schema_editor.create_model(through)
+        through.objects.bulk_create(
+            [through(problem_id=problem_id, **{other.attname: other_id}) for problem_id, other_id in rows]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0005_problem_id_alter_problem_link'),
+        ('cheatsheet', '0003_algorithm_author'),
+    ]
+
+    operations = [
+        migrations.RunPython(repair_problem_m2m_tables, migrations.RunPython.noop),
+    ]
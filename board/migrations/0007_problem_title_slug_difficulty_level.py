@@ -0,0 +1,77 @@
+# Generated by Django 5.0 on 2026-10-18 07:13
+
+import re
+
+from django.db import migrations, models
+
+# Frozen copies of board.models.parse_problem_link and difficulty_level_for as
+# they were when this migration was written; later changes to the models must
+# not change what it does.
+PROBLEM_SLUG_RE = re.compile(r'/problems?/([^/?]+)')
+
+
+def parse_problem_link(link):
+    match = PROBLEM_SLUG_RE.search(link)
+    if not match:
+        return '', ''
+    slug = match.group(1)[:255]
+    return slug, slug.replace('-', ' ').replace('_', ' ').title()
+
+
+def difficulty_level_for(difficulty, difficulty_number):
+    if not difficulty:
+        return ''
+    d = difficulty.lower()
+    if 'easy' in d:
+        return 'easy'
+    elif 'medium' in d:
+        return 'medium'
+    elif 'hard' in d:
+        return 'hard'
+    if difficulty_number:
+        if difficulty_number < 3.0:
+            return 'easy'
+        elif difficulty_number < 5.0:
+            return 'medium'
+        else:
+            return 'hard'
+    return ''
+
+
+def backfill_derived_fields(apps, schema_editor):
+    Problem = apps.get_model('board', 'Problem')
+    problems = list(Problem.objects.all())
+    for problem in problems:
+        problem.slug, problem.title = parse_problem_link(problem.link)
+        problem.difficulty_level = difficulty_level_for(problem.difficulty, problem.difficulty_number)
+    Problem.objects.bulk_update(problems, ['slug', 'title', 'difficulty_level'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0006_repair_problem_m2m_tables'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='problem',
+            options={'ordering': ['platform', 'title', 'link']},
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='difficulty_level',
+            field=models.CharField(blank=True, choices=[('easy', 'Easy'), ('medium', 'Medium'), ('hard', 'Hard')], db_index=True, default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='slug',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='title',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_derived_fields, migrations.RunPython.noop),
+    ]
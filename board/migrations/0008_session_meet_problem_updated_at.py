@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-18 07:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0007_problem_title_slug_difficulty_level'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meet',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,6 +1,60 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from datetime import datetime
+import re
+
+PROBLEM_SLUG_RE = re.compile(r'/problems?/([^/?]+)')
+
+DIFFICULTY_LEVELS = [
+    ('easy', 'Easy'),
+    ('medium', 'Medium'),
+    ('hard', 'Hard'),
+]
+
+
+def parse_problem_link(link):
+    """Return (platform slug, display title) for a problem URL, or ('', '')"""
+    match = PROBLEM_SLUG_RE.search(link)
+    if not match:
+        return '', ''
+    slug = match.group(1)[:255]
+    return slug, slug.replace('-', ' ').replace('_', ' ').title()
+
+
+def difficulty_level_for(difficulty, difficulty_number):
+    """Normalize a scraped difficulty to easy/medium/hard, or ''"""
+    if not difficulty:
+        return ''
+    d = difficulty.lower()
+    if 'easy' in d:
+        return 'easy'
+    elif 'medium' in d:
+        return 'medium'
+    elif 'hard' in d:
+        return 'hard'
+    if difficulty_number:
+        if difficulty_number < 3.0:
+            return 'easy'
+        elif difficulty_number < 5.0:
+            return 'medium'
+        else:
+            return 'hard'
+    return ''
+
+
+def season_for_month(month):
+    """Map a month (1-12) to its session season"""
+    if 9 <= month <= 12:
+        return 'autumn'
+    elif 1 <= month <= 4:
+        return 'winter'
+    return 'summer'
+
+
+def current_season():
+    """Return (season, year) for today"""
+    now = datetime.now()
+    return season_for_month(now.month), now.year
 
 
 class Session(models.Model):
@@ -36,6 +90,11 @@ class Session(models.Model):
         default='wednesday'
     )
 
+    # Last change, for the validators of the pages showing it (board.conditional)
+    updated_at = models.DateTimeField(
+        auto_now=True
+    )
+
     class Meta:
         unique_together = ('season', 'year')
         ordering = ['-year', 'season']
@@ -77,89 +136,100 @@ class Meet(models.Model):
         related_name="meets_managed"
     )
 
+    updated_at = models.DateTimeField(
+        auto_now=True
+    )
+
     def save(self, *args, **kwargs):
         # Auto-determine and get/create session from date
         if self.date and not self.session:
-            month = self.date.month
-            year = self.date.year
-            if 9 <= month <= 12:
-                season = 'autumn'
-            elif 1 <= month <= 4:
-                season = 'winter'
-            else:
-                season = 'summer'
             self.session, _ = Session.objects.get_or_create(
-                season=season,
-                year=year,
+                season=season_for_month(self.date.month),
+                year=self.date.year,
                 defaults={
                     'local': 'AA-3189',
                     'time': datetime.strptime('18:00', '%H:%M').time()
                 }
             )
-        super().save(*args, **kwargs)
-
-        # Auto-fetch problems from Kattis contest if contest_link exists
-        if self.contest_link and 'kattis.com/contests/' in self.contest_link:
-            try:
-                self._fetch_kattis_problems()
-            except Exception as e:
-                print(f"Warning: Failed to fetch Kattis problems for meet {self.id}: {str(e)}")
-
-    def _fetch_kattis_problems(self):
-        """Fetch problems from Kattis contest and create Problem objects"""
-        import requests
-        from bs4 import BeautifulSoup
-        import re
-
-        if not self.contest_link:
-            return
+        from board.scraping import is_kattis_contest
 
-        contest_match = re.search(r'/contests/([^/?]+)', self.contest_link)
-        if not contest_match:
-            return
-
-        try:
-            response = requests.get(self.contest_link, timeout=10)
-            response.raise_for_status()
-        except requests.RequestException as e:
-            print(f"Network error fetching contest: {str(e)}")
-            return
-
-        try:
-            soup = BeautifulSoup(response.text, 'html.parser')
-        except Exception as e:
-            print(f"Error parsing HTML: {str(e)}")
-            return
-
-        problem_links = soup.find_all('a', href=re.compile(r'/(?:contests/[^/]+/)?problems/[^/?]+'))
-
-        for link in problem_links:
-            try:
-                problem_url = link.get('href')
-                if not problem_url:
-                    continue
-
-                problem_url = re.sub(r'/contests/[^/]+/problems/', '/problems/', problem_url)
-
-                if not problem_url.startswith('http'):
-                    base_url = 'https://open.kattis.com' if 'open.kattis.com' in self.contest_link else 'https://kattis.com'
-                    problem_url = base_url + problem_url
-
-                problem, _ = Problem.objects.get_or_create(
-                    link=problem_url,
-                    defaults={'platform': 'Kattis'}
-                )
-                problem.meets.add(self)
-            except Exception as e:
-                print(f"Error creating problem: {str(e)}")
-                continue
+        contest_changed = self.contest_link != getattr(self, '_loaded_contest_link', '')
+        super().save(*args, **kwargs)
+        self._loaded_contest_link = self.contest_link
+
+        # Kattis contest problems are imported off the request path, and only
+        # when the link changed; use refresh_contest_problems() to force it
+        if contest_changed and is_kattis_contest(self.contest_link):
+            self.refresh_contest_problems()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'contest_link' in field_names:
+            instance._loaded_contest_link = instance.contest_link
+        return instance
+
+    def refresh_contest_problems(self):
+        """Queue a background import of the Kattis contest problems, once
+        the current transaction has committed."""
+        from board.tasks import queue_contest_import
+
+        transaction.on_commit(lambda: queue_contest_import(self.pk))
+
+    def import_contest_problems(self, http=None):
+        """Fetch the Kattis contest page and attach its problems to this meet.
+
+        Returns the number of problems linked; network errors propagate as
+        `requests.RequestException`.
+        """
+        from board.scraping import fetch_parsed, is_kattis_contest, parse_kattis_contest_problems
+
+        if not is_kattis_contest(self.contest_link):
+            return 0
+        links = fetch_parsed(self.contest_link, parse_kattis_contest_problems, self.contest_link, http=http)
+        return self.add_problem_links(links, platform='Kattis')
+
+    def add_problem_links(self, links, platform):
+        """Attach the problems behind `links`, creating the missing ones.
+
+        Runs a fixed number of queries whatever the number of links: one to
+        find existing problems, one bulk insert for new problems, one to read
+        their ids, one bulk insert of the through rows and one to (re)index
+        the problems for search.
+        """
+        from board.cache import invalidate_sessions
+        from cheatsheet import search
+
+        links = list(dict.fromkeys(links))
+        if not links:
+            return 0
+        existing = set(Problem.objects.filter(link__in=links).values_list('link', flat=True))
+        new_problems = [Problem(link=link, platform=platform) for link in links if link not in existing]
+        for problem in new_problems:
+            problem.refresh_derived_fields()
+        with transaction.atomic():
+            Problem.objects.bulk_create(new_problems, ignore_conflicts=True)
+            problem_ids = list(Problem.objects.filter(link__in=links).values_list('pk', flat=True))
+            Through = Problem.meets.through
+            Through.objects.bulk_create(
+                [Through(problem_id=problem_id, meet_id=self.pk) for problem_id in problem_ids],
+                ignore_conflicts=True,
+            )
+        # Bulk writes send no signals
+        invalidate_sessions([self.session_id])
+        search.index_problems(problem_ids)
+        return len(links)
 
     def get_categories(self):
         """Get all unique categories from problems in this meet"""
-        categories = set()
-        for problem in self.problems.all():
-            categories.update(problem.categories.all())
-        return sorted(categories, key=lambda c: c.name)
+        if 'problems' in getattr(self, '_prefetched_objects_cache', {}):
+            # Reuse the view's nested prefetch instead of one query per problem
+            categories = set()
+            for problem in self.problems.all():
+                categories.update(problem.categories.all())
+            return sorted(categories, key=lambda c: c.name)
+        from cheatsheet.models import AlgorithmCategory
+        return list(AlgorithmCategory.objects.filter(problems__meets=self).distinct().order_by('name'))
 
     class Meta:
         ordering = ['-date']
@@ -212,108 +282,109 @@ class Problem(models.Model):
         default=None
     )
 
-    def _fetch_kattis_difficulty(self, save_on_success=True):
+    # Derived from link/difficulty in save() so pages never recompute them
+    title = models.CharField(
+        max_length=255,
+        blank=True,
+        default="",
+        editable=False,
+        db_index=True
+    )
+
+    slug = models.CharField(
+        max_length=255,
+        blank=True,
+        default="",
+        editable=False,
+        db_index=True
+    )
+
+    difficulty_level = models.CharField(
+        max_length=10,
+        choices=DIFFICULTY_LEVELS,
+        blank=True,
+        default="",
+        editable=False,
+        db_index=True
+    )
+
+    updated_at = models.DateTimeField(
+        auto_now=True
+    )
+
+    class Meta:
+        ordering = ['platform', 'title', 'link']
+
+    def refresh_derived_fields(self):
+        """Recompute title, slug and difficulty_level (for bulk writes)"""
+        self.slug, self.title = parse_problem_link(self.link)
+        self.difficulty_level = difficulty_level_for(self.difficulty, self.difficulty_number)
+
+    def save(self, *args, **kwargs):
+        self.refresh_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields) | {'updated_at'}
+            if 'link' in update_fields:
+                update_fields |= {'title', 'slug'}
+            if update_fields & {'difficulty', 'difficulty_number'}:
+                update_fields.add('difficulty_level')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
+    def _apply_scraped_difficulty(self, parser, save_on_success, http=None):
+        from board.scraping import fetch_parsed
+
+        fields = fetch_parsed(self.link, parser, http=http)
+        if not fields:
+            return False
+        for name, value in fields.items():
+            setattr(self, name, value)
+        if save_on_success:
+            self.save(update_fields=list(fields))
+        return True
+
+    def _fetch_kattis_difficulty(self, save_on_success=True, http=None):
         """Fetch difficulty from Kattis problem page"""
-        import requests
-        from bs4 import BeautifulSoup
+        from board.scraping import parse_kattis_difficulty
 
         try:
-            headers = {'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36'}
-            response = requests.get(self.link, headers=headers, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            diff_card = soup.find('div', class_='metadata-difficulty-card')
-            if diff_card:
-                spans = diff_card.find_all('span')
-                if len(spans) >= 2:
-                    diff_num_text = spans[0].get_text(strip=True)
-                    diff_level_text = None
-                    for span in spans:
-                        if 'text-lg' in span.get('class', []):
-                            diff_level_text = span.get_text(strip=True)
-                            break
-                    if diff_num_text and diff_level_text:
-                        try:
-                            self.difficulty_number = float(diff_num_text)
-                            self.difficulty = f"{diff_num_text} {diff_level_text}"
-                            if save_on_success:
-                                self.save(update_fields=['difficulty', 'difficulty_number'])
-                            return True
-                        except (ValueError, TypeError):
-                            pass
-            return False
+            return self._apply_scraped_difficulty(parse_kattis_difficulty, save_on_success, http)
         except Exception as e:
             print(f"Error fetching Kattis difficulty for {self.link}: {str(e)}")
             return False
 
-    def _fetch_leetcode_difficulty(self, save_on_success=True):
+    def _fetch_leetcode_difficulty(self, save_on_success=True, http=None):
         """Fetch difficulty from LeetCode problem page"""
-        import requests
-        from bs4 import BeautifulSoup
-        import re
-        import json
+        from board.scraping import parse_leetcode_difficulty
 
         try:
-            headers = {'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36'}
-            response = requests.get(self.link, headers=headers, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            for script in soup.find_all('script', type='application/json'):
-                try:
-                    data = json.loads(script.string)
-                    if isinstance(data, dict) and 'difficulty' in data:
-                        self.difficulty = data['difficulty']
-                        if save_on_success:
-                            self.save(update_fields=['difficulty'])
-                        return True
-                except Exception:
-                    pass
-            text = soup.get_text()
-            for level in ['Hard', 'Medium', 'Easy']:
-                if re.search(rf'Difficulty[:\s]+{level}', text):
-                    self.difficulty = level
-                    if save_on_success:
-                        self.save(update_fields=['difficulty'])
-                    return True
-            return False
+            return self._apply_scraped_difficulty(parse_leetcode_difficulty, save_on_success, http)
         except Exception as e:
             print(f"Error fetching LeetCode difficulty for {self.link}: {str(e)}")
             return False
 
-    def get_difficulty(self):
-        """Get difficulty, fetching if not cached"""
-        if self.difficulty:
-            return self.difficulty
+    def fetch_difficulty(self, save_on_success=True, http=None):
+        """Scrape the difficulty from the problem's platform (blocking)"""
         if 'kattis.com' in self.link:
-            self._fetch_kattis_difficulty()
-        elif 'leetcode.com' in self.link:
-            self._fetch_leetcode_difficulty()
+            return self._fetch_kattis_difficulty(save_on_success, http)
+        if 'leetcode.com' in self.link:
+            return self._fetch_leetcode_difficulty(save_on_success, http)
+        return False
+
+    def needs_difficulty(self):
+        """True when the difficulty is missing but can be scraped"""
+        return not self.difficulty and ('kattis.com' in self.link or 'leetcode.com' in self.link)
+
+    def get_difficulty(self):
+        """Get the stored difficulty; never hits the network"""
         return self.difficulty or "—"
 
     def get_difficulty_level(self):
         """Return easy/medium/hard for styling"""
-        if not self.difficulty:
-            return None
-        d = self.difficulty.lower()
-        if 'easy' in d:
-            return 'easy'
-        elif 'medium' in d:
-            return 'medium'
-        elif 'hard' in d:
-            return 'hard'
-        if self.difficulty_number:
-            if self.difficulty_number < 3.0:
-                return 'easy'
-            elif self.difficulty_number < 5.0:
-                return 'medium'
-            else:
-                return 'hard'
-        return None
+        return self.difficulty_level or None
 
     def __str__(self):
-        import re
-        match = re.search(r'/problems?/([^/?]+)', self.link)
-        if match:
-            title = match.group(1).replace('-', ' ').replace('_', ' ').title()
-            return f"{self.platform} - {title}"
+        if self.title:
+            return f"{self.platform} - {self.title}"
         return f"{self.platform} - {self.link[:50]}"
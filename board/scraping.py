@@ -0,0 +1,224 @@
+"""
+Fetching and parsing of Kattis/LeetCode pages.
+
+Parsers take raw HTML and return the Problem fields to update, so the same
+code serves a single admin fetch and the concurrent bulk refresh. Pages go
+through the on-disk cache in board.http_cache; `fetch_parsed` also skips
+parsing a page that did not change since it was last parsed.
+"""
+import json
+import re
+import threading
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from board.http_cache import get_cache
+
+HEADERS = {'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36'}
+TIMEOUT = 10
+
+
+class HostSessionPool:
+    """Keep-alive `requests.Session` per host, with at most `per_host`
+    requests in flight to the same host at once. Thread-safe."""
+
+    def __init__(self, per_host=4):
+        self.per_host = per_host
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _for_host(self, host):
+        with self._lock:
+            if host not in self._hosts:
+                session = requests.Session()
+                session.headers.update(HEADERS)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.per_host)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._hosts[host] = (session, threading.BoundedSemaphore(self.per_host))
+            return self._hosts[host]
+
+    def get(self, url, **kwargs):
+        session, slots = self._for_host(urlsplit(url).netloc)
+        with slots:
+            return session.get(url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            for session, _ in self._hosts.values():
+                session.close()
+            self._hosts.clear()
+
+
+def fetch_page(url, http=None):
+    """GET `url` and return its text; raises `requests.RequestException`."""
+    cache = get_cache()
+    if cache is not None:
+        return cache.fetch(url, http, headers=HEADERS, timeout=TIMEOUT).text
+    response = (http or requests).get(url, headers=HEADERS, timeout=TIMEOUT)
+    response.raise_for_status()
+    return response.text
+
+
+def fetch_parsed(url, parser, *args, http=None):
+    """Return `parser(html, *args)` for the page at `url`.
+
+    When the page is unchanged since the last fetch (fresh in the cache or
+    answered with 304) the stored result is returned without parsing, so
+    parsers must return JSON-serializable values.
+    """
+    cache = get_cache()
+    if cache is None:
+        return parser(fetch_page(url, http), *args)
+    page = cache.fetch(url, http, headers=HEADERS, timeout=TIMEOUT)
+    name = parser.__qualname__
+    found, result = cache.parsed(page, name)
+    if not found:
+        result = parser(page.text, *args)
+        cache.store_parsed(page, name, result)
+    return result
+
+
+def parse_kattis_difficulty(html):
+    """Return {'difficulty', 'difficulty_number'} from a Kattis problem page, or None."""
+    soup = BeautifulSoup(html, 'html.parser')
+    diff_card = soup.find('div', class_='metadata-difficulty-card')
+    if not diff_card:
+        return None
+    spans = diff_card.find_all('span')
+    if len(spans) < 2:
+        return None
+    diff_num_text = spans[0].get_text(strip=True)
+    diff_level_text = None
+    for span in spans:
+        if 'text-lg' in span.get('class', []):
+            diff_level_text = span.get_text(strip=True)
+            break
+    if not (diff_num_text and diff_level_text):
+        return None
+    try:
+        number = float(diff_num_text)
+    except (ValueError, TypeError):
+        return None
+    return {'difficulty': f"{diff_num_text} {diff_level_text}", 'difficulty_number': number}
+
+
+def parse_leetcode_difficulty(html):
+    """Return {'difficulty'} from a LeetCode problem page, or None."""
+    soup = BeautifulSoup(html, 'html.parser')
+    for script in soup.find_all('script', type='application/json'):
+        try:
+            data = json.loads(script.string)
+            if isinstance(data, dict) and 'difficulty' in data:
+                return {'difficulty': data['difficulty']}
+        except Exception:
+            pass
+    text = soup.get_text()
+    for level in ['Hard', 'Medium', 'Easy']:
+        if re.search(rf'Difficulty[:\s]+{level}', text):
+            return {'difficulty': level}
+    return None
+
+
+def difficulty_parser(link):
+    """Parser for the platform hosting `link`, or None if unsupported."""
+    if 'kattis.com' in link:
+        return parse_kattis_difficulty
+    if 'leetcode.com' in link:
+        return parse_leetcode_difficulty
+    return None
+
+
+def scrape_difficulty(link, http=None):
+    """Fetch and parse the difficulty fields for `link`.
+
+    Returns None when the platform is unsupported or the page has no
+    difficulty; network errors propagate as `requests.RequestException`.
+    """
+    parser = difficulty_parser(link)
+    if parser is None:
+        return None
+    return fetch_parsed(link, parser, http=http)
+
+
+_CONTEST_PROBLEM_HREF = re.compile(r'/(?:contests/[^/]+/)?problems/[^/?]+')
+
+
+def is_kattis_contest(link):
+    return bool(link) and 'kattis.com/contests/' in link
+
+
+def parse_kattis_contest_problems(html, contest_link):
+    """Problem URLs linked from a Kattis contest page, in page order, without duplicates."""
+    base_url = 'https://open.kattis.com' if 'open.kattis.com' in contest_link else 'https://kattis.com'
+    soup = BeautifulSoup(html, 'html.parser')
+    links = []
+    for anchor in soup.find_all('a', href=_CONTEST_PROBLEM_HREF):
+        url = re.sub(r'/contests/[^/]+/problems/', '/problems/', anchor['href'])
+        if not url.startswith('http'):
+            url = base_url + url
+        if url not in links:
+            links.append(url)
+    return links
+
+
+CALCULUM_URL = 'https://calculum.aediroum.ca/'
+
+
+def parse_calculum_index(html, base_url=CALCULUM_URL):
+    """Posts listed on the Calculum front page: dicts with url, title,
+    datetime (ISO string) and description."""
+    soup = BeautifulSoup(html, 'html.parser')
+    posts = []
+    for li in soup.find_all('li'):
+        link = li.find('a')
+        if not link or '/posts/' not in link.get('href', ''):
+            continue
+        article = link.find('article')
+        header = article.find('header') if article else None
+        if not header:
+            continue
+        h3 = header.find('h3')
+        time_elem = header.find('time')
+        if not (h3 and time_elem):
+            continue
+        span = h3.find('span')
+        p_tag = article.find('p')
+        posts.append({
+            'url': urljoin(base_url, link['href']),
+            'title': (span or h3).get_text(strip=True),
+            'datetime': time_elem.get('datetime', ''),
+            'description': p_tag.get_text(strip=True) if p_tag else '',
+        })
+    return posts
+
+
+def parse_calculum_post(html):
+    """Managers, Kattis contest link and individual problem links of a post.
+
+    Returns {'managers': [full names], 'contest_link': str, 'problems':
+    [[link, platform]]}; problem links are only collected when the post has
+    no contest, whose problems come from the contest page instead.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    managers = []
+    address = soup.find('address')
+    if address:
+        text = address.get_text(strip=True)
+        if text.startswith('par '):
+            managers = [name.strip() for name in re.split(r'\s+et\s+', text[4:].strip(), flags=re.IGNORECASE)
+                        if name.strip()]
+
+    hrefs = [a['href'] for a in soup.find_all('a', href=True)]
+    contest_link = next((href for href in hrefs if 'kattis.com/contests' in href), '')
+    problems = []
+    if not contest_link:
+        for href in dict.fromkeys(hrefs):
+            if 'kattis.com/problems/' in href:
+                problems.append([href, 'Kattis'])
+            elif 'leetcode.com/problems/' in href:
+                problems.append([href, 'LeetCode'])
+    return {'managers': managers, 'contest_link': contest_link, 'problems': problems}
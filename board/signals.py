@@ -0,0 +1,121 @@
+"""
+Cache invalidation for the /meets pages (see board.cache).
+
+Each receiver works out which sessions display the changed object and drops
+only those pages; Session changes drop everything since every page lists
+all sessions in its selector.
+"""
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from board.cache import invalidate_all, invalidate_sessions, sessions_of_meets, sessions_of_problems
+from board.models import Meet, Problem, Session
+from cheatsheet.models import Algorithm, AlgorithmCategory
+
+# pk_set is empty on clear, so clears are handled before the rows go away
+_M2M_ACTIONS = {'post_add', 'post_remove', 'pre_clear'}
+
+
+@receiver(post_save, sender=Session)
+@receiver(post_delete, sender=Session)
+def session_changed(sender, instance, **kwargs):
+    invalidate_all()
+
+
+@receiver(pre_save, sender=Meet)
+def meet_moving(sender, instance, raw=False, **kwargs):
+    # Remember the previous session so a meet moved between sessions
+    # clears both pages
+    if instance.pk and not raw:
+        instance._previous_session_id = (
+            Meet.objects.filter(pk=instance.pk).values_list('session_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Meet)
+@receiver(post_delete, sender=Meet)
+def meet_changed(sender, instance, **kwargs):
+    invalidate_sessions([instance.session_id, getattr(instance, '_previous_session_id', None)])
+
+
+@receiver(pre_delete, sender=Problem)
+@receiver(pre_delete, sender=AlgorithmCategory)
+@receiver(pre_delete, sender=User)
+def remember_sessions(sender, instance, **kwargs):
+    # M2M rows are gone by post_delete, so resolve the sessions first
+    instance._board_sessions = list(_sessions_showing(instance))
+    if isinstance(instance, User):
+        # The author is set to NULL by an UPDATE that leaves updated_at alone
+        instance._authored_algorithms = list(instance.algorithms.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Problem)
+@receiver(post_delete, sender=AlgorithmCategory)
+@receiver(post_delete, sender=User)
+def related_deleted(sender, instance, **kwargs):
+    invalidate_sessions(getattr(instance, '_board_sessions', []))
+    if isinstance(instance, User):
+        Algorithm.objects.filter(pk__in=getattr(instance, '_authored_algorithms', [])).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Problem)
+@receiver(post_save, sender=AlgorithmCategory)
+@receiver(post_save, sender=User)
+def related_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    # Logins only touch last_login, which no page displays
+    if not created and update_fields != frozenset({'last_login'}):
+        invalidate_sessions(_sessions_showing(instance))
+        if isinstance(instance, User):
+            # Users have no timestamp: the meets they manage and the
+            # algorithms they wrote carry the change to the page validators
+            # (board.conditional)
+            now = timezone.now()
+            instance.meets_managed.update(updated_at=now)
+            instance.algorithms.update(updated_at=now)
+
+
+@receiver(m2m_changed, sender=Problem.meets.through)
+def problem_meets_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in _M2M_ACTIONS:
+        return
+    if reverse:
+        # instance is a Meet, pk_set holds problems
+        invalidate_sessions([instance.session_id])
+    elif action == 'pre_clear':
+        invalidate_sessions(_sessions_showing(instance))
+    else:
+        invalidate_sessions(sessions_of_meets(pk_set))
+
+
+@receiver(m2m_changed, sender=Problem.categories.through)
+def problem_categories_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in _M2M_ACTIONS:
+        return
+    if not reverse or action == 'pre_clear':
+        invalidate_sessions(_sessions_showing(instance))
+    else:
+        invalidate_sessions(sessions_of_problems(pk_set))
+
+
+@receiver(m2m_changed, sender=Meet.managers.through)
+def meet_managers_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in _M2M_ACTIONS:
+        return
+    if not reverse:
+        invalidate_sessions([instance.session_id])
+    elif action == 'pre_clear':
+        # instance is a User
+        invalidate_sessions(_sessions_showing(instance))
+    else:
+        invalidate_sessions(sessions_of_meets(pk_set))
+
+
+def _sessions_showing(instance):
+    """Sessions whose page displays a Problem, AlgorithmCategory or User."""
+    if isinstance(instance, Problem):
+        return sessions_of_problems([instance.pk])
+    if isinstance(instance, AlgorithmCategory):
+        return sessions_of_problems(instance.problems.values('pk'))
+    return sessions_of_meets(instance.meets_managed.values('pk'))
@@ -0,0 +1,138 @@
+"""
+Background work for the board app.
+
+Scraping Kattis/LeetCode must never happen while a page is being rendered,
+so views hand that work to a daemon thread living in each worker process.
+"""
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundQueue:
+    """In-process FIFO drained by a single daemon thread.
+
+    Tasks are identified by a key: a key that is already pending, or that ran
+    less than `cooldown` seconds ago, is not queued again. This keeps page
+    views from re-queuing the same failing scrape on every hit.
+    """
+
+    def __init__(self, name, cooldown=600):
+        self.name = name
+        self.cooldown = cooldown
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._finished = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def enqueue(self, key, func, *args):
+        """Queue `func(*args)` unless `key` is pending or cooling down."""
+        if not getattr(settings, 'BACKGROUND_TASKS_ENABLED', True):
+            return False
+        with self._lock:
+            if key in self._pending:
+                return False
+            finished = self._finished.get(key)
+            if finished is not None and time.monotonic() - finished < self.cooldown:
+                return False
+            self._pending.add(key)
+            self._ensure_worker()
+        self._queue.put((key, func, args))
+        return True
+
+    def _ensure_worker(self):
+        # Started lazily so each forked gunicorn worker gets its own thread
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            key, func, args = self._queue.get()
+            close_old_connections()
+            try:
+                func(*args)
+            except Exception:
+                logger.exception('Background task %s failed in %s', key, self.name)
+            finally:
+                close_old_connections()
+                with self._lock:
+                    self._pending.discard(key)
+                    self._finish(key)
+                self._queue.task_done()
+
+    def _finish(self, key):
+        # Kept in finishing order, so cooled down keys are dropped from the front
+        now = time.monotonic()
+        self._finished.pop(key, None)
+        self._finished[key] = now
+        for old in list(self._finished):
+            if now - self._finished[old] < self.cooldown:
+                break
+            del self._finished[old]
+
+
+difficulty_queue = BackgroundQueue('difficulty-refresh')
+
+
+def refresh_difficulty(problem_id):
+    """Fetch and store the difficulty of a problem that still has none."""
+    from board.models import Problem
+
+    problem = Problem.objects.filter(pk=problem_id, difficulty='').first()
+    if problem is not None:
+        problem.fetch_difficulty()
+
+
+def queue_difficulty_refresh(problems):
+    """Queue every problem missing a difficulty; return how many were queued."""
+    queued = 0
+    for problem in problems:
+        if problem.needs_difficulty() and difficulty_queue.enqueue(problem.pk, refresh_difficulty, problem.pk):
+            queued += 1
+    return queued
+
+
+def _queue_missing_difficulties():
+    from board.models import Problem
+
+    missing = Problem.objects.filter(difficulty='').filter(
+        Q(link__contains='kattis.com') | Q(link__contains='leetcode.com')
+    ).only('pk', 'link', 'difficulty')
+    queue_difficulty_refresh(missing)
+
+
+def queue_missing_difficulties():
+    """Queue every problem still missing a difficulty, looked up in the
+    background at most once per cooldown.
+
+    Called on each /meets request before the validators and the page cache,
+    so a failed scrape is retried even when no page gets rendered.
+    """
+    return difficulty_queue.enqueue('missing', _queue_missing_difficulties)
+
+
+# No cooldown: an admin asking for a refresh right after a save must get it
+contest_queue = BackgroundQueue('kattis-contest-import', cooldown=0)
+
+
+def import_contest(meet_id):
+    """Import the problems of a meet's Kattis contest."""
+    from board.models import Meet
+
+    meet = Meet.objects.filter(pk=meet_id).first()
+    if meet is not None:
+        count = meet.import_contest_problems()
+        logger.info('Imported %d Kattis problems for meet %s', count, meet_id)
+
+
+def queue_contest_import(meet_id):
+    return contest_queue.enqueue(meet_id, import_contest, meet_id)
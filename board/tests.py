@@ -1,3 +1,673 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from board.bulkload import iter_json_array
+from board.http_cache import DiskHTTPCache, get_cache
+from board.models import Meet, Problem, Session, current_season
+from board.scraping import fetch_parsed
+from board.tasks import BackgroundQueue, _queue_missing_difficulties, refresh_difficulty
+from cheatsheet.models import Algorithm, AlgorithmCategory
+from project.testing import TEST_STORAGES
+
+# Queries allowed for a cold /meets render, including the validators query
+# (board.conditional) and the cache round-trip.
+# It must not depend on how many meets, problems, managers or categories exist.
+MEETS_QUERY_BUDGET = 13
+
+
+def build_session(season, year, meets, problems_per_meet):
+    """Create a session whose meets each have problems, categories and managers."""
+    session = Session.objects.create(season=season, year=year, time='18:00')
+    categories = AlgorithmCategory.objects.bulk_create(
+        AlgorithmCategory(name=f'{season}-{year} category {i}') for i in range(5)
+    )
+    managers = User.objects.bulk_create(
+        User(username=f'{season}-{year}-manager-{i}', first_name='Manager', last_name=str(i)) for i in range(3)
+    )
+    created = Meet.objects.bulk_create(
+        Meet(session=session, date=f'{year}-10-{i % 28 + 1:02d}') for i in range(meets)
+    )
+    problems = [
+        Problem(
+            link=f'https://open.kattis.com/problems/{season}{year}m{m.pk}p{i}',
+            platform='Kattis',
+            difficulty='' if i % 3 == 0 else '2.5 Medium',
+        )
+        for m in created for i in range(problems_per_meet)
+    ]
+    for problem in problems:
+        problem.refresh_derived_fields()
+    Problem.objects.bulk_create(problems)
+    Problem.meets.through.objects.bulk_create(
+        Problem.meets.through(problem_id=p.pk, meet_id=created[i // problems_per_meet].pk)
+        for i, p in enumerate(problems)
+    )
+    Problem.categories.through.objects.bulk_create(
+        Problem.categories.through(problem_id=p.pk, algorithmcategory_id=c.pk)
+        for i, p in enumerate(problems) for c in categories[i % 3:i % 3 + 2]
+    )
+    Meet.managers.through.objects.bulk_create(
+        Meet.managers.through(meet_id=m.pk, user_id=u.pk) for m in created for u in managers[:2]
+    )
+    return session
+
+
+@override_settings(BACKGROUND_TASKS_ENABLED=False, STORAGES=TEST_STORAGES)
+class MeetsQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        season, year = current_season()
+        cls.small = build_session('summer', 1999, meets=1, problems_per_meet=1)
+        cls.large = build_session(season, year, meets=40, problems_per_meet=10)
+
+    def setUp(self):
+        cache.clear()
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_data(self):
+        small = self.count_queries(f'/meets?session={self.small.pk}')
+        large = self.count_queries(f'/meets?session={self.large.pk}')
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, MEETS_QUERY_BUDGET)
+
+    def test_default_session_within_budget(self):
+        self.assertLessEqual(self.count_queries('/meets'), MEETS_QUERY_BUDGET)
+
+    def test_cached_page_costs_two_queries(self):
+        # Validators (board.conditional), then the cached page
+        self.count_queries(f'/meets?session={self.large.pk}')
+        self.assertEqual(self.count_queries(f'/meets?session={self.large.pk}'), 2)
+
+    def test_page_lists_problems_categories_and_managers(self):
+        response = self.client.get(f'/meets?session={self.large.pk}')
+        self.assertContains(response, 'class="problem-item"', count=400)
+        self.assertContains(response, 'Animée par: Manager 1', count=40)
+        self.assertContains(response, 'category 3')
+        self.assertContains(response, 'difficulty-medium')
+
+
+@override_settings(BACKGROUND_TASKS_ENABLED=False, STORAGES=TEST_STORAGES)
+class PageCacheInvalidationTests(TestCase):
+    """Each receiver of board.signals: the next GET shows the change."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.session = build_session('summer', 1999, meets=2, problems_per_meet=2)
+        cls.other = build_session('winter', 2001, meets=1, problems_per_meet=1)
+        cls.meet, cls.second_meet = Meet.objects.filter(session=cls.session).order_by('pk')
+        cls.problem = Problem.objects.filter(meets=cls.meet).first()
+        cls.new_problem = Problem.objects.create(link='https://open.kattis.com/problems/zeta', platform='Kattis')
+        cls.category = AlgorithmCategory.objects.create(name='Flots maximaux')
+        cls.user = User.objects.create(username='ada', first_name='Ada', last_name='Lovelace')
+
+    def setUp(self):
+        cache.clear()
+
+    def page(self, session=None):
+        response = self.client.get(f'/meets?session={(session or self.session).pk}')
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def assertShown(self, text, session=None, count=None):
+        page = self.page(session)
+        if count is None:
+            self.assertIn(text, page)
+        else:
+            self.assertEqual(page.count(text), count)
+
+    def assertNotShown(self, text, session=None):
+        self.assertNotIn(text, self.page(session))
+
+    def test_pages_are_served_from_the_cache(self):
+        self.page()
+        Meet.objects.filter(pk=self.meet.pk).update(description='Sans signal')
+        self.assertNotShown('Sans signal')
+
+    def test_session_edited(self):
+        self.page(self.other)
+        self.session.local = 'Salle 42'
+        self.session.save()
+        self.assertShown('Salle 42')
+        # Every page lists the sessions
+        self.assertShown('Été 1999', self.other)
+
+    def test_meet_edited_moved_and_deleted(self):
+        self.page()
+        self.page(self.other)
+        self.meet.description = 'Graphes ce soir'
+        self.meet.save()
+        self.assertShown('Graphes ce soir')
+
+        self.meet.session = self.other
+        self.meet.save()
+        self.assertNotShown('Graphes ce soir')
+        self.assertShown('Graphes ce soir', self.other)
+
+        self.meet.delete()
+        self.assertNotShown('Graphes ce soir', self.other)
+
+    def test_problem_edited_and_deleted(self):
+        self.page()
+        self.problem.difficulty = '9.1 Hard'
+        self.problem.save()
+        self.assertShown('difficulty-hard')
+        self.problem.delete()
+        self.assertShown('class="problem-item"', count=3)
+
+    def test_problem_meets_changed(self):
+        link = self.new_problem.link
+        self.page()
+        self.new_problem.meets.add(self.meet)
+        self.assertShown(link, count=1)
+        self.second_meet.problems.add(self.new_problem)
+        self.assertShown(link, count=2)
+        self.second_meet.problems.remove(self.new_problem)
+        self.assertShown(link, count=1)
+        self.new_problem.meets.clear()
+        self.assertNotShown(link)
+
+    def test_problem_categories_changed(self):
+        self.page()
+        self.problem.categories.add(self.category)
+        self.assertShown('Flots maximaux')
+        self.category.name = 'Flots'
+        self.category.save()
+        self.assertNotShown('Flots maximaux')
+        self.assertShown('>Flots<')
+        self.problem.categories.clear()
+        self.assertNotShown('>Flots<')
+
+        self.category.problems.add(self.problem)
+        self.assertShown('>Flots<')
+        self.category.problems.clear()
+        self.assertNotShown('>Flots<')
+
+        self.category.problems.add(self.problem)
+        self.page()
+        self.category.delete()
+        self.assertNotShown('>Flots<')
+
+    def test_meet_managers_changed(self):
+        self.page()
+        self.meet.managers.add(self.user)
+        self.assertShown('Animée par: Ada Lovelace', count=1)
+        self.user.meets_managed.add(self.second_meet)
+        self.assertShown('Animée par: Ada Lovelace', count=2)
+        self.user.last_name = 'King'
+        self.user.save()
+        self.assertShown('Animée par: Ada King', count=2)
+        self.meet.managers.clear()
+        self.assertShown('Animée par: Ada King', count=1)
+        self.user.meets_managed.clear()
+        self.assertNotShown('Ada King')
+
+        self.user.meets_managed.add(self.meet)
+        self.page()
+        self.user.delete()
+        self.assertNotShown('Ada King')
+
+    def test_logins_keep_the_cached_page(self):
+        self.meet.managers.add(self.user)
+        self.page()
+        Meet.objects.filter(pk=self.meet.pk).update(description='Sans signal')
+        self.user.last_login = datetime.now(timezone.utc)
+        self.user.save(update_fields=['last_login'])
+        self.assertNotShown('Sans signal')
+
+
+@override_settings(BACKGROUND_TASKS_ENABLED=False, STORAGES=TEST_STORAGES)
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.session = build_session('summer', 1999, meets=2, problems_per_meet=2)
+        cls.url = f'/meets?session={cls.session.pk}'
+
+    def setUp(self):
+        cache.clear()
+
+    def test_unchanged_page_answers_not_modified_in_one_query(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['Cache-Control'], 'public, no-cache')
+        # Deletions would not move it (see board.conditional)
+        self.assertNotIn('Last-Modified', response)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_to_shown_rows_change_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        problem = Problem.objects.filter(meets__session=self.session).first()
+        problem.categories.clear()
+        self.assertNotEqual(self.client.get(self.url)['ETag'], etag)
+
+        etag = self.client.get(self.url)['ETag']
+        problem.difficulty = '9.1 Hard'
+        problem.save(update_fields=['difficulty'])
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'difficulty-hard')
+
+    def test_deleted_meet_is_not_answered_not_modified(self):
+        response = self.client.get(self.url)
+        meet = Meet.objects.filter(session=self.session).first()
+        meet.delete()
+        response = self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=response['ETag'], HTTP_IF_MODIFIED_SINCE='Sun, 18 Oct 2099 00:00:00 GMT',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'class="meet-card', count=1)
+
+    def test_renamed_manager_is_not_answered_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        manager = User.objects.get(username='summer-1999-manager-0')
+        manager.first_name = 'Renamed'
+        manager.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Animée par: Renamed 0')
+
+    def test_renamed_or_deleted_author_is_not_answered_not_modified(self):
+        author = User.objects.get(username='summer-1999-manager-0')
+        Algorithm.objects.create(title='Dijkstra', code='pass', author=author)
+        etag = self.client.get('/cheatsheet')['ETag']
+        author.first_name = 'Renamed'
+        author.save()
+        response = self.client.get('/cheatsheet', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Renamed 0')
+
+        author.delete()
+        response = self.client.get('/cheatsheet', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Renamed 0')
+
+    def test_new_session_changes_the_etag(self):
+        # The session list is shown on every page
+        etag = self.client.get(self.url)['ETag']
+        build_session('winter', 2001, meets=1, problems_per_meet=1)
+        self.assertNotEqual(self.client.get(self.url)['ETag'], etag)
+
+    def test_other_sessions_meets_do_not_change_the_etag(self):
+        build_session('winter', 2001, meets=1, problems_per_meet=1)
+        etag = self.client.get(self.url)['ETag']
+        Meet.objects.filter(session__year=2001).update(description='Other')
+        self.assertEqual(self.client.get(self.url)['ETag'], etag)
+
+
+@override_settings(BACKGROUND_TASKS_ENABLED=False, STORAGES=TEST_STORAGES)
+class BackgroundQueueTests(TestCase):
+    def test_finished_keys_are_dropped_once_cooled_down(self):
+        queue = BackgroundQueue('test', cooldown=60)
+        with mock.patch('board.tasks.time.monotonic', side_effect=[0, 30, 30, 100]):
+            queue._finish('a')
+            queue._finish('b')
+            queue._finish('a')
+            self.assertEqual(list(queue._finished), ['b', 'a'])
+            queue._finish('c')
+        self.assertEqual(list(queue._finished), ['c'])
+
+    def test_missing_difficulties_are_queued_without_rendering(self):
+        session = build_session('summer', 1999, meets=1, problems_per_meet=3)
+        url = f'/meets?session={session.pk}'
+        etag = self.client.get(url)['ETag']
+        with mock.patch('board.views.queue_missing_difficulties') as queue_missing:
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        queue_missing.assert_called_once_with()
+
+        with mock.patch('board.tasks.difficulty_queue') as difficulty_queue:
+            _queue_missing_difficulties()
+        missing = Problem.objects.get(difficulty='')
+        difficulty_queue.enqueue.assert_called_once_with(missing.pk, refresh_difficulty, missing.pk)
+
+
+def kattis_page(number, level):
+    return (f'<div class="metadata-difficulty-card"><span>{number}</span>'
+            f'<span class="text-lg">{level}</span></div>')
+
+
+@override_settings(BACKGROUND_TASKS_ENABLED=False, SCRAPE_CACHE_DIR='')
+class UpdateDifficultiesTests(TestCase):
+    PAGES = {
+        'https://open.kattis.com/problems/alpha': kattis_page('2.5', 'Medium'),
+        'https://open.kattis.com/problems/beta': kattis_page('7.1', 'Hard'),
+        'https://open.kattis.com/problems/down': requests.ConnectionError('timed out'),
+        'https://open.kattis.com/problems/blank': '<html></html>',
+    }
+    LONG_AGO = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+    @classmethod
+    def setUpTestData(cls):
+        problems = Problem.objects.bulk_create(
+            Problem(link=link, platform='Kattis', difficulty='1.2 Easy' if 'beta' in link else '')
+            for link in [*cls.PAGES, 'https://codeforces.com/problemset/problem/1/A']
+        )
+        Problem.objects.filter(pk__in=[p.pk for p in problems]).update(updated_at=cls.LONG_AGO)
+
+    def fetch_page(self, url, http=None):
+        page = self.PAGES[url]
+        if isinstance(page, Exception):
+            raise page
+        return page
+
+    def run_command(self, *args):
+        stdout = io.StringIO()
+        with mock.patch('board.scraping.fetch_page', side_effect=self.fetch_page) as fetch_page, \
+                CaptureQueriesContext(connection) as queries:
+            call_command('update_problem_difficulties', *args, stdout=stdout, stderr=io.StringIO())
+        updates = [q for q in queries if q['sql'].startswith('UPDATE "board_problem"')]
+        return stdout.getvalue(), fetch_page, updates
+
+    def problem(self, slug):
+        return Problem.objects.get(link=f'https://open.kattis.com/problems/{slug}')
+
+    def test_concurrent_refresh_updates_in_bulk(self):
+        output, fetch_page, updates = self.run_command('--concurrency', '3')
+        self.assertEqual(fetch_page.call_count, 4)
+        self.assertEqual(len(updates), 1)
+
+        alpha = self.problem('alpha')
+        self.assertEqual((alpha.difficulty, alpha.difficulty_number, alpha.difficulty_level),
+                         ('2.5 Medium', 2.5, 'medium'))
+        # bulk_update leaves auto_now alone: the page validators need it
+        self.assertGreater(alpha.updated_at, self.LONG_AGO)
+        self.assertEqual(self.problem('beta').difficulty_level, 'hard')
+        for slug in ('down', 'blank'):
+            problem = self.problem(slug)
+            self.assertEqual((problem.difficulty, problem.updated_at), ('', self.LONG_AGO))
+
+        self.assertIn('Fetched 4 pages', output)
+        self.assertIn('Failed: 2 (', output)
+        self.assertIn('network error (open.kattis.com): 1', output)
+        self.assertIn('no difficulty on page: 1', output)
+        self.assertIn('Updated difficulties for 2 problems.', output)
+
+    def test_missing_only(self):
+        output, fetch_page, _ = self.run_command('--missing')
+        self.assertNotIn(mock.call('https://open.kattis.com/problems/beta', mock.ANY), fetch_page.call_args_list)
+        self.assertEqual(fetch_page.call_count, 3)
+        self.assertEqual(self.problem('beta').difficulty, '1.2 Easy')
+        self.assertIn('Updated difficulties for 1 problems.', output)
+
+
+@override_settings(BACKGROUND_TASKS_ENABLED=False)
+class ContestImportTests(TestCase):
+    CONTEST = 'https://open.kattis.com/contests/abc123'
+
+    def test_import_queued_only_when_link_changes(self):
+        with mock.patch('board.tasks.queue_contest_import') as queue:
+            with self.captureOnCommitCallbacks(execute=True):
+                meet = Meet.objects.create(date=date(2026, 10, 1), contest_link=self.CONTEST)
+            with self.captureOnCommitCallbacks(execute=True):
+                meet.description = 'Nouvelle description'
+                meet.save()
+                Meet.objects.get(pk=meet.pk).save()
+            self.assertEqual(queue.call_count, 1)
+            with self.captureOnCommitCallbacks(execute=True):
+                meet.contest_link = self.CONTEST + 'b'
+                meet.save()
+            self.assertEqual(queue.call_count, 2)
+
+    def test_add_problem_links_is_bulk(self):
+        meet = Meet.objects.create(date=date(2026, 10, 1))
+        Problem.objects.create(link='https://open.kattis.com/problems/existing', platform='Kattis')
+        links = ['https://open.kattis.com/problems/existing'] + [
+            f'https://open.kattis.com/problems/new{i}' for i in range(20)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(meet.add_problem_links(links, platform='Kattis'), 21)
+        writes = [q for q in queries if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        self.assertLessEqual(len(writes), 4)  # problems, through rows, search index, cache invalidation
+        self.assertEqual(meet.problems.count(), 21)
+        self.assertEqual(Problem.objects.get(link=links[1]).title, 'New0')
+        # Importing again links nothing twice
+        meet.add_problem_links(links, platform='Kattis')
+        self.assertEqual(meet.problems.count(), 21)
+
+
+CALCULUM_PAGES = {
+    'https://calculum.aediroum.ca/': """
+        <ul>
+        <li><a href="/posts/r1"><article><header><h3><span>Rencontre #1: Graphes</span></h3>
+            <time datetime="2026-09-10T18:00:00-04:00"></time></header><p>BFS et DFS</p></article></a></li>
+        <li><a href="/posts/r2"><article><header><h3><span>Rencontre #2: DP</span></h3>
+            <time datetime="2026-09-17T18:00:00-04:00"></time></header><p>Sacs à dos</p></article></a></li>
+        <li><a href="/posts/old"><article><header><h3><span>Rencontre #0</span></h3>
+            <time datetime="2025-01-10T18:00:00-05:00"></time></header><p>Ancienne</p></article></a></li>
+        </ul>""",
+    'https://calculum.aediroum.ca/posts/r1': """
+        <address>par Zoé Tremblay et Marc Roy</address>
+        <a href="https://open.kattis.com/problems/bfs">a</a><a href="https://leetcode.com/problems/two-sum/">b</a>""",
+    'https://calculum.aediroum.ca/posts/r2': """
+        <address>par Zoé Tremblay</address><a href="https://open.kattis.com/contests/dp26">contest</a>""",
+    'https://open.kattis.com/contests/dp26': """
+        <a href="/contests/dp26/problems/knapsack">A</a><a href="/contests/dp26/problems/bfs">B</a>""",
+}
+
+
+@override_settings(BACKGROUND_TASKS_ENABLED=False)
+class ImportCalculumMeetsTests(TestCase):
+    def run_import(self, *args, pages=CALCULUM_PAGES):
+        def fetch(url, parser, *args, http=None):
+            if url not in pages:
+                raise requests.ConnectionError(url)
+            return parser(pages[url], *args)
+
+        out = io.StringIO()
+        with mock.patch('board.management.commands.import_calculum_meets.fetch_parsed', side_effect=fetch):
+            call_command('import_calculum_meets', '--since', '2026-01-01', *args, stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def test_dry_run_writes_nothing(self):
+        self.run_import('--dry-run')
+        self.assertFalse(Meet.objects.exists())
+        self.assertFalse(Problem.objects.exists())
+
+    def test_import_is_bulk_and_idempotent(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.run_import()
+        self.assertLessEqual(len(queries), 25)
+        self.assertEqual(Meet.objects.count(), 2)
+        self.assertEqual(Session.objects.get().meets.count(), 2)
+        r1, r2 = Meet.objects.order_by('date')
+        self.assertEqual(sorted(r1.problems.values_list('platform', flat=True)), ['Kattis', 'LeetCode'])
+        self.assertEqual(set(r2.problems.values_list('slug', flat=True)), {'knapsack', 'bfs'})
+        self.assertEqual(r2.contest_link, 'https://open.kattis.com/contests/dp26')
+        self.assertEqual(set(r1.managers.values_list('username', flat=True)), {'zoe_tremblay', 'marc_roy'})
+        self.assertEqual(Problem.objects.count(), 3)
+
+        self.run_import()
+        self.assertEqual((Meet.objects.count(), Problem.objects.count(), User.objects.count()), (2, 3, 2))
+
+    def test_link_counts_are_rows_added(self):
+        output = self.run_import()
+        self.assertIn('problem links added: 4', output)
+        self.assertIn('manager links added: 3', output)
+
+        output = self.run_import()
+        self.assertIn('problem links added: 0', output)
+        self.assertIn('manager links added: 0', output)
+
+    def test_failures_are_tallied(self):
+        pages = {url: page for url, page in CALCULUM_PAGES.items() if not url.endswith(('/r1', '/dp26'))}
+        output = self.run_import('--concurrency', '4', pages=pages)
+        self.assertIn('Failed: 2 (network error (calculum.aediroum.ca): 1, network error (open.kattis.com): 1)', output)
+        self.assertEqual(Meet.objects.get().date, date(2026, 9, 17))
+
+
+class FakeResponse:
+    def __init__(self, status_code, text='', headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode()
+        self.encoding = 'utf-8'
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+
+class ScrapeCacheTests(TestCase):
+    URL = 'https://open.kattis.com/problems/hello'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(SCRAPE_CACHE_DIR=directory.name, SCRAPE_CACHE_MAX_AGE=0))
+        self.http = mock.Mock()
+        self.parser = mock.Mock(return_value={'difficulty': '1.5 Easy'}, __qualname__='parser')
+
+    def test_unchanged_page_is_revalidated_and_not_parsed_again(self):
+        self.http.get.return_value = FakeResponse(200, '<html>', {'ETag': '"v1"'})
+        self.assertEqual(fetch_parsed(self.URL, self.parser, http=self.http), {'difficulty': '1.5 Easy'})
+        self.http.get.return_value = FakeResponse(304)
+        self.assertEqual(fetch_parsed(self.URL, self.parser, http=self.http), {'difficulty': '1.5 Easy'})
+        self.assertEqual(self.parser.call_count, 1)
+        self.assertEqual(self.http.get.call_args.kwargs['headers']['If-None-Match'], '"v1"')
+        self.assertEqual(get_cache().stats(), {'hit': 0, 'revalidated': 1, 'miss': 1})
+
+    def test_fresh_page_served_without_request(self):
+        self.http.get.return_value = FakeResponse(200, '<html>')
+        with override_settings(SCRAPE_CACHE_MAX_AGE=3600):
+            fetch_parsed(self.URL, self.parser, http=self.http)
+            fetch_parsed(self.URL, self.parser, http=self.http)
+        self.assertEqual(self.http.get.call_count, 1)
+        self.assertEqual(self.parser.call_count, 1)
+
+    def test_size_cap_evicts_least_recently_used(self):
+        self.http.get.return_value = FakeResponse(200, 'x' * 1000)
+        with override_settings(SCRAPE_CACHE_MAX_BYTES=2500):
+            for i in range(4):
+                fetch_parsed(f'{self.URL}{i}', self.parser, http=self.http)
+        self.assertEqual(len(get_cache().entries()), 2)
+
+    def test_directory_scanned_once_below_the_cap(self):
+        self.http.get.return_value = FakeResponse(200, 'x' * 1000)
+        with mock.patch.object(DiskHTTPCache, 'entries', autospec=True, side_effect=DiskHTTPCache.entries) as entries:
+            for i in range(5):
+                fetch_parsed(f'{self.URL}{i}', self.parser, http=self.http)
+        self.assertEqual(entries.call_count, 1)
+
+    def test_counters_written_once_on_flush(self):
+        self.http.get.return_value = FakeResponse(200, '<html>')
+        with override_settings(SCRAPE_CACHE_MAX_AGE=3600):
+            for _ in range(3):
+                fetch_parsed(self.URL, self.parser, http=self.http)
+        cache = get_cache()
+        self.assertFalse((cache.directory / 'stats.json').exists())
+        self.assertEqual(cache.stats(), {'hit': 2, 'revalidated': 0, 'miss': 1})
+        cache.flush_stats()
+        self.assertEqual(json.loads((cache.directory / 'stats.json').read_text()),
+                         {'hit': 2, 'revalidated': 0, 'miss': 1})
+        self.assertEqual(cache.stats(), {'hit': 2, 'revalidated': 0, 'miss': 1})
+
+
+LEGACY_FIXTURE = [
+    {'model': 'contenttypes.contenttype', 'pk': 99, 'fields': {'app_label': 'board', 'model': 'problem'}},
+    {'model': 'auth.user', 'pk': 5, 'fields': {'username': 'zoe', 'password': '!', 'user_permissions': []}},
+    {'model': 'board.session', 'pk': 3, 'fields': {'season': 'winter', 'year': 2026, 'time': '18:00:00'}},
+    {'model': 'board.meet', 'pk': 40, 'fields': {'date': '2026-01-21', 'session': 3, 'theme': 'DP',
+                                                 'contest_link': '', 'managers': [5]}},
+    {'model': 'board.problem', 'pk': 'https://open.kattis.com/problems/hello',
+     'fields': {'platform': 'Kattis', 'solution_link': '', 'meets': [40]}},
+    {'model': 'admin.logentry', 'pk': 1, 'fields': {
+        'action_time': '2026-01-23T22:51:47.112Z', 'user': 5, 'content_type': 99,
+        'object_id': 'https://open.kattis.com/problems/hello', 'object_repr': 'Hello', 'action_flag': 2,
+        'change_message': ''}},
+    {'model': 'events.event', 'pk': 1, 'fields': {'title': 'ICPC 2025', 'summary': '*go*'}},
+]
+
+
+class FastloadTests(TestCase):
+    def test_iter_json_array_reads_in_chunks(self):
+        text = json.dumps(LEGACY_FIXTURE, indent=4)
+        self.assertEqual(list(iter_json_array(io.StringIO(text), chunk_size=7)), LEGACY_FIXTURE)
+        self.assertEqual(list(iter_json_array(io.StringIO(' [ ] '))), [])
+
+    def test_loads_legacy_fixture_in_bulk(self):
+        from django.contrib.admin.models import LogEntry
+        from django.contrib.contenttypes.models import ContentType
+
+        from events.models import Event
+
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as f:
+            json.dump(LEGACY_FIXTURE, f)
+            f.flush()
+            stdout = io.StringIO()
+            call_command('fastload', f.name, '--compare', stdout=stdout)
+
+        self.assertIn('Dropped unknown fields of board.meet: theme', stdout.getvalue())
+        meet = Meet.objects.get(pk=40)
+        problem = Problem.objects.get()
+        self.assertEqual((problem.link, problem.slug), ('https://open.kattis.com/problems/hello', 'hello'))
+        self.assertEqual(list(meet.problems.all()), [problem])
+        self.assertEqual(list(meet.managers.values_list('username', flat=True)), ['zoe'])
+        self.assertEqual(LogEntry.objects.get().content_type, ContentType.objects.get_for_model(Problem))
+        event = Event.objects.get()
+        self.assertEqual((event.slug, event.summary_html), ('icpc-2025', '<p><em>go</em></p>'))
+        # Sequences continue after the loaded pks
+        self.assertGreater(Session.objects.create(season='autumn', year=2026, time='18:00').pk, 3)
+
+
+class BackupTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = f'{directory.name}/backup.ndjson.gz'
+        build_session('winter', 2026, meets=2, problems_per_meet=2)
+        self.algorithm = Algorithm.objects.create(title='BFS', code='...', author=User.objects.first())
+
+    def export(self, *args):
+        call_command('export_backup', self.path, *args, stdout=io.StringIO())
+
+    def test_round_trip(self):
+        self.export()
+        links = set(Problem.meets.through.objects.values_list('problem__link', 'meet__date'))
+        updated_at = self.algorithm.updated_at
+        Algorithm.objects.all().delete()
+        Problem.objects.all().delete()
+        Meet.objects.all().delete()
+        Session.objects.all().delete()
+        User.objects.all().delete()
+
+        call_command('import_backup', self.path, '--batch-size', '3', stdout=io.StringIO())
+        self.assertEqual(set(Problem.meets.through.objects.values_list('problem__link', 'meet__date')), links)
+        self.assertEqual(Problem.categories.through.objects.count(), 8)
+        algorithm = Algorithm.objects.get()
+        self.assertEqual(algorithm.author.username, self.algorithm.author.username)
+        self.assertAlmostEqual(algorithm.updated_at, updated_at, delta=timedelta(milliseconds=1))
+
+    def test_since_exports_changed_rows_of_timestamped_models(self):
+        Algorithm.objects.filter(pk=self.algorithm.pk).update(updated_at=datetime(2020, 1, 1, tzinfo=timezone.utc))
+        self.export('cheatsheet', 'board.session', '--since', '2025-01-01')
+        with gzip.open(self.path, 'rt') as f:
+            labels = {json.loads(line)['model'] for line in f}
+        self.assertEqual(labels, {'cheatsheet.algorithmcategory', 'board.session'})
+
+    def test_import_updates_existing_rows(self):
+        self.export()
+        meet = Meet.objects.first()
+        problem = meet.problems.first()
+        meet.problems.remove(problem)
+        Meet.objects.filter(pk=meet.pk).update(description='changed')
+
+        call_command('import_backup', self.path, stdout=io.StringIO())
+        meet.refresh_from_db()
+        self.assertEqual(meet.description, '')
+        self.assertIn(problem, meet.problems.all())
@@ -1,73 +1,109 @@
-from django.shortcuts import render
+from django.core.cache import cache
+from django.db.models import Prefetch
 from django.http import HttpRequest, HttpResponse
-from board.models import Meet, Session
-from datetime import datetime
-import re
+from django.template.loader import render_to_string
+from board.cache import default_page_key, session_page_key
+from board.conditional import conditional_page
+from board.models import Meet, Problem, Session, current_season
+from board.tasks import queue_difficulty_refresh, queue_missing_difficulties
+from cheatsheet.models import AlgorithmCategory
+
+
+def _meets_shown(request):
+    """What a /meets page shows, for its validators."""
+    selected_session_id = request.GET.get('session', '')
+    meets = Meet.objects.all()
+    if selected_session_id.isdecimal():
+        meets = meets.filter(session_id=selected_session_id)
+    return [
+        Session.objects.all(),
+        meets,
+        Problem.objects.filter(meets__in=meets),
+        Problem.meets.through.objects.filter(meet__in=meets),
+        Problem.categories.through.objects.filter(problem__meets__in=meets),
+        AlgorithmCategory.objects.filter(problems__meets__in=meets),
+        Meet.managers.through.objects.filter(meet__in=meets),
+    ]
+
+
+def _meets_default_season(request):
+    # Without ?session=, the page shown depends on today's season
+    return () if request.GET.get('session') else current_season()
 
 
 def meets(request: HttpRequest) -> HttpResponse:
-    meets = Meet.objects.select_related('session').prefetch_related('problems').all()
-    
-    # Get all sessions
-    sessions = Session.objects.all().order_by('-year', 'season')
-    
-    # Determine current session
-    now = datetime.now()
-    month = now.month
-    year = now.year
-    
-    if 9 <= month <= 12:
-        current_season = 'autumn'
-    elif 1 <= month <= 4:
-        current_season = 'winter'
-    else:
-        current_season = 'summer'
-    
-    # Get selected session from query param or use current/last
+    # Before the validators and the page cache: 304s and cached pages never
+    # reach the render, which only queues the problems it shows
+    queue_missing_difficulties()
+    return _meets_page(request)
+
+
+@conditional_page(_meets_shown, _meets_default_season)
+def _meets_page(request: HttpRequest) -> HttpResponse:
+    # Rendered pages are cached per session and dropped by board.signals
     selected_session_id = request.GET.get('session')
-    
     if selected_session_id:
-        try:
-            selected_session = Session.objects.get(id=selected_session_id)
-        except Session.DoesNotExist:
-            selected_session = None
+        key = session_page_key(int(selected_session_id)) if selected_session_id.isdecimal() else None
     else:
-        # Try to find current session
-        selected_session = Session.objects.filter(
-            season=current_season, 
-            year=year
-        ).first()
-        
-        # If current doesn't exist, get the most recent
-        if not selected_session:
-            selected_session = sessions.first()
-    
+        key = default_page_key()
+
+    html = cache.get(key) if key else None
+    if html is None:
+        selected_session = _selected_session(selected_session_id)
+        html = _render_meets(request, selected_session)
+        # Unknown ?session= values are not cached so they can't flood the cache
+        if key and selected_session:
+            cache.set(key, html, None)
+    return HttpResponse(html)
+
+
+def _selected_session(selected_session_id):
+    """Session from the query param, or the current/last one by default."""
+    if selected_session_id:
+        if not selected_session_id.isdecimal():
+            return None
+        return Session.objects.filter(id=selected_session_id).first()
+
+    # Try to find current session
+    season, year = current_season()
+    selected_session = Session.objects.filter(season=season, year=year).first()
+
+    # If current doesn't exist, get the most recent
+    if not selected_session:
+        selected_session = Session.objects.order_by('-year', 'season').first()
+    return selected_session
+
+
+def _render_meets(request: HttpRequest, selected_session) -> str:
+    # Everything the template walks is prefetched, so the query count does
+    # not grow with the number of meets or problems
+    meets = Meet.objects.select_related('session').prefetch_related(
+        'managers',
+        Prefetch('problems', queryset=Problem.objects.prefetch_related('categories')),
+    )
+
+    # Get all sessions
+    sessions = Session.objects.all().order_by('-year', 'season')
+
     # Get meets for selected session
     session_meets = []
     if selected_session:
         session_meets = meets.filter(session=selected_session)
-        
-        # Extract problem titles and sort problems by __str__
+
+        # Problems arrive ordered by platform and stored title (Problem.Meta)
         for meet in session_meets:
             problems = list(meet.problems.all())
-            for problem in problems:
-                match = re.search(r'/problems?/([^/?]+)', problem.link)
-                if match:
-                    title = match.group(1).replace('-', ' ').replace('_', ' ')
-                    problem.extracted_title = title
-                else:
-                    problem.extracted_title = None
-            # Sort problems by their __str__
-            problems.sort(key=lambda p: str(p))
             meet.sorted_problems = problems
-    
-    return render(
-        request,
+            # Missing difficulties are scraped in the background, never during render
+            queue_difficulty_refresh(problems)
+
+    return render_to_string(
         'board.html',
         context={
             'sessions': sessions,
             'selected_session': selected_session,
             'meets': session_meets,
             'has_meets': len(session_meets) > 0
-        }
-    )
\ No newline at end of file
+        },
+        request=request,
+    )
@@ -1,5 +1,7 @@
 from django.contrib import admin
 from django import forms
+from django.db.models import Count
+from cheatsheet import search
 from cheatsheet.models import Algorithm, AlgorithmCategory
 
 
@@ -21,9 +23,13 @@ class AlgorithmCategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'algorithm_count']
     search_fields = ['name', 'description']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(num_algorithms=Count('algorithms'))
+    
     def algorithm_count(self, obj):
-        return obj.algorithms.count()
+        return obj.num_algorithms
     algorithm_count.short_description = 'Algorithms'
+    algorithm_count.admin_order_field = 'num_algorithms'
 
 
 @admin.register(Algorithm)
@@ -31,6 +37,7 @@ class AlgorithmAdmin(admin.ModelAdmin):
     form = AlgorithmAdminForm
     list_display = ['title', 'category', 'language', 'time_complexity', 'space_complexity', 'updated_at']
     list_filter = ['category', 'language', 'created_at', 'updated_at']
+    list_select_related = ['category']
     search_fields = ['title', 'description', 'code']
     fieldsets = (
         ('Basic Information', {
@@ -46,6 +53,13 @@ class AlgorithmAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_search_results(self, request, queryset, search_term):
+        # Full-text index instead of LIKE scans over the code
+        matches = search.matching_ids('algorithm', search_term)
+        if matches is None:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=matches), False
+    
     class Media:
         css = {
             'all': (
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CheatsheetConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cheatsheet'
+
+    def ready(self):
+        from cheatsheet import signals  # noqa: F401
@@ -0,0 +1,46 @@
+"""
+Pygments highlighting of algorithm code.
+
+Code is highlighted when an algorithm is saved and the HTML is stored with
+a hash of what produced it (the code, its language and HIGHLIGHT_VERSION),
+so pages ship ready-to-paint markup and nothing runs in the browser. The
+classes used are those of codehilite (events.rendering): one stylesheet,
+css/pygments.css, colours both. After changing STYLE, regenerate it with
+`manage.py highlight_algorithms --stylesheet`.
+"""
+import hashlib
+import json
+
+import pygments
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import TextLexer, get_lexer_by_name
+from pygments.util import ClassNotFound
+
+STYLE = 'monokai'
+CSS_CLASS = 'codehilite'
+
+HIGHLIGHT_VERSION = hashlib.sha1(json.dumps(
+    [STYLE, CSS_CLASS, pygments.__version__]
+).encode()).hexdigest()[:12]
+
+_formatter = HtmlFormatter(cssclass=CSS_CLASS, wrapcode=True)
+
+
+def source_hash(code: str, language: str) -> str:
+    return hashlib.sha1(json.dumps([HIGHLIGHT_VERSION, language, code]).encode()).hexdigest()
+
+
+def highlight_code(code: str, language: str) -> str:
+    try:
+        lexer = get_lexer_by_name(language)
+    except ClassNotFound:
+        lexer = TextLexer()
+    return pygments.highlight(code, lexer, _formatter)
+
+
+def stylesheet() -> str:
+    """Contents of css/pygments.css (no line numbers are used, so no rules for them)."""
+    formatter = HtmlFormatter(style=STYLE)
+    selector = f'.{CSS_CLASS}'
+    rules = formatter.get_background_style_defs(selector) + formatter.get_token_style_defs(selector)
+    return '\n'.join(rules) + '\n'
@@ -0,0 +1,52 @@
+"""
+Re-highlight stored algorithm code.
+
+Needed after the Pygments style or version changes (see
+cheatsheet.highlighting.HIGHLIGHT_VERSION); saving an algorithm highlights
+it anyway. --stylesheet also rewrites css/pygments.css for the current
+style.
+
+Usage:
+    python manage.py highlight_algorithms               # stale algorithms only
+    python manage.py highlight_algorithms --all         # every algorithm
+    python manage.py highlight_algorithms --stylesheet  # and regenerate css/pygments.css
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from cheatsheet.highlighting import HIGHLIGHT_VERSION, stylesheet
+from cheatsheet.models import Algorithm
+
+STYLESHEET = Path(settings.BASE_DIR) / 'project' / 'static' / 'css' / 'pygments.css'
+
+
+class Command(BaseCommand):
+    help = 'Highlight algorithm code whose stored HTML is missing or out of date'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Re-highlight every algorithm, not only stale ones',
+        )
+        parser.add_argument(
+            '--stylesheet',
+            action='store_true',
+            help=f'Also regenerate {STYLESHEET.name} from the Pygments style',
+        )
+
+    def handle(self, *args, **options):
+        algorithms = list(Algorithm.objects.only('code', 'language', 'code_html_hash'))
+        if options['all']:
+            for algorithm in algorithms:
+                algorithm.code_html_hash = ''
+        algorithms = [algorithm for algorithm in algorithms if algorithm.highlight_code()]
+        Algorithm.objects.bulk_update(algorithms, ['code_html', 'code_html_hash'], batch_size=100)
+        self.stdout.write(self.style.SUCCESS(
+            f'Highlighted {len(algorithms)} algorithms (highlighter {HIGHLIGHT_VERSION}).'
+        ))
+        if options['stylesheet']:
+            STYLESHEET.write_text(stylesheet())
+            self.stdout.write(f'Wrote {STYLESHEET}')
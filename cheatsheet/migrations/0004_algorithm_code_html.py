@@ -0,0 +1,62 @@
+# Generated by Django 5.0 on 2026-10-18 07:45
+
+import hashlib
+import json
+
+import pygments
+from django.db import migrations, models
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import TextLexer, get_lexer_by_name
+from pygments.util import ClassNotFound
+
+# Frozen copy of the cheatsheet.highlighting setup this migration was written
+# with. If the live one differs, so do the stored hashes and
+# `manage.py highlight_algorithms` highlights the code again.
+STYLE = 'monokai'
+CSS_CLASS = 'codehilite'
+
+HIGHLIGHT_VERSION = hashlib.sha1(json.dumps(
+    [STYLE, CSS_CLASS, pygments.__version__]
+).encode()).hexdigest()[:12]
+
+
+def source_hash(code, language):
+    return hashlib.sha1(json.dumps([HIGHLIGHT_VERSION, language, code]).encode()).hexdigest()
+
+
+def highlight_code(code, language):
+    try:
+        lexer = get_lexer_by_name(language)
+    except ClassNotFound:
+        lexer = TextLexer()
+    return pygments.highlight(code, lexer, HtmlFormatter(cssclass=CSS_CLASS, wrapcode=True))
+
+
+def highlight_algorithms(apps, schema_editor):
+    Algorithm = apps.get_model('cheatsheet', 'Algorithm')
+    algorithms = list(Algorithm.objects.only('code', 'language'))
+    for algorithm in algorithms:
+        algorithm.code_html = highlight_code(algorithm.code, algorithm.language)
+        algorithm.code_html_hash = source_hash(algorithm.code, algorithm.language)
+    Algorithm.objects.bulk_update(algorithms, ['code_html', 'code_html_hash'], batch_size=100)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cheatsheet', '0003_algorithm_author'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='algorithm',
+            name='code_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='algorithm',
+            name='code_html_hash',
+            field=models.CharField(blank=True, editable=False, max_length=40),
+        ),
+        migrations.RunPython(highlight_algorithms, migrations.RunPython.noop),
+    ]
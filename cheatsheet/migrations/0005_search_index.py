@@ -0,0 +1,50 @@
+# Generated by Django 5.0 on 2026-10-18 08:05
+
+from django.db import migrations
+
+# Frozen copies of the cheatsheet.search DDL and rebuild queries, with the
+# table names of this point in the migration history
+CREATE_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS cheatsheet_search USING fts5("
+    "kind UNINDEXED, title, body, code, tokenize='unicode61 remove_diacritics 2')"
+)
+
+REBUILD_SQL = [
+    "DELETE FROM cheatsheet_search",
+    "INSERT OR REPLACE INTO cheatsheet_search (rowid, kind, title, body, code) "
+    "SELECT id * 2, 'algorithm', title, description, code "
+    "FROM cheatsheet_algorithm",
+    "INSERT OR REPLACE INTO cheatsheet_search (rowid, kind, title, body, code) "
+    "SELECT p.id * 2 + 1, 'problem', p.title, "
+    "p.platform || ' ' || coalesce(("
+    "  SELECT group_concat(c.name, ' ') FROM board_problem_categories pc"
+    "  JOIN cheatsheet_algorithmcategory c ON c.id = pc.algorithmcategory_id"
+    "  WHERE pc.problem_id = p.id"
+    "), '') || ' ' || p.link || ' ' || p.solution_link, '' "
+    "FROM board_problem p",
+]
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_SQL)
+    for sql in REBUILD_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS cheatsheet_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0007_problem_title_slug_difficulty_level'),
+        ('cheatsheet', '0004_algorithm_code_html'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 07:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cheatsheet', '0005_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='algorithmcategory',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
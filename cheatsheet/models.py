@@ -1,11 +1,15 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils.safestring import mark_safe
+
+from cheatsheet.highlighting import highlight_code, source_hash
 
 
 class AlgorithmCategory(models.Model):
     """Categories for organizing algorithms (e.g., Graphs, DP, Strings)"""
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['name']
@@ -47,6 +51,18 @@ class Algorithm(models.Model):
     code = models.TextField(
         help_text="Code for the algorithm"
     )
+    
+    # `code` highlighted on save, and the hash of the code, language and
+    # highlighter setup that produced it
+    code_html = models.TextField(
+        blank=True,
+        editable=False
+    )
+    code_html_hash = models.CharField(
+        max_length=40,
+        blank=True,
+        editable=False
+    )
     time_complexity = models.CharField(
         max_length=100,
         blank=True,
@@ -70,7 +86,29 @@ class Algorithm(models.Model):
     class Meta:
         ordering = ['category__name', 'title']
     
+    def save(self, *args, **kwargs):
+        if self.highlight_code():
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'code_html', 'code_html_hash'}
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         if self.category:
             return f"{self.category.name} - {self.title}"
-        return self.title
\ No newline at end of file
+        return self.title
+    
+    def highlight_code(self) -> bool:
+        """Highlight the code unless the stored HTML is current; True if it was."""
+        digest = source_hash(self.code, self.language)
+        if digest == self.code_html_hash:
+            return False
+        self.code_html = highlight_code(self.code, self.language)
+        self.code_html_hash = digest
+        return True
+    
+    def get_code_html(self):
+        """Stored highlighted code; only highlighted here if it is stale."""
+        if self.code_html_hash != source_hash(self.code, self.language):
+            return mark_safe(highlight_code(self.code, self.language))
+        return mark_safe(self.code_html)
@@ -0,0 +1,175 @@
+"""
+Full-text search over algorithms and problems (SQLite FTS5).
+
+One FTS5 table, cheatsheet_search, holds a row per algorithm (title,
+description, code) and per problem (title, then platform, categories and
+links). Rows are written by the receivers in cheatsheet.signals; bulk
+loaders call index_problems() or rebuild() since bulk writes send no
+signals. The rowid encodes the object: pk * 2 for an algorithm, pk * 2 + 1
+for a problem, so a row is replaced or deleted without scanning the table.
+
+Queries are matched token by token as prefixes ("dijk" finds Dijkstra),
+ranked with bm25 (title matches weigh most), and come back with a snippet
+of the best matching column. On other databases search falls back to
+icontains lookups, without ranking or snippets.
+"""
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+
+TABLE = 'cheatsheet_search'
+
+KINDS = ('algorithm', 'problem')
+
+# bm25 weights of the title, body and code columns
+WEIGHTS = (10.0, 2.0, 1.0)
+
+# Snippet markers, replaced by <mark> once the snippet is escaped
+_OPEN, _CLOSE = '\x02', '\x03'
+
+_TOKEN_RE = re.compile(r'\w+')
+
+CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    "kind UNINDEXED, title, body, code, tokenize='unicode61 remove_diacritics 2')"
+)
+
+
+def is_available() -> bool:
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(text: str) -> str:
+    """FTS5 query matching every word of `text` as a prefix, or ''."""
+    return ' '.join(f'"{token}"*' for token in _TOKEN_RE.findall(text))
+
+
+def _algorithm_rows(Algorithm, where=''):
+    return (
+        f"INSERT OR REPLACE INTO {TABLE} (rowid, kind, title, body, code) "
+        f"SELECT id * 2, 'algorithm', title, description, code "
+        f"FROM {Algorithm._meta.db_table} {where}"
+    )
+
+
+def _problem_rows(Problem, AlgorithmCategory, where=''):
+    through = Problem.categories.through._meta.db_table
+    return (
+        f"INSERT OR REPLACE INTO {TABLE} (rowid, kind, title, body, code) "
+        f"SELECT p.id * 2 + 1, 'problem', p.title, "
+        f"p.platform || ' ' || coalesce(("
+        f"  SELECT group_concat(c.name, ' ') FROM {through} pc"
+        f"  JOIN {AlgorithmCategory._meta.db_table} c ON c.id = pc.algorithmcategory_id"
+        f"  WHERE pc.problem_id = p.id"
+        f"), '') || ' ' || p.link || ' ' || p.solution_link, '' "
+        f"FROM {Problem._meta.db_table} p {where}"
+    )
+
+
+def _models():
+    from board.models import Problem
+    from cheatsheet.models import Algorithm, AlgorithmCategory
+
+    return Algorithm, Problem, AlgorithmCategory
+
+
+def rebuild(Algorithm=None, Problem=None, AlgorithmCategory=None):
+    """Refill the index from the tables (models may be historical ones)."""
+    if not is_available():
+        return
+    if Algorithm is None:
+        Algorithm, Problem, AlgorithmCategory = _models()
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(_algorithm_rows(Algorithm))
+        cursor.execute(_problem_rows(Problem, AlgorithmCategory))
+
+
+def _in(column, pks):
+    pks = [int(pk) for pk in pks]
+    return f"WHERE {column} IN ({', '.join(['%s'] * len(pks))})", pks
+
+
+def index_algorithms(pks):
+    Algorithm, _, _ = _models()
+    pks = list(pks)
+    if not is_available() or not pks:
+        return
+    where, params = _in('id', pks)
+    with connection.cursor() as cursor:
+        cursor.execute(_algorithm_rows(Algorithm, where), params)
+
+
+def index_problems(pks):
+    _, Problem, AlgorithmCategory = _models()
+    pks = list(pks)
+    if not is_available() or not pks:
+        return
+    where, params = _in('p.id', pks)
+    with connection.cursor() as cursor:
+        cursor.execute(_problem_rows(Problem, AlgorithmCategory, where), params)
+
+
+def remove(kind, pk):
+    if is_available():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [pk * 2 + KINDS.index(kind)])
+
+
+def matching_ids(kind, text):
+    """Subquery of the pks of `kind` objects matching `text`, for pk__in
+    filters; None when the index cannot answer (other databases, or no
+    word in `text`)."""
+    expression = match_expression(text)
+    if not is_available() or not expression:
+        return None
+    return RawSQL(
+        f'SELECT rowid / 2 FROM {TABLE} WHERE {TABLE} MATCH %s AND kind = %s',
+        [expression, kind],
+    )
+
+
+def _snippet_html(snippet):
+    return escape(snippet).replace(_OPEN, '<mark>').replace(_CLOSE, '</mark>')
+
+
+def search(text, limit=20):
+    """Best matches as dicts (kind, id, title, snippet), snippets in HTML."""
+    expression = match_expression(text)
+    if not expression:
+        return []
+    if not is_available():
+        return _search_without_index(text, limit)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, kind, title, snippet({TABLE}, -1, %s, %s, '…', 12) "
+            f"FROM {TABLE} WHERE {TABLE} MATCH %s "
+            f"ORDER BY bm25({TABLE}, 0, %s, %s, %s) LIMIT %s",
+            [_OPEN, _CLOSE, expression, *WEIGHTS, limit],
+        )
+        return [
+            {'kind': kind, 'id': rowid // 2, 'title': title, 'snippet': _snippet_html(snippet)}
+            for rowid, kind, title, snippet in cursor.fetchall()
+        ]
+
+
+def _search_without_index(text, limit):
+    from django.db.models import Q
+
+    Algorithm, Problem, _ = _models()
+    algorithms = Algorithm.objects.filter(
+        Q(title__icontains=text) | Q(description__icontains=text) | Q(code__icontains=text)
+    ).values_list('pk', 'title', 'description')[:limit]
+    problems = Problem.objects.filter(
+        Q(title__icontains=text) | Q(categories__name__icontains=text)
+    ).distinct().values_list('pk', 'title', 'platform')[:limit]
+    results = [
+        {'kind': 'algorithm', 'id': pk, 'title': title, 'snippet': escape(description[:120])}
+        for pk, title, description in algorithms
+    ] + [
+        {'kind': 'problem', 'id': pk, 'title': title, 'snippet': escape(platform)}
+        for pk, title, platform in problems
+    ]
+    return results[:limit]
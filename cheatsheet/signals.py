@@ -0,0 +1,66 @@
+"""
+Keeps the full-text index (cheatsheet.search) in sync with algorithms and
+problems. Problems are also reindexed when one of their categories is
+renamed, deleted or cleared, as category names are indexed with them.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from board.models import Problem
+from cheatsheet import search
+from cheatsheet.models import Algorithm, AlgorithmCategory
+
+# pk_set is empty on clear, so cleared problems are looked up on pre_clear
+_M2M_ACTIONS = {'post_add', 'post_remove', 'pre_clear', 'post_clear'}
+
+
+@receiver(post_save, sender=Algorithm)
+def algorithm_saved(sender, instance, **kwargs):
+    search.index_algorithms([instance.pk])
+
+
+@receiver(post_delete, sender=Algorithm)
+def algorithm_deleted(sender, instance, **kwargs):
+    search.remove('algorithm', instance.pk)
+
+
+@receiver(post_save, sender=Problem)
+def problem_saved(sender, instance, **kwargs):
+    search.index_problems([instance.pk])
+
+
+@receiver(post_delete, sender=Problem)
+def problem_deleted(sender, instance, **kwargs):
+    search.remove('problem', instance.pk)
+
+
+@receiver(post_save, sender=AlgorithmCategory)
+def category_saved(sender, instance, created=False, **kwargs):
+    if not created:
+        search.index_problems(instance.problems.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=AlgorithmCategory)
+def category_deleting(sender, instance, **kwargs):
+    instance._search_problem_ids = list(instance.problems.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=AlgorithmCategory)
+def category_deleted(sender, instance, **kwargs):
+    search.index_problems(getattr(instance, '_search_problem_ids', []))
+
+
+@receiver(m2m_changed, sender=Problem.categories.through)
+def problem_categories_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in _M2M_ACTIONS:
+        return
+    if not reverse:
+        if action != 'pre_clear':
+            search.index_problems([instance.pk])
+    elif action == 'pre_clear':
+        # instance is an AlgorithmCategory
+        instance._search_problem_ids = list(instance.problems.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        search.index_problems(getattr(instance, '_search_problem_ids', []))
+    else:
+        search.index_problems(pk_set)
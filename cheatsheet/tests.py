@@ -1,3 +1,153 @@
-from django.test import TestCase
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from board.models import Problem
+from cheatsheet import search
+from cheatsheet.highlighting import source_hash, stylesheet
+from cheatsheet.models import Algorithm, AlgorithmCategory
+from project.testing import TEST_STORAGES
+
+# Queries allowed for /cheatsheet (validators included), whatever the number of algorithms
+CHEATSHEET_QUERY_BUDGET = 5
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class CheatsheetQueryBudgetTests(TestCase):
+    def add_algorithms(self, categories, per_category):
+        authors = User.objects.bulk_create(
+            User(username=f'author-{User.objects.count()}-{i}') for i in range(3)
+        )
+        created = AlgorithmCategory.objects.bulk_create(
+            AlgorithmCategory(name=f'Category {AlgorithmCategory.objects.count() + i}') for i in range(categories)
+        )
+        Algorithm.objects.bulk_create(
+            Algorithm(title=f'Algo {i}', category=category, author=authors[i % 3], code='pass')
+            for category in created + [None] for i in range(per_category)
+        )
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/cheatsheet')
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_data(self):
+        self.add_algorithms(categories=1, per_category=1)
+        small = self.count_queries()
+        self.add_algorithms(categories=20, per_category=15)
+        large = self.count_queries()
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, CHEATSHEET_QUERY_BUDGET)
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class HighlightingTests(TestCase):
+    def test_code_is_highlighted_on_save(self):
+        algo = Algorithm.objects.create(title='BFS', language='python', code='def bfs(g):\n    return g < 1\n')
+        self.assertIn('class="codehilite"', algo.code_html)
+        self.assertIn('<span class="k">def</span>', algo.code_html)
+        self.assertIn('&lt;', algo.code_html)
+        self.assertEqual(algo.code_html_hash, source_hash(algo.code, 'python'))
+
+    def test_unchanged_code_is_not_highlighted_again(self):
+        algo = Algorithm.objects.create(title='BFS', language='python', code='pass')
+        with mock.patch('cheatsheet.models.highlight_code') as highlight:
+            algo.title = 'DFS'
+            algo.save()
+            highlight.assert_not_called()
+        algo.language = 'cpp'
+        algo.code = 'int main() {}'
+        algo.save(update_fields=['language', 'code'])
+        algo.refresh_from_db()
+        self.assertIn('<span class="kt">int</span>', algo.code_html)
+        self.assertEqual(algo.code_html_hash, source_hash(algo.code, 'cpp'))
+
+    def test_page_ships_highlighted_markup(self):
+        Algorithm.objects.create(title='BFS', language='python', code='def bfs(): pass')
+        response = self.client.get('/cheatsheet')
+        self.assertContains(response, '<span class="k">def</span>', html=False)
+        self.assertContains(response, 'css/pygments.css')
+        self.assertNotContains(response, 'highlight.js')
+
+    def test_command_refreshes_stale_html(self):
+        algo = Algorithm.objects.create(title='BFS', language='python', code='pass')
+        Algorithm.objects.filter(pk=algo.pk).update(code_html='', code_html_hash='old')
+        out = StringIO()
+        call_command('highlight_algorithms', stdout=out)
+        self.assertIn('Highlighted 1 algorithms', out.getvalue())
+        algo.refresh_from_db()
+        self.assertIn('codehilite', algo.code_html)
+        self.assertEqual(algo.code_html_hash, source_hash('pass', 'python'))
+
+    def test_stylesheet_is_up_to_date(self):
+        path = Path(settings.BASE_DIR) / 'project' / 'static' / 'css' / 'pygments.css'
+        self.assertEqual(path.read_text(), stylesheet(), 'Run manage.py highlight_algorithms --stylesheet')
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.graphs = AlgorithmCategory.objects.create(name='Graphes')
+        self.dijkstra = Algorithm.objects.create(
+            title='Dijkstra', category=self.graphs, description='Plus courts chemins',
+            code='import heapq\ndef dijkstra(graph, source):\n    pass\n',
+        )
+        self.bfs = Algorithm.objects.create(
+            title='BFS', description='Parcours en largeur, utile avant Dijkstra', code='from collections import deque',
+        )
+        self.problem = Problem.objects.create(link='https://open.kattis.com/problems/shortestpath1', platform='Kattis')
+
+    def titles(self, query):
+        return [result['title'] for result in search.search(query)]
+
+    def test_ranked_prefix_matches_with_snippets(self):
+        results = search.search('dijk')
+        self.assertEqual([r['title'] for r in results], ['Dijkstra', 'BFS'])
+        self.assertIn('<mark>Dijkstra</mark>', results[0]['snippet'])
+        self.assertEqual(self.titles('heapq'), ['Dijkstra'])
+        self.assertEqual(self.titles('"<script>'), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.bfs.code = 'from collections import deque\nqueue = deque()'
+        self.bfs.save()
+        self.assertEqual(self.titles('queue'), ['BFS'])
+        self.bfs.delete()
+        self.assertEqual(self.titles('queue'), [])
+
+    def test_problems_are_found_by_category(self):
+        self.assertEqual(self.titles('graphes'), [])
+        self.problem.categories.add(self.graphs)
+        self.assertEqual(self.titles('graphes'), ['Shortestpath1'])
+        self.graphs.name = 'Graphs'
+        self.graphs.save()
+        self.assertEqual(self.titles('graphs'), ['Shortestpath1'])
+        self.graphs.problems.clear()
+        self.assertEqual(self.titles('graphs'), [])
+
+    def test_search_endpoint(self):
+        response = self.client.get('/cheatsheet/search', {'q': 'shortest'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [{
+            'kind': 'problem', 'id': self.problem.pk, 'title': 'Shortestpath1',
+            'snippet': '<mark>Shortestpath1</mark>', 'url': self.problem.link,
+        }])
+        result = self.client.get('/cheatsheet/search', {'q': 'heapq'}).json()['results'][0]
+        self.assertEqual(result['url'], f'/cheatsheet#algo-{self.dijkstra.pk}')
+        self.assertEqual(self.client.get('/cheatsheet/search').json()['results'], [])
+
+    def test_admin_search_uses_index(self):
+        self.client.force_login(User.objects.create_superuser('admin'))
+        response = self.client.get('/edit/cheatsheet/algorithm/', {'q': 'heap'})
+        self.assertContains(response, 'Dijkstra')
+        self.assertNotContains(response, '>BFS<')
+        Problem.objects.create(link='https://open.kattis.com/problems/hello', platform='Kattis')
+        response = self.client.get('/edit/board/problem/', {'q': 'shortestpath1'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.problem])
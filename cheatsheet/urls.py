@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path('', views.cheatsheet, name='cheatsheet'),
+    path('/search', views.search, name='cheatsheet_search'),
 ]
\ No newline at end of file
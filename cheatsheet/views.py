@@ -1,16 +1,33 @@
 from django.shortcuts import render
-from django.http import HttpRequest, HttpResponse
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.db.models import Prefetch
+from django.urls import reverse
+from django.views.decorators.http import require_safe
+from board.conditional import conditional_page
+from board.models import Problem
+from cheatsheet import search as search_index
+from cheatsheet.highlighting import HIGHLIGHT_VERSION
 from cheatsheet.models import Algorithm, AlgorithmCategory
 
+# Results returned by /cheatsheet/search at most
+SEARCH_MAX_RESULTS = 50
 
+
+@conditional_page(
+    lambda request: [Algorithm.objects.all(), AlgorithmCategory.objects.all()],
+    lambda request: [HIGHLIGHT_VERSION],
+)
 def cheatsheet(request: HttpRequest) -> HttpResponse:
     """Display all algorithms organized by category"""
     
     # Get categories with their algorithms, sorted alphabetically
-    categories = AlgorithmCategory.objects.prefetch_related('algorithms').order_by('name')
+    # Authors are joined in so the template does not query once per algorithm
+    categories = AlgorithmCategory.objects.prefetch_related(
+        Prefetch('algorithms', queryset=Algorithm.objects.select_related('author'))
+    ).order_by('name')
     
     # Also get algorithms without a category
-    uncategorized = Algorithm.objects.filter(category__isnull=True).order_by('title')
+    uncategorized = Algorithm.objects.filter(category__isnull=True).select_related('author').order_by('title')
     
     context = {
         'categories': categories,
@@ -18,4 +35,28 @@ def cheatsheet(request: HttpRequest) -> HttpResponse:
         'has_algorithms': Algorithm.objects.exists()
     }
     
-    return render(request, 'cheatsheet.html', context=context)
\ No newline at end of file
+    return render(request, 'cheatsheet.html', context=context)
+
+
+@require_safe
+def search(request: HttpRequest) -> JsonResponse:
+    """Ranked algorithms and problems matching ?q=, with highlighted snippets"""
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), SEARCH_MAX_RESULTS)
+    except ValueError:
+        limit = 20
+    
+    results = search_index.search(query, limit=limit)
+    
+    # Problems link to their platform page, algorithms to their cheatsheet entry
+    problem_ids = [r['id'] for r in results if r['kind'] == 'problem']
+    links = dict(Problem.objects.filter(pk__in=problem_ids).values_list('pk', 'link')) if problem_ids else {}
+    cheatsheet_url = reverse('cheatsheet')
+    for result in results:
+        if result['kind'] == 'problem':
+            result['url'] = links.get(result['id'], '')
+        else:
+            result['url'] = f"{cheatsheet_url}#algo-{result['id']}"
+    
+    return JsonResponse({'query': query, 'results': results})
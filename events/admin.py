@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.db.models import F
 from django.utils.safestring import mark_safe
 
+from events import routes
 from events.models import Event, Media
 
 
@@ -11,8 +13,8 @@ class EventAdmin(admin.ModelAdmin):
 		(None, {'fields': ('title', 'slug', 'start', 'end')}),
 		('Summary', {'fields': ('summary',)}),
 		('Server Proxy', {
-			'fields': ('server_port', 'is_active', 'rewrite_urls'),
-			'description': 'Configure a proxied server for this event. The server will be accessible at /events/{slug}. Disable URL rewriting if the backend is configured with the correct base URL.'
+			'fields': ('server_port', 'is_active', 'rewrite_urls', 'cache_responses'),
+			'description': 'Configure a proxied server for this event. The server will be accessible at /events/{slug}. Disable URL rewriting if the backend is configured with the correct base URL. Response caching only stores what the backend marks as cacheable for everyone.'
 		}),
 		('Visibility', {
 			'fields': ('hidden',),
@@ -35,6 +37,39 @@ class EventAdmin(admin.ModelAdmin):
 	
 	server_status.short_description = 'Server'
 
+	actions = ['purge_response_cache']
+
+	def purge_response_cache(self, request, queryset):
+		# Cache keys include the version: every worker drops its copies once
+		# its route cache expires
+		count = queryset.update(response_cache_version=F('response_cache_version') + 1)
+		routes.forget()
+		self.message_user(request, f"Purged the response cache of {count} events.")
+	purge_response_cache.short_description = "Purge the response cache of selected events"
+
 
 admin.site.register(Event, EventAdmin)
-admin.site.register(Media)
\ No newline at end of file
+
+
+class MediaAdmin(admin.ModelAdmin):
+	list_display = ('__str__', 'kind', 'width', 'height', 'derivative_count')
+	# __str__ shows the event
+	list_select_related = ('event',)
+	list_filter = ('kind',)
+	readonly_fields = ('kind', 'width', 'height', 'derivatives')
+	actions = ['regenerate_derivatives']
+
+	def derivative_count(self, obj):
+		return len(obj.derivatives)
+
+	derivative_count.short_description = 'Resized copies'
+
+	def regenerate_derivatives(self, request, queryset):
+		images = list(queryset.filter(kind='image'))
+		for media in images:
+			media.refresh_derivatives()
+		self.message_user(request, f"Queued resized copies for {len(images)} images.")
+	regenerate_derivatives.short_description = "Regenerate resized copies of selected images"
+
+
+admin.site.register(Media, MediaAdmin)
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""
+Keep-alive HTTP sessions to event backends.
+
+Each worker process keeps one `requests.Session` per backend port so
+proxied requests reuse TCP connections instead of opening a new one per hit.
+"""
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def session_for(port: int) -> requests.Session:
+    """Pooled session for `localhost:<port>`, created on first use."""
+    now = time.monotonic()
+    with _lock:
+        _close_idle(now)
+        entry = _sessions.get(port)
+        session = entry[0] if entry else _new_session()
+        _sessions[port] = (session, now)
+    return session
+
+
+def drop(*ports):
+    """Close the pools for these ports, e.g. after an event's backend changed."""
+    with _lock:
+        for port in ports:
+            entry = _sessions.pop(port, None)
+            if entry:
+                entry[0].close()
+
+
+def _new_session() -> requests.Session:
+    session = requests.Session()
+    # Shared by every visitor: never keep upstream cookies between requests
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.EVENT_PROXY_POOL_SIZE)
+    session.mount('http://', adapter)
+    return session
+
+
+def _close_idle(now: float):
+    idle_timeout = settings.EVENT_PROXY_IDLE_TIMEOUT
+    for port, (session, last_used) in list(_sessions.items()):
+        if now - last_used > idle_timeout:
+            session.close()
+            del _sessions[port]
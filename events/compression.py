@@ -0,0 +1,60 @@
+"""
+Content-Encoding negotiation for the event proxy.
+
+Bodies that are relayed as-is keep the backend's encoding: the client's
+Accept-Encoding is forwarded, so the backend only picks encodings the
+client understands. Bodies the proxy rewrites must be decoded first, so
+upstream is only offered encodings `requests` can decode, and the rewritten
+text is compressed again for the client (brotli when the optional `brotli`
+package is installed, otherwise gzip).
+"""
+from typing import Optional
+
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# Encodings urllib3 decodes for us (it supports br when brotli is installed)
+DECODABLE = frozenset({'gzip', 'deflate', 'br'} if brotli else {'gzip', 'deflate'})
+
+# Below this, compression costs more than it saves (same as GZipMiddleware)
+MIN_SIZE = 200
+
+
+def accepted_encodings(request) -> frozenset:
+    """Codings listed in Accept-Encoding, without those refused with q=0."""
+    accepted = set()
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        params = params.replace(' ', '')
+        if coding and params not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(coding.lower())
+    return frozenset(accepted)
+
+
+def upstream_accept_encoding(request, decodable_only: bool) -> str:
+    """Accept-Encoding to send to the backend for this client."""
+    accepted = accepted_encodings(request) - {'*', 'identity'}
+    if decodable_only:
+        accepted &= DECODABLE
+    return ', '.join(sorted(accepted)) or 'identity'
+
+
+def choose_encoding(request) -> Optional[str]:
+    """Best encoding for a body compressed by the proxy, or None."""
+    accepted = accepted_encodings(request)
+    if brotli and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        # Quality 5 is about as fast as gzip level 6 and compresses better
+        return brotli.compress(content, quality=5)
+    return compress_string(content)
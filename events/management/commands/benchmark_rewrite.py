@@ -0,0 +1,100 @@
+"""
+Microbenchmark for the proxy URL rewriter.
+
+Compares the previous one-regex-per-rule implementation with the single-pass
+engine in events.rewrite, on a synthetic JS/HTML bundle or a real file.
+
+Usage:
+    python manage.py benchmark_rewrite
+    python manage.py benchmark_rewrite --size 4 --repeat 10
+    python manage.py benchmark_rewrite --file path/to/bundle.js
+"""
+import re
+import time
+
+from django.core.management.base import BaseCommand
+
+from events.lru import BoundedLRU
+from events.rewrite import rewrite_urls, rewriter_for
+
+PREFIX = '/events/benchmark'
+PORT = 8080
+
+_SAMPLE = (
+    'function load(a){return fetch("/api/submissions?page="+a).then(function(r){return r.json()})}\n'
+    "var routes={home:'/',problems:'/problems',scoreboard:'/scoreboard/live'};\n"
+    'const tpl=`/static/img/${name}.png`;var u=`/assets/logo.svg`;\n'
+    '<a href="/problems/a">A</a><img src=\'/static/b.png\'><form action="/submit" method="post">\n'
+    '.banner{background:url(/static/bg.jpg) no-repeat}.icon{background:url("/static/i.svg")}\n'
+    'var api="http://localhost:8080/api/v1";window.location.href="http://localhost:8080";\n'
+    'for(var i=0;i<n;i++){total+=values[i]*weights[i];if(total>limit){break}}// plain code\n'
+)
+
+
+def legacy_rewrite(text, prefix, port):
+    """The previous implementation: one re.sub pass per rule."""
+    text = re.sub(rf'https?://localhost:{port}(/[^"\s\'<>)]*)', rf'{prefix}\1', text)
+    text = re.sub(rf'https?://localhost:{port}(["\'])', rf'{prefix}/\1', text)
+    text = re.sub(r'((?:href|src|action)\s*=\s*")(/[^"]*)"', rf'\1{prefix}\2"', text)
+    text = re.sub(r"((?:href|src|action)\s*=\s*')(/[^']*?)'", rf"\1{prefix}\2'", text)
+    text = re.sub(r"url\(\s*'(/[^']*?)'\s*\)", rf"url('{prefix}\1')", text)
+    text = re.sub(r'url\(\s*"(/[^"]*?)"\s*\)', rf'url("{prefix}\1")', text)
+    text = re.sub(r'url\(\s*(/[^)\s]+)\s*\)', rf'url({prefix}\1)', text)
+    text = re.sub(r"'(/(?!events/)[^'\n]+)'", rf"'{prefix}\1'", text)
+    text = re.sub(r'"(/(?!events/)[^"\n]+)"', rf'"{prefix}\1"', text)
+    text = re.sub(r'`(/(?!events/)[^`\n]+)`', rf'`{prefix}\1`', text)
+    return text
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the proxy URL rewriter against the previous multi-pass version'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='Body to rewrite (default: synthetic bundle)')
+        parser.add_argument('--size', type=float, default=2, help='Synthetic body size in MB (default: 2)')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per variant, best is kept (default: 5)')
+
+    def handle(self, *args, **options):
+        if options['file']:
+            with open(options['file'], encoding='utf-8', errors='replace') as f:
+                text = f.read()
+        else:
+            size = int(options['size'] * 1024 * 1024)
+            text = (_SAMPLE * (size // len(_SAMPLE) + 1))[:size]
+        mb = len(text.encode()) / (1024 * 1024)
+        repeat = max(1, options['repeat'])
+
+        rewriter_for.cache_clear()
+        compile_start = time.perf_counter()
+        rewriter_for(PREFIX, PORT)
+        compile_time = time.perf_counter() - compile_start
+
+        legacy = self._best(lambda: legacy_rewrite(text, PREFIX, PORT), repeat)
+        single = self._best(lambda: rewrite_urls(text, PREFIX, PORT), repeat)
+
+        cache = BoundedLRU(max_size=len(text) * 2)
+        cache.set(('/bundle.js', PREFIX, '"etag"'), rewrite_urls(text, PREFIX, PORT))
+        cached = self._best(lambda: cache.get(('/bundle.js', PREFIX, '"etag"')), repeat)
+
+        self.stdout.write(f'Body: {mb:.2f} MB, best of {repeat} runs')
+        self.stdout.write(f'  multi-pass (previous) : {legacy * 1000:9.2f} ms  ({mb / legacy:7.1f} MB/s)')
+        self.stdout.write(f'  single-pass           : {single * 1000:9.2f} ms  ({mb / single:7.1f} MB/s)')
+        self.stdout.write(f'  ETag cache hit        : {cached * 1000:9.4f} ms')
+        self.stdout.write(f'  pattern compile (once): {compile_time * 1000:9.2f} ms')
+        self.stdout.write(self.style.SUCCESS(f'Speedup: {legacy / single:.1f}x'))
+
+        same = legacy_rewrite(text, PREFIX, PORT) == rewrite_urls(text, PREFIX, PORT)
+        if not same:
+            self.stdout.write(self.style.WARNING(
+                'Outputs differ: the previous version prefixes absolute backend URLs '
+                'inside href/src/url() twice and prefixes protocol-relative URLs, the '
+                'single pass rewrites the first once and leaves the second alone.'
+            ))
+
+    def _best(self, fn, repeat):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return best
@@ -1,18 +1,52 @@
 """
 Django management command to clean up orphaned media files.
 
+Uploads live in the content-addressed storage (events.storage), where each
+blob is referenced by the Media rows linked to it: orphans are found with
+one query on the reference counts instead of a walk of the media
+directory. Blobs touched less than MEDIA_BLOB_GRACE_SECONDS ago are kept,
+as the Media row of a fresh upload is saved after its file.
+
+With --legacy, calculum/events/ (where files were stored before content
+addressing) is also swept. The referenced names are read in chunks
+(file and derivatives only), and the tree is scanned once with os.scandir:
+each file is stat'ed at most once, and directories left empty are removed
+on the way back up, so the run time is linear in the number of files.
+
+Orphans are deleted, or moved under --quarantine DIR (same relative
+paths) so they can be restored. --report writes what was found and done as
+JSON, to a file or to stdout with `-`.
+
 Usage:
     python manage.py cleanup_media_files
     python manage.py cleanup_media_files --dry-run  # See what would be deleted without deleting
+    python manage.py cleanup_media_files --legacy   # Also sweep files from before content addressing
+    python manage.py cleanup_media_files --legacy --quarantine /srv/quarantine --report report.json
 """
-from django.core.management.base import BaseCommand
-from django.conf import settings
-from events.models import Media
+import json
 import os
+import shutil
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from events.models import Blob, Media
+from events.storage import blob_storage
+
+LEGACY_DIR = 'calculum/events'
+
+# Rows read from the database at a time
+_CHUNK_SIZE = 2000
 
 
 class Command(BaseCommand):
-    help = 'Delete orphaned media files that are no longer referenced in the database'
+    help = 'Delete (or quarantine) orphaned media files that are no longer referenced in the database'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -20,72 +54,157 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be deleted without actually deleting',
         )
+        parser.add_argument(
+            '--legacy',
+            action='store_true',
+            help=f'Also sweep {LEGACY_DIR}/ for files stored before content addressing',
+        )
+        parser.add_argument(
+            '--quarantine',
+            metavar='DIR',
+            help='Move orphans under DIR, keeping their relative paths, instead of deleting them',
+        )
+        parser.add_argument(
+            '--report',
+            metavar='PATH',
+            help='Write a JSON report to PATH (- for stdout)',
+        )
 
     def handle(self, *args, **options):
-        dry_run = options['dry_run']
-        
-        if dry_run:
-            self.stdout.write(self.style.WARNING('DRY RUN MODE - No files will be deleted'))
-        
-        # Get all file paths from database
-        db_files = set()
-        for media in Media.objects.all():
-            if media.file:
-                db_files.add(media.file.path)
-        
-        # Scan media directory
-        media_root = settings.MEDIA_ROOT
-        events_media_path = os.path.join(media_root, 'calculum', 'events')
-        
-        if not os.path.exists(events_media_path):
-            self.stdout.write(self.style.WARNING(f'Media directory not found: {events_media_path}'))
-            return
-        
-        orphaned_files = []
-        total_size = 0
-        
-        # Walk through all files in media directory
-        for root, dirs, files in os.walk(events_media_path):
-            for filename in files:
-                filepath = os.path.join(root, filename)
-                
-                if filepath not in db_files:
-                    orphaned_files.append(filepath)
-                    total_size += os.path.getsize(filepath)
-        
-        if not orphaned_files:
-            self.stdout.write(self.style.SUCCESS('No orphaned files found!'))
-            return
-        
-        # Report findings
-        self.stdout.write(self.style.WARNING(f'\nFound {len(orphaned_files)} orphaned file(s)'))
-        self.stdout.write(f'Total size: {total_size / (1024*1024):.2f} MB\n')
-        
-        for filepath in orphaned_files:
-            self.stdout.write(f'  - {filepath}')
-        
-        if dry_run:
-            self.stdout.write(self.style.WARNING('\nDRY RUN: No files were deleted'))
-            self.stdout.write('Run without --dry-run to actually delete these files')
-        else:
-            # Delete orphaned files
-            deleted_count = 0
-            for filepath in orphaned_files:
-                try:
-                    os.remove(filepath)
-                    deleted_count += 1
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f'Error deleting {filepath}: {e}'))
-            
-            self.stdout.write(self.style.SUCCESS(f'\nDeleted {deleted_count} orphaned file(s)'))
-            
-            # Clean up empty directories
-            for root, dirs, files in os.walk(events_media_path, topdown=False):
-                for dirname in dirs:
-                    dirpath = os.path.join(root, dirname)
-                    try:
-                        if not os.listdir(dirpath):  # Directory is empty
-                            os.rmdir(dirpath)
-                            self.stdout.write(f'Removed empty directory: {dirpath}')
-                    except Exception as e:
-                        pass
\ No newline at end of file
+        start = time.monotonic()
+        self.dry_run = options['dry_run']
+        self.quarantine = Path(options['quarantine']) if options['quarantine'] else None
+        # Keep stdout for the JSON report when it goes there
+        self.log = self.stderr if options['report'] == '-' else self.stdout
+        self.report = {
+            'started_at': timezone.now().isoformat(),
+            'dry_run': self.dry_run,
+            'quarantine': str(self.quarantine) if self.quarantine else None,
+            'errors': [],
+        }
+
+        if self.dry_run:
+            self.log.write(self.style.WARNING('DRY RUN MODE - No files will be deleted'))
+
+        self.report['blobs'] = self.sweep_blobs()
+        if options['legacy']:
+            self.report['legacy'] = self.sweep_legacy()
+        self.report['seconds'] = round(time.monotonic() - start, 3)
+
+        for error in self.report['errors']:
+            self.log.write(self.style.ERROR(error))
+        if options['report'] == '-':
+            self.stdout.write(json.dumps(self.report, indent=2))
+        elif options['report']:
+            Path(options['report']).write_text(json.dumps(self.report, indent=2))
+
+    def remove(self, name, path) -> bool:
+        """Delete or quarantine the file at `path` (`name` relative to MEDIA_ROOT)."""
+        try:
+            if self.quarantine:
+                target = self.quarantine / name
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.move(path, target)
+            else:
+                os.remove(path)
+        except OSError as e:
+            self.report['errors'].append(f'Error removing {name}: {e}')
+            return False
+        return True
+
+    def summary(self, what, count, size):
+        action = 'would be removed' if self.dry_run else ('quarantined' if self.quarantine else 'deleted')
+        self.log.write(f'{what}: {count} {action} ({size / (1024*1024):.2f} MB)')
+
+    def sweep_blobs(self):
+        cutoff = timezone.now() - timedelta(seconds=settings.MEDIA_BLOB_GRACE_SECONDS)
+        orphans = (
+            Blob.objects.filter(touched_at__lt=cutoff)
+            .annotate(refs=Count('medias'))
+            .filter(refs=0)
+            .values_list('pk', 'name', 'size')
+        )
+        removed, total_size = [], 0
+        for pk, name, size in orphans.iterator(chunk_size=_CHUNK_SIZE):
+            self.log.write(f'  - {name}')
+            if not self.dry_run and not self.remove_blob(pk, name, cutoff):
+                continue
+            removed.append(name)
+            total_size += size
+        self.summary('Unreferenced blobs', len(removed), total_size)
+        return {'removed': removed, 'bytes': total_size}
+
+    def remove_blob(self, pk, name, cutoff) -> bool:
+        """Delete a blob's row and file together, unless it was uploaded or
+        linked again since the orphan query."""
+        with transaction.atomic():
+            # Checked again and locked in one statement (row lock, or the
+            # database write lock on SQLite): an upload of the same content
+            # touches the row first (events.storage), so it waits for this
+            # transaction and writes the file again afterwards
+            claimed = Blob.objects.filter(pk=pk, touched_at__lt=cutoff, medias=None).update(
+                touched_at=F('touched_at'),
+            )
+            if not claimed:
+                return False
+            Blob.objects.filter(pk=pk).delete()
+            if not self.remove(name, blob_storage.path(name)):
+                # Keep the row so the next sweep tries again
+                transaction.set_rollback(True)
+                return False
+        return True
+
+    def sweep_legacy(self):
+        root = Path(settings.MEDIA_ROOT) / LEGACY_DIR
+        if not root.is_dir():
+            self.log.write(self.style.WARNING(f'Media directory not found: {root}'))
+            return None
+
+        referenced = set()
+        rows = Media.objects.values_list('file', 'derivatives').iterator(chunk_size=_CHUNK_SIZE)
+        for name, derivatives in rows:
+            referenced.add(name)
+            # Resized copies belong to their Media row
+            referenced.update(d['name'] for d in derivatives)
+
+        self.scanned, self.orphans, self.removed_dirs = 0, [], []
+        self.scan(root, f'{LEGACY_DIR}/', referenced)
+        total_size = sum(orphan['size'] for orphan in self.orphans)
+        self.summary('Orphaned legacy files', len(self.orphans), total_size)
+        return {
+            'scanned': self.scanned,
+            'orphans': self.orphans,
+            'bytes': total_size,
+            'removed_directories': self.removed_dirs,
+        }
+
+    def scan(self, directory, prefix, referenced) -> bool:
+        """Sweep orphans under `directory` in one pass; True if it ended up empty."""
+        empty = True
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                name = prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if self.scan(entry.path, f'{name}/', referenced) and not self.dry_run:
+                        try:
+                            os.rmdir(entry.path)
+                            self.removed_dirs.append(name)
+                            continue
+                        except OSError:
+                            pass
+                    empty = False
+                    continue
+                self.scanned += 1
+                if name in referenced:
+                    empty = False
+                    continue
+                size = entry.stat(follow_symlinks=False).st_size
+                self.log.write(f'  - {name}')
+                if self.dry_run:
+                    self.orphans.append({'name': name, 'size': size})
+                    empty = False
+                elif self.remove(name, entry.path):
+                    self.orphans.append({'name': name, 'size': size})
+                else:
+                    empty = False
+        return empty
@@ -0,0 +1,41 @@
+"""
+Build the resized copies of uploaded images (see events.thumbnails).
+
+Uploads get them in the background when saved; this fills them in for
+images uploaded before, or rebuilds them after MEDIA_THUMBNAIL_WIDTHS
+changes.
+
+Usage:
+    python manage.py generate_media_derivatives          # images without copies
+    python manage.py generate_media_derivatives --all    # every image
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from events import thumbnails
+from events.models import Media
+
+
+class Command(BaseCommand):
+    help = 'Generate resized WebP/JPEG copies of uploaded event images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Rebuild every image, not only those never processed',
+        )
+
+    def handle(self, *args, **options):
+        if thumbnails.Image is None:
+            raise CommandError('Pillow is not installed')
+        medias = Media.objects.filter(kind='image')
+        if not options['all']:
+            medias = medias.filter(width__isnull=True)
+        count = 0
+        for media in medias.iterator():
+            try:
+                if thumbnails.generate(media):
+                    count += 1
+            except OSError as e:
+                self.stderr.write(f'{media.file.name}: {e}')
+        self.stdout.write(self.style.SUCCESS(f'Generated derivatives for {count} images.'))
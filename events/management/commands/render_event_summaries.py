@@ -0,0 +1,32 @@
+"""
+Re-render stored event summary HTML.
+
+Needed after the Markdown extensions or the markdown/Pygments versions
+change (see events.rendering.RENDER_VERSION); saving an event renders it
+anyway.
+
+Usage:
+    python manage.py render_event_summaries          # stale summaries only
+    python manage.py render_event_summaries --all    # every summary
+"""
+from django.core.management.base import BaseCommand
+
+from events.models import Event
+from events.rendering import RENDER_VERSION
+
+
+class Command(BaseCommand):
+    help = 'Render event summaries whose stored HTML is missing or out of date'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Re-render every summary, not only stale ones',
+        )
+
+    def handle(self, *args, **options):
+        events = Event.objects.only('summary', 'summary_html_version', 'summary_hash')
+        events = [event for event in events if event.render_summary(force=options['all'])]
+        Event.objects.bulk_update(events, ['summary_html', 'summary_html_version', 'summary_hash'], batch_size=100)
+        self.stdout.write(self.style.SUCCESS(f'Rendered {len(events)} event summaries (renderer {RENDER_VERSION}).'))
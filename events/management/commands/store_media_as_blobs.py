@@ -0,0 +1,63 @@
+"""
+Move media uploaded before content addressing into the blob storage
+(events.storage), so duplicates are stored once and every file gets a
+hash-based URL.
+
+Each file and resized copy is copied to its blob and the row updated;
+identical files end up sharing one blob. The old files stay in
+calculum/events/ until `cleanup_media_files --legacy` removes them.
+
+Usage:
+    python manage.py store_media_as_blobs
+    python manage.py store_media_as_blobs --dry-run
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from events.models import Media
+from events.storage import is_blob
+
+
+class Command(BaseCommand):
+    help = 'Copy media files stored before content addressing into the blob storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List the files that would be moved without copying anything',
+        )
+
+    def handle(self, *args, **options):
+        medias = [media for media in Media.objects.exclude(file='') if not is_blob(media.file.name)]
+        if options['dry_run']:
+            for media in medias:
+                self.stdout.write(f'  - {media.file.name}')
+            self.stdout.write(self.style.WARNING(f'DRY RUN: {len(medias)} media would be moved'))
+            return
+
+        moved, blobs = 0, set()
+        for media in medias:
+            storage = media.file.storage
+            try:
+                with storage.open(media.file.name) as f:
+                    name = storage.save(media.file.name, f)
+                derivatives = []
+                for derivative in media.derivatives:
+                    with storage.open(derivative['name']) as f:
+                        derivatives.append({**derivative, 'name': storage.save(derivative['name'], f)})
+            except OSError as e:
+                self.stderr.write(f'{media.file.name}: {e}')
+                continue
+            with transaction.atomic():
+                # update(): save() would queue new derivatives for the "new" file
+                Media.objects.filter(pk=media.pk).update(file=name, derivatives=derivatives, updated_at=timezone.now())
+                media.file.name, media.derivatives = name, derivatives
+                media.sync_blobs()
+            moved += 1
+            blobs.add(name)
+        self.stdout.write(self.style.SUCCESS(
+            f'Moved {moved} media into {len(blobs)} blobs. '
+            'Run cleanup_media_files --legacy to delete the old copies.'
+        ))
@@ -0,0 +1,143 @@
+"""
+Serving of uploaded media (/media/) when DEBUG is off.
+
+Unlike django.views.static.serve, responses carry a strong ETag, answer
+conditional requests with 304, and honour single byte ranges (206), so
+<video> seeking only fetches what it needs. Full files go out through
+FileResponse, which lets the WSGI server use sendfile. Uploads matching
+MEDIA_IMMUTABLE_PATTERNS never change under the same name, so clients
+may keep them for a year; other files are revalidated on every use.
+
+With MEDIA_ACCEL set, the view only checks the path and conditions and
+leaves the transfer (ranges included) to the front server:
+  - 'x-accel-redirect': nginx, with an `internal` location at
+    MEDIA_ACCEL_PREFIX aliased to MEDIA_ROOT;
+  - 'x-sendfile': Apache mod_xsendfile or lighttpd, given the file path.
+"""
+import mimetypes
+import re
+import stat
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+# Bytes read per write when streaming a range
+_CHUNK_SIZE = 64 * 1024
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'public, no-cache'
+
+
+def file_etag(st) -> str:
+    """Strong validator from size and modification time (as nginx does)."""
+    return f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+def cache_control(path: str) -> str:
+    if any(re.match(pattern, path) for pattern in settings.MEDIA_IMMUTABLE_PATTERNS):
+        return IMMUTABLE_CACHE_CONTROL
+    return REVALIDATE_CACHE_CONTROL
+
+
+def requested_range(request: HttpRequest, size: int, etag: str, last_modified: int):
+    """(first, last) byte of the range to send, None for the whole file,
+    or () if the range cannot be satisfied."""
+    header = request.headers.get('Range', '')
+    if not header.startswith('bytes=') or ',' in header:
+        # Multiple ranges are rare for media; sending everything is allowed
+        return None
+    if_range = request.headers.get('If-Range')
+    if if_range and if_range != etag and parse_http_date_safe(if_range) != last_modified:
+        return None
+    first, _, last = header[len('bytes='):].strip().partition('-')
+    try:
+        if not first:
+            suffix = int(last)
+            # An empty file has no last byte to count back from
+            if suffix <= 0 or size == 0:
+                return ()
+            return max(0, size - suffix), size - 1
+        first = int(first)
+        last = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if first >= size:
+        return ()
+    if first > last:
+        return None
+    return first, min(last, size - 1)
+
+
+def _read_range(path: Path, first: int, length: int):
+    with path.open('rb') as f:
+        f.seek(first)
+        while length > 0:
+            chunk = f.read(min(_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(request: HttpRequest, path: str) -> HttpResponse:
+    try:
+        full_path = Path(safe_join(settings.MEDIA_ROOT, path))
+        st = full_path.stat()
+    except (SuspiciousFileOperation, OSError):
+        raise Http404('Media file not found')
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404('Media file not found')
+
+    etag = file_etag(st)
+    last_modified = int(st.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _file_response(request, path, full_path, st.st_size, etag, last_modified)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = cache_control(path)
+    return response
+
+
+def _file_response(request, path, full_path, size, etag, last_modified) -> HttpResponse:
+    content_type, encoding = mimetypes.guess_type(full_path.name)
+    if encoding or not content_type:
+        content_type = 'application/octet-stream'
+
+    if settings.MEDIA_ACCEL == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX.rstrip('/') + '/' + quote(path)
+        return response
+    if settings.MEDIA_ACCEL == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = str(full_path)
+        return response
+
+    byte_range = requested_range(request, size, etag, last_modified)
+    if byte_range == ():
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    first, last = byte_range or (0, size - 1)
+    length = last - first + 1
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+    elif byte_range:
+        response = StreamingHttpResponse(_read_range(full_path, first, length), content_type=content_type)
+    else:
+        response = FileResponse(full_path.open('rb'), content_type=content_type)
+    if byte_range:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {first}-{last}/{size}'
+    response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    return response
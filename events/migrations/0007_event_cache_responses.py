@@ -0,0 +1,23 @@
+# Generated by Django 5.0 on 2026-10-18 07:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_event_rewrite_urls'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='cache_responses',
+            field=models.BooleanField(default=False, help_text='Cache proxied GET responses the backend marks as cacheable (Cache-Control, ETag, Last-Modified).'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='response_cache_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
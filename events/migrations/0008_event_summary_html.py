@@ -0,0 +1,47 @@
+# Generated by Django 5.0 on 2026-10-18 07:26
+
+import hashlib
+import json
+
+import markdown
+import pygments
+from django.db import migrations, models
+
+# Frozen copy of the events.rendering setup this migration was written with.
+# If the live one differs, the stored version does too and
+# `manage.py render_event_summaries` renders the summaries again.
+MARKDOWN_EXTENSIONS = ['fenced_code', 'codehilite']
+
+RENDER_VERSION = hashlib.sha1(json.dumps(
+    [MARKDOWN_EXTENSIONS, markdown.__version__, pygments.__version__]
+).encode()).hexdigest()[:12]
+
+
+def render_summaries(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    events = list(Event.objects.only('summary'))
+    for event in events:
+        event.summary_html = markdown.markdown(event.summary, extensions=MARKDOWN_EXTENSIONS) if event.summary else ''
+        event.summary_html_version = RENDER_VERSION
+    Event.objects.bulk_update(events, ['summary_html', 'summary_html_version'], batch_size=100)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_event_cache_responses'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='summary_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='summary_html_version',
+            field=models.CharField(blank=True, editable=False, max_length=12),
+        ),
+        migrations.RunPython(render_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.0 on 2026-10-18 07:39
+
+import mimetypes
+
+from django.db import migrations, models
+
+
+def kind_for(name):
+    # Frozen copy of events.models.kind_for
+    content_type = mimetypes.guess_type(name or '')[0] or ''
+    kind = content_type.partition('/')[0]
+    return kind if kind in ('image', 'video') else 'other'
+
+
+def classify_media(apps, schema_editor):
+    Media = apps.get_model('events', 'Media')
+    medias = list(Media.objects.only('file'))
+    for media in medias:
+        media.kind = kind_for(media.file.name)
+    Media.objects.bulk_update(medias, ['kind'], batch_size=100)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0008_event_summary_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='kind',
+            field=models.CharField(blank=True, choices=[('image', 'Image'), ('video', 'Video'), ('other', 'Other')], editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(classify_media, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-18 07:41
+
+import events.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0009_media_derivatives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('touched_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='media',
+            name='file',
+            field=models.FileField(storage=events.storage.get_blob_storage, upload_to='calculum/events/%Y/%m/'),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='blobs',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='medias', to='events.blob'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0 on 2026-10-18 07:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0010_media_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
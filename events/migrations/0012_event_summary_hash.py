@@ -0,0 +1,31 @@
+# Generated by Django 5.0 on 2026-10-18 09:12
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def hash_summaries(apps, schema_editor):
+    # Stored HTML was rendered from the current summary (saves and the
+    # earlier migrations render it), so only the hash is missing
+    Event = apps.get_model('events', 'Event')
+    events = list(Event.objects.only('summary'))
+    for event in events:
+        event.summary_hash = hashlib.sha1(event.summary.encode()).hexdigest()
+    Event.objects.bulk_update(events, ['summary_hash'], batch_size=100)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0011_event_media_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='summary_hash',
+            field=models.CharField(blank=True, editable=False, max_length=40),
+        ),
+        migrations.RunPython(hash_summaries, migrations.RunPython.noop),
+    ]
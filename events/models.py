@@ -1,6 +1,19 @@
-from django.db import models
+import mimetypes
+
+from django.db import models, transaction
+from django.utils.safestring import mark_safe
 from django.utils.text import slugify
 
+from events.rendering import RENDER_VERSION, render_markdown, source_hash
+from events.storage import get_blob_storage
+
+
+def kind_for(name):
+    """'image', 'video' or 'other', from a file name."""
+    content_type = mimetypes.guess_type(name or '')[0] or ''
+    kind = content_type.partition('/')[0]
+    return kind if kind in ('image', 'video') else 'other'
+
 
 class Event(models.Model):
     title = models.CharField(
@@ -26,6 +39,24 @@ class Event(models.Model):
     
     summary = models.TextField()
     
+    # `summary` rendered to HTML on save, and the renderer setup that made it
+    summary_html = models.TextField(
+        blank=True,
+        editable=False
+    )
+    
+    summary_html_version = models.CharField(
+        max_length=12,
+        blank=True,
+        editable=False
+    )
+    
+    summary_hash = models.CharField(
+        max_length=40,
+        blank=True,
+        editable=False
+    )
+    
     # Server proxy fields
     server_port = models.IntegerField(
         blank=True,
@@ -48,11 +79,41 @@ class Event(models.Model):
         help_text='Rewrite URLs in proxied responses. Disable if the backend is configured with the correct base URL.'
     )
     
+    cache_responses = models.BooleanField(
+        default=False,
+        help_text='Cache proxied GET responses the backend marks as cacheable (Cache-Control, ETag, Last-Modified).'
+    )
+    
+    # Bumped to purge cached responses in every worker
+    response_cache_version = models.PositiveIntegerField(
+        default=0,
+        editable=False
+    )
+    
+    # Last change, for the validators of the events page (board.conditional)
+    updated_at = models.DateTimeField(
+        auto_now=True
+    )
+    
     class Meta:
         ordering = ['-title']
     
     def save(self, *args, **kwargs):
-        # Auto-generate slug from title if not set
+        self.ensure_slug()
+        update_fields = kwargs.get('update_fields')
+        rendered = self.render_summary(force=update_fields is not None and 'summary' in update_fields)
+        if update_fields is not None:
+            update_fields = set(update_fields) | {'updated_at'}
+            if rendered:
+                update_fields |= {'summary_html', 'summary_html_version', 'summary_hash'}
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+    
+    def __str__(self):
+        return self.title
+    
+    def ensure_slug(self):
+        """Auto-generate slug from title if not set"""
         if not self.slug:
             base_slug = slugify(self.title)
             slug = base_slug
@@ -62,17 +123,57 @@ class Event(models.Model):
                 slug = f"{base_slug}-{counter}"
                 counter += 1
             self.slug = slug
-        super().save(*args, **kwargs)
     
-    def __str__(self):
-        return self.title
+    def summary_is_current(self):
+        return self.summary_html_version == RENDER_VERSION and self.summary_hash == source_hash(self.summary)
+    
+    def render_summary(self, force=False) -> bool:
+        """Render the summary unless the stored HTML is current; True if it was."""
+        if not force and self.summary_is_current():
+            return False
+        self.summary_html = render_markdown(self.summary)
+        self.summary_html_version = RENDER_VERSION
+        self.summary_hash = source_hash(self.summary)
+        return True
+    
+    def get_summary_html(self):
+        """Stored HTML of the summary; only rendered here if it is stale."""
+        if not self.summary_is_current():
+            return mark_safe(render_markdown(self.summary))
+        return mark_safe(self.summary_html)
     
     def has_active_server(self):
         """Check if event has an active proxied server"""
         return self.server_port is not None and self.is_active
     
     
+class Blob(models.Model):
+    """A file in the content-addressed media storage (events.storage)."""
+    name = models.CharField(
+        max_length=255,
+        unique=True
+    )
+    
+    size = models.PositiveBigIntegerField(
+        default=0
+    )
+    
+    # Last upload of this content; recent blobs are not swept yet
+    touched_at = models.DateTimeField(
+        auto_now=True
+    )
+    
+    def __str__(self):
+        return self.name
+
+
 class Media(models.Model):
+    KIND_CHOICES = [
+        ('image', 'Image'),
+        ('video', 'Video'),
+        ('other', 'Other'),
+    ]
+    
     event = models.ForeignKey(
         Event,
         related_name="medias",
@@ -80,9 +181,105 @@ class Media(models.Model):
     )
     
     file = models.FileField(
-        upload_to='calculum/events/%Y/%m/'
+        upload_to='calculum/events/%Y/%m/',
+        storage=get_blob_storage
+    )
+    
+    # Filled from the file on save (kind) and by the background job
+    # generating resized copies (dimensions, derivatives)
+    kind = models.CharField(
+        max_length=10,
+        choices=KIND_CHOICES,
+        blank=True,
+        editable=False
+    )
+    
+    width = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False
+    )
+    
+    height = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False
+    )
+    
+    # [{"width", "height", "format", "name"}] for every resized copy, names
+    # relative to the file's storage
+    derivatives = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False
+    )
+    
+    # Stored files this row uses (file and derivatives); the reference
+    # counts cleanup_media_files sweeps by
+    blobs = models.ManyToManyField(
+        Blob,
+        related_name='medias',
+        blank=True,
+        editable=False
+    )
+    
+    updated_at = models.DateTimeField(
+        auto_now=True
     )
     
     def __str__(self):
         filename = self.file.name.split('/')[-1]
-        return f"{self.event.title} - {filename}"
\ No newline at end of file
+        return f"{self.event.title} - {filename}"
+    
+    def save(self, *args, **kwargs):
+        self.kind = kind_for(self.file.name)
+        file_changed = self.file.name != getattr(self, '_loaded_file', None)
+        super().save(*args, **kwargs)
+        self._loaded_file = self.file.name
+        
+        if file_changed:
+            self.sync_blobs()
+        # Resizing is slow: it happens off the request path, and only for new files
+        if file_changed and self.kind == 'image':
+            self.refresh_derivatives()
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'file' in field_names:
+            instance._loaded_file = instance.file.name
+        return instance
+    
+    def refresh_derivatives(self):
+        """Queue a background rebuild of the resized copies, once the
+        current transaction has committed."""
+        from events.tasks import queue_derivatives
+        
+        transaction.on_commit(lambda: queue_derivatives(self.pk))
+    
+    @property
+    def content_type(self):
+        return mimetypes.guess_type(self.file.name)[0] or 'application/octet-stream'
+    
+    def srcset(self, fmt):
+        """srcset of the derivatives in `fmt`, plus the original for JPEG."""
+        candidates = [(self.file.storage.url(d['name']), d['width']) for d in self.derivatives if d['format'] == fmt]
+        if fmt == 'jpeg' and self.width:
+            candidates.append((self.file.url, self.width))
+        return ', '.join(f'{url} {width}w' for url, width in candidates)
+    
+    @property
+    def webp_srcset(self):
+        return self.srcset('webp')
+    
+    @property
+    def jpeg_srcset(self):
+        return self.srcset('jpeg')
+    
+    def derivative_names(self):
+        return [d['name'] for d in self.derivatives]
+    
+    def sync_blobs(self):
+        """Link this row to the blobs of its file and derivatives."""
+        names = [self.file.name, *self.derivative_names()]
+        self.blobs.set(Blob.objects.filter(name__in=names))
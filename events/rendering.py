@@ -0,0 +1,31 @@
+"""
+Markdown rendering of event summaries.
+
+Rendering (and the Pygments highlighting done by codehilite) happens when an
+event is saved and the summary or the renderer changed; the HTML is stored
+next to the source, with the hash of the source it was rendered from.
+RENDER_VERSION changes whenever the extension setup or the library versions
+change, so stale HTML can be found and refreshed with
+`manage.py render_event_summaries`.
+"""
+import hashlib
+import json
+
+import markdown
+import pygments
+
+MARKDOWN_EXTENSIONS = ['fenced_code', 'codehilite']
+
+RENDER_VERSION = hashlib.sha1(json.dumps(
+    [MARKDOWN_EXTENSIONS, markdown.__version__, pygments.__version__]
+).encode()).hexdigest()[:12]
+
+
+def render_markdown(text: str) -> str:
+    if not text:
+        return ''
+    return markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS)
+
+
+def source_hash(text: str) -> str:
+    return hashlib.sha1(text.encode()).hexdigest()
@@ -0,0 +1,155 @@
+"""
+HTTP cache for proxied event responses, enabled per event
+(Event.cache_responses).
+
+Follows the shared-cache rules of RFC 9111 closely enough for contest
+backends: only 200 answers to GET are stored; `no-store`, `private`,
+Set-Cookie and Vary keep a response out; freshness comes from s-maxage,
+max-age or Expires; stale entries carrying an ETag or Last-Modified are
+revalidated upstream with a conditional request. Conditional requests from
+clients are answered with 304 from the stored validators.
+
+Entries live in a per-worker LRU bounded by EVENT_PROXY_CACHE_MAX_BYTES.
+Purging bumps Event.response_cache_version, which is part of every key, so
+other workers stop serving their copies once their route cache expires.
+"""
+import time
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from requests.structures import CaseInsensitiveDict
+
+from events.lru import BoundedLRU
+
+# Upstream headers replaced by those of a 304 when an entry is revalidated
+_REVALIDATED_HEADERS = ('Cache-Control', 'Date', 'ETag', 'Expires', 'Last-Modified')
+
+
+def parse_cache_control(value: str) -> dict:
+    directives = {}
+    for part in value.split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"')
+    return directives
+
+
+def freshness_lifetime(headers) -> int:
+    """Seconds a response stays fresh in a shared cache (0: revalidate first),
+    minus the time it already spent in caches upstream (Age)."""
+    try:
+        age = max(0, int(headers.get('Age') or 0))
+    except ValueError:
+        age = 0
+    return max(0, _lifetime(headers) - age)
+
+
+def _lifetime(headers) -> int:
+    directives = parse_cache_control(headers.get('Cache-Control', ''))
+    if 'no-cache' in directives:
+        return 0
+    for name in ('s-maxage', 'max-age'):
+        if name in directives:
+            try:
+                return max(0, int(directives[name]))
+            except ValueError:
+                return 0
+    expires = parse_http_date_safe(headers.get('Expires') or '')
+    if expires is None:
+        return 0
+    date = parse_http_date_safe(headers.get('Date') or '') or int(time.time())
+    return max(0, expires - date)
+
+
+def storable_lifetime(request: HttpRequest, status: int, headers):
+    """Freshness lifetime if this upstream response may be stored, else None."""
+    if request.method != 'GET' or status != 200:
+        return None
+    directives = parse_cache_control(headers.get('Cache-Control', ''))
+    if 'no-store' in directives or 'private' in directives or 'Set-Cookie' in headers:
+        return None
+    vary = {v.strip().lower() for v in headers.get('Vary', '').split(',') if v.strip()}
+    if vary - {'accept-encoding'}:
+        return None
+    if 'HTTP_AUTHORIZATION' in request.META and not {'public', 's-maxage', 'must-revalidate'} & directives.keys():
+        return None
+    lifetime = freshness_lifetime(headers)
+    if not lifetime and 'ETag' not in headers and 'Last-Modified' not in headers:
+        return None
+    return lifetime
+
+
+def bypasses_cache(request: HttpRequest) -> bool:
+    """The client asked for a response that must not come from a cache."""
+    return request.method != 'GET' or 'no-store' in parse_cache_control(request.headers.get('Cache-Control', ''))
+
+
+def wants_revalidation(request: HttpRequest) -> bool:
+    """Hard reloads (`no-cache`) must be checked with the backend first."""
+    return ('no-cache' in parse_cache_control(request.headers.get('Cache-Control', ''))
+            or request.headers.get('Pragma') == 'no-cache')
+
+
+class CachedResponse:
+    """Headers and body exactly as sent to the client, plus freshness."""
+
+    def __init__(self, headers, body: bytes, lifetime: int):
+        self.headers = CaseInsensitiveDict(headers)
+        self.body = body
+        self.lifetime = lifetime
+        self.stored_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers.items())
+
+    @property
+    def etag(self):
+        return self.headers.get('ETag')
+
+    @property
+    def last_modified(self):
+        return parse_http_date_safe(self.headers.get('Last-Modified') or '')
+
+    def age(self) -> int:
+        return int(time.monotonic() - self.stored_at)
+
+    def is_fresh(self) -> bool:
+        return self.age() < self.lifetime
+
+    def validators(self) -> dict:
+        """Headers for a conditional request revalidating this entry."""
+        validators = {}
+        if self.etag:
+            validators['If-None-Match'] = self.etag
+        if 'Last-Modified' in self.headers:
+            validators['If-Modified-Since'] = self.headers['Last-Modified']
+        return validators
+
+    def revalidated(self, headers):
+        """Refresh the entry from the headers of an upstream 304."""
+        for name in _REVALIDATED_HEADERS:
+            if name in headers:
+                self.headers[name] = headers[name]
+        self.lifetime = freshness_lifetime(headers)
+        self.stored_at = time.monotonic()
+
+    def to_response(self, request: HttpRequest) -> HttpResponse:
+        """The stored response, or a 304 if the client already has it."""
+        response = HttpResponse(self.body)
+        for name, value in self.headers.items():
+            response[name] = value
+        response['Age'] = str(self.age())
+        return get_conditional_response(
+            request, etag=self.etag, last_modified=self.last_modified, response=response,
+        )
+
+
+def cache_key(event, target: str, accept_encoding: str):
+    """Entries are kept per Accept-Encoding sent upstream, which decides the
+    Content-Encoding of the stored body."""
+    return (event.pk, event.response_cache_version, event.slug, target, accept_encoding)
+
+
+response_cache = BoundedLRU(settings.EVENT_PROXY_CACHE_MAX_BYTES)
@@ -0,0 +1,146 @@
+"""
+URL rewriting for proxied HTML, JS and CSS.
+
+All rewrite rules are combined into one regex, compiled once per
+(prefix, port), so a body is scanned a single time. Each position is
+rewritten at most once, so an absolute backend URL inside an href no longer
+gets the prefix twice. Rewritten bodies are kept per upstream ETag so an
+unchanged asset is only rewritten once per worker.
+"""
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.http import parse_etags
+
+from events.lru import BoundedLRU
+
+
+# One alternative per leading character so the regex engine can skip
+# straight to candidate positions. Each rule has its own group; the index of
+# the group that matched (`lastindex`) says which rule fired.
+_PATTERN = r'''
+    https?://localhost:{port}(?:(/[^"\s'<>)]*)|(?=["'])())  # 1, 2: absolute backend URL
+  | =\s*(?:"(/(?!/)[^"]*)"|'(/(?!/)[^']*)')                  # 3, 4: attribute value
+  | url\(\s*(?:'(/(?!/)[^']*)'|"(/(?!/)[^"]*)"|(/(?!/)[^)\s]+))\s*\)  # 5, 6, 7: CSS url()
+  | '(/(?!/|events/)[^'\n]+)'                                # 8, 9, 10: JS string literals
+  | "(/(?!/|events/)[^"\n]+)"
+  | `(/(?!/|events/)[^`\n]+)`
+'''
+
+# Attribute names whose root-relative values are always prefixed
+_ATTRIBUTE = re.compile(r'(?:href|src|action)\s*$')
+_SRCSET = re.compile(r'srcset\s*$')
+_ATTRIBUTE_WINDOW = 32
+
+# Root-relative URLs of a srcset list, after the first one
+_SRCSET_CANDIDATE = re.compile(r'(,\s*)(/(?!/))')
+
+_QUOTES = {3: '"', 4: "'", 5: "'", 6: '"', 7: '', 8: "'", 9: '"', 10: '`'}
+
+
+def _is_script_path(path: str) -> bool:
+    """Same test as the JS string rules: not empty, single line, not prefixed."""
+    return len(path) > 1 and '\n' not in path and not path.startswith(('//', '/events/'))
+
+
+@lru_cache(maxsize=64)
+def rewriter_for(prefix: str, port: int):
+    """Return a compiled `rewrite(text) -> text` function for this backend."""
+    pattern = re.compile(_PATTERN.format(port=port), re.VERBOSE)
+
+    def replace(match):
+        group = match.lastindex
+        path = match.group(group)
+        if group <= 2:
+            return prefix + (path or '/')
+        quote = _QUOTES[group]
+        if group <= 4:
+            # `=` also appears in scripts: outside href/src/action only
+            # rewrite what the JS string rules would
+            start = match.start()
+            window = max(0, start - _ATTRIBUTE_WINDOW)
+            if _SRCSET.search(match.string, window, start):
+                # Every candidate of the list, not only the first
+                path = _SRCSET_CANDIDATE.sub(rf'\1{prefix}\2', path)
+            elif not (_ATTRIBUTE.search(match.string, window, start) or _is_script_path(path)):
+                return match.group(0)
+            head = match.group(0)[:match.start(group) - start]
+            return f'{head}{prefix}{path}{quote}'
+        if group <= 7:
+            return f'url({quote}{prefix}{path}{quote})'
+        return f'{quote}{prefix}{path}{quote}'
+
+    def rewrite(text: str) -> str:
+        return pattern.sub(replace, text)
+
+    return rewrite
+
+
+def rewrite_urls(text: str, prefix: str, port: int) -> str:
+    """
+    Rewrite URLs in any text content (HTML, JS, CSS).
+    1. Replace absolute backend URLs (http(s)://localhost:PORT/...) with prefixed paths
+    2. Replace root-relative paths (/...) with prefixed paths; protocol-relative
+       (//host/...) and external URLs are left alone
+    """
+    return rewriter_for(prefix, port)(text)
+
+
+@lru_cache(maxsize=64)
+def _backend_origin(port: int):
+    return re.compile(rf'^https?://localhost:{port}')
+
+
+def rewrite_location(location: str, prefix: str, port: int) -> str:
+    """Map a redirect Location pointing at the backend onto the proxy prefix."""
+    location = _backend_origin(port).sub('', location)
+    if not location:
+        return prefix + '/'
+    if location.startswith('/') and not location.startswith('//'):
+        return prefix + location
+    return location
+
+
+# ETags given to rewritten bodies (see rewritten_etag)
+_REWRITTEN_ETAG = re.compile(r'^W/"(.*)-(?:identity|gzip|br)"$')
+
+
+def _opaque(etag: str) -> str:
+    return etag.removeprefix('W/').strip('"')
+
+
+def rewritten_etag(etag: str, encoding) -> str:
+    """Weak ETag of a rewritten body: its bytes are not the backend's, and
+    they differ again with each Content-Encoding."""
+    encoding = encoding or 'identity'
+    return f'W/"{_opaque(etag)}-{encoding}"'
+
+
+def upstream_etags(if_none_match: str) -> str:
+    """If-None-Match for the backend, rewritten ETags mapped back to its own."""
+    return ', '.join(_REWRITTEN_ETAG.sub(r'"\1"', tag) for tag in parse_etags(if_none_match))
+
+
+def client_etag(if_none_match: str, etag: str):
+    """The rewritten ETag in `if_none_match` standing for the backend's
+    `etag`, or None."""
+    for tag in parse_etags(if_none_match):
+        match = _REWRITTEN_ETAG.match(tag)
+        if match and match.group(1) == _opaque(etag):
+            return tag
+    return None
+
+
+def should_rewrite(content_type: str, content_length) -> bool:
+    """Rewrite only listed text types, and skip bodies above the size limit."""
+    if not any(t in content_type for t in settings.EVENT_PROXY_REWRITE_TYPES):
+        return False
+    try:
+        return int(content_length) <= settings.EVENT_PROXY_REWRITE_MAX_BYTES
+    except (TypeError, ValueError):
+        return True
+
+
+# Rewritten bodies keyed by backend, path and upstream ETag
+rewrite_cache = BoundedLRU(settings.EVENT_PROXY_REWRITE_CACHE_CHARS)
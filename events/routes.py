@@ -0,0 +1,60 @@
+"""
+Worker-local slug → backend lookup for the event proxy.
+
+Every proxied asset and XHR needs the event's port and flags; keeping them
+in memory means steady-state proxying does no database query. Entries are
+dropped by the receivers in events.signals when an event changes in this
+worker, and expire after EVENT_PROXY_ROUTE_TTL seconds so changes made
+through another worker are picked up too.
+"""
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+
+from events.models import Event
+
+
+class EventRoute(NamedTuple):
+    pk: int
+    slug: str
+    title: str
+    server_port: Optional[int]
+    is_active: bool
+    rewrite_urls: bool
+    cache_responses: bool
+    response_cache_version: int
+
+
+_FIELDS = EventRoute._fields
+# Upper bound on remembered slugs, unknown ones included
+_MAX_ROUTES = 1024
+
+_routes = {}
+_lock = threading.Lock()
+
+
+def route_for(slug: str) -> Optional[EventRoute]:
+    """Backend settings of the event with this slug, or None if there is none."""
+    now = time.monotonic()
+    with _lock:
+        entry = _routes.get(slug)
+    if entry and entry[1] > now:
+        return entry[0]
+
+    values = Event.objects.filter(slug=slug).values_list(*_FIELDS).first()
+    route = EventRoute(*values) if values else None
+    with _lock:
+        if len(_routes) >= _MAX_ROUTES:
+            _routes.clear()
+        # Unknown slugs are remembered as well, so scanners hitting random
+        # paths do not reach the database on every request
+        _routes[slug] = (route, now + settings.EVENT_PROXY_ROUTE_TTL)
+    return route
+
+
+def forget():
+    """Drop every cached route, e.g. after an event was saved or deleted."""
+    with _lock:
+        _routes.clear()
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from events import backends, routes
+from events.models import Event
+
+
+@receiver(pre_save, sender=Event)
+def event_backend_changing(sender, instance, raw=False, **kwargs):
+    # Drop pooled connections when the backend moves or is switched off
+    if raw or not instance.pk:
+        return
+    previous = Event.objects.filter(pk=instance.pk).values('server_port', 'is_active').first()
+    if previous and (previous['server_port'], previous['is_active']) != (instance.server_port, instance.is_active):
+        backends.drop(previous['server_port'], instance.server_port)
+
+
+@receiver(post_save, sender=Event)
+def event_saved(sender, instance, **kwargs):
+    routes.forget()
+
+
+@receiver(post_delete, sender=Event)
+def event_deleted(sender, instance, **kwargs):
+    backends.drop(instance.server_port)
+    routes.forget()
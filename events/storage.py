@@ -0,0 +1,87 @@
+"""
+Content-addressed storage for event media.
+
+Files are named after the SHA-256 of their content:
+    calculum/blobs/ab/cd/abcd…ef.jpg
+so a photo or video uploaded twice, or attached to several events, is
+stored once. Once written, a name always has the same content, and
+events.media serves it with an immutable Cache-Control. The directory part
+of the name given to save() (Media.file's upload_to) is ignored; the
+extension is kept so content types can still be guessed.
+
+Each stored blob has a Blob row, touched on every save. Media rows link to
+the blobs they use (original and resized copies) through Media.blobs, and
+cleanup_media_files deletes blobs that no row references.
+"""
+import hashlib
+import os
+import secrets
+from pathlib import Path, PurePosixPath
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+
+BLOB_DIR = 'calculum/blobs'
+
+# Bytes hashed and written per read of the uploaded file
+_CHUNK_SIZE = 64 * 1024
+
+
+def blob_name(digest: str, name: str) -> str:
+    extension = PurePosixPath(name).suffix.lower()[:10]
+    return f'{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+def is_blob(name: str) -> bool:
+    return bool(name) and name.startswith(f'{BLOB_DIR}/')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    content_addressed = True
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content: never suffix it
+        return name
+
+    def _save(self, name, content):
+        from events.models import Blob
+
+        incoming = Path(self.path(BLOB_DIR)) / f'.incoming-{secrets.token_hex(8)}'
+        incoming.parent.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        # Created like FileSystemStorage does, so the umask applies
+        fd = os.open(incoming, self.OS_OPEN_FLAGS, 0o666)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in content.chunks(_CHUNK_SIZE):
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+            name = blob_name(digest.hexdigest(), name)
+            path = Path(self.path(name))
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(incoming, self.file_permissions_mode)
+            with transaction.atomic():
+                # Touched first, so a fresh upload of an unreferenced blob is
+                # not swept before its Media row is saved; a sweep already
+                # holding the row (cleanup_media_files) finishes before this
+                Blob.objects.update_or_create(name=name, defaults={'size': size})
+                # Always written, even when the file exists: the sweep may
+                # have removed it since. Same name, same bytes, so replacing
+                # a concurrent copy is harmless
+                os.replace(incoming, path)
+        except BaseException:
+            incoming.unlink(missing_ok=True)
+            raise
+        return name
+
+
+blob_storage = ContentAddressedStorage()
+
+
+def get_blob_storage():
+    return blob_storage
@@ -0,0 +1,26 @@
+"""
+Background work for the events app, on the same per-worker queues as
+board.tasks.
+"""
+import logging
+
+from board.tasks import BackgroundQueue
+
+logger = logging.getLogger(__name__)
+
+# No cooldown: re-uploading a file must rebuild its copies right away
+media_queue = BackgroundQueue('media-derivatives', cooldown=0)
+
+
+def generate_derivatives(media_id):
+    """Build the resized copies of an uploaded image."""
+    from events import thumbnails
+    from events.models import Media
+
+    media = Media.objects.filter(pk=media_id).first()
+    if media is not None and thumbnails.generate(media):
+        logger.info('Generated %d derivatives for media %s', len(media.derivatives), media_id)
+
+
+def queue_derivatives(media_id):
+    return media_queue.enqueue(media_id, generate_derivatives, media_id)
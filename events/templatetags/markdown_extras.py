@@ -1,6 +1,7 @@
 from django import template
 from django.utils.safestring import mark_safe
-import markdown
+
+from events.rendering import render_markdown
 
 register = template.Library()
 
@@ -12,8 +13,7 @@ def markdown_to_html(text):
     Uses the `markdown` package and returns marked-safe HTML so templates
     can render rich content. If the package is not available this will
     raise ImportError (requirements.txt updated to include it).
+
+    Event summaries are rendered when saved: use `event.get_summary_html`.
     """
-    if not text:
-        return ''
-    html = markdown.markdown(text, extensions=['fenced_code', 'codehilite'])
-    return mark_safe(html)
+    return mark_safe(render_markdown(text))
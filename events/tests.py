@@ -1,3 +1,562 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import json
+import shutil
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from requests.structures import CaseInsensitiveDict
+from urllib3.exceptions import ProtocolError
+
+from events import compression, rewrite, routes, thumbnails
+from events.rewrite import rewrite_location, rewrite_urls
+from events.media import IMMUTABLE_CACHE_CONTROL, serve_media
+from events.response_cache import CachedResponse, freshness_lifetime, storable_lifetime
+from events.models import Blob, Event, Media
+from project.testing import TEST_STORAGES, TemporaryMediaRootMixin
+
+# Queries allowed for /events/ (validators included), whatever the number of events and media
+EVENTS_QUERY_BUDGET = 3
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class EventsQueryBudgetTests(TestCase):
+    def add_events(self, count, medias_per_event):
+        start = Event.objects.count()
+        events = Event.objects.bulk_create(
+            Event(title=f'Event {start + i}', slug=f'event-{start + i}', summary='Résumé')
+            for i in range(count)
+        )
+        Media.objects.bulk_create(
+            Media(event=event, file=f'calculum/events/2026/01/{event.slug}-{i}.jpg')
+            for event in events for i in range(medias_per_event)
+        )
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/events/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_data(self):
+        self.add_events(count=1, medias_per_event=1)
+        small = self.count_queries()
+        self.add_events(count=50, medias_per_event=6)
+        large = self.count_queries()
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, EVENTS_QUERY_BUDGET)
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class MediaAdminTests(TestCase):
+    def test_changelist_query_count_does_not_grow_with_media(self):
+        self.client.force_login(User.objects.create_superuser('admin'))
+        event = Event.objects.create(title='Finale', summary='...')
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get('/edit/events/media/')
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+
+        Media.objects.create(event=event, file='calculum/events/2026/01/a.jpg')
+        small = count_queries()
+        Media.objects.bulk_create(Media(event=event, file=f'calculum/events/2026/01/{i}.jpg') for i in range(10))
+        self.assertEqual(count_queries(), small)
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class SummaryRenderingTests(TestCase):
+    def test_summary_rendered_on_save_only(self):
+        event = Event.objects.create(title='Finale', summary='**Gras**\n\n```python\nprint(1)\n```')
+        self.assertIn('<strong>Gras</strong>', event.summary_html)
+        self.assertIn('codehilite', event.summary_html)
+        with mock.patch('events.rendering.markdown.markdown') as render:
+            response = self.client.get('/events/')
+        render.assert_not_called()
+        self.assertContains(response, '<strong>Gras</strong>', html=True)
+
+    def test_unchanged_summary_is_not_rendered_again(self):
+        event = Event.objects.create(title='Finale', summary='*vieux*')
+        with mock.patch('events.models.render_markdown', return_value='<p>neuf</p>') as render:
+            event.is_active = True
+            event.save()
+            render.assert_not_called()
+            event.summary = '*neuf*'
+            event.save(update_fields=['summary'])
+        render.assert_called_once_with('*neuf*')
+        event.refresh_from_db()
+        self.assertEqual(event.summary_html, '<p>neuf</p>')
+
+    def test_command_renders_stale_summaries(self):
+        Event.objects.bulk_create([Event(title='Ancien', slug='ancien', summary='*vieux*')])
+        call_command('render_event_summaries', stdout=mock.Mock())
+        self.assertEqual(Event.objects.get(slug='ancien').summary_html, '<p><em>vieux</em></p>')
+
+
+class ProxyRouteTests(TestCase):
+    def setUp(self):
+        routes.forget()
+        self.event = Event.objects.create(title='Contest', summary='Résumé', server_port=8080, is_active=True)
+
+    def test_warm_lookup_does_no_query(self):
+        routes.route_for(self.event.slug)
+        with self.assertNumQueries(0):
+            route = routes.route_for(self.event.slug)
+        self.assertEqual((route.server_port, route.is_active, route.rewrite_urls), (8080, True, True))
+
+    def test_unknown_slug_is_remembered(self):
+        self.assertIsNone(routes.route_for('missing'))
+        with self.assertNumQueries(0):
+            self.assertIsNone(routes.route_for('missing'))
+
+    def test_save_and_delete_invalidate(self):
+        routes.route_for(self.event.slug)
+        self.event.is_active = False
+        self.event.save()
+        self.assertFalse(routes.route_for(self.event.slug).is_active)
+        self.event.delete()
+        self.assertIsNone(routes.route_for(self.event.slug))
+
+
+class RewriteTests(SimpleTestCase):
+    PREFIX = '/events/contest'
+
+    def assertRewrites(self, samples):
+        for text, expected in samples:
+            with self.subTest(text=text):
+                self.assertEqual(rewrite_urls(text, self.PREFIX, 8080), expected)
+
+    def test_html(self):
+        self.assertRewrites([
+            ('<a href="/problems/a">', '<a href="/events/contest/problems/a">'),
+            ("<img src='/static/b.png'>", "<img src='/events/contest/static/b.png'>"),
+            ('<form action = "/submit">', '<form action = "/events/contest/submit">'),
+            ('<a href="/">', '<a href="/events/contest/">'),
+            ('<img srcset="/s.png 1x, /l.png 2x">', '<img srcset="/events/contest/s.png 1x, /events/contest/l.png 2x">'),
+            ('<div title="a / b">', '<div title="a / b">'),
+        ])
+
+    def test_absolute_backend_urls_are_prefixed_once(self):
+        self.assertRewrites([
+            ('<a href="http://localhost:8080/a">', '<a href="/events/contest/a">'),
+            ('url(http://localhost:8080/bg.png)', 'url(/events/contest/bg.png)'),
+            ('var api = "http://localhost:8080";', 'var api = "/events/contest/";'),
+            ('fetch("https://localhost:8080/api")', 'fetch("/events/contest/api")'),
+        ])
+
+    def test_javascript(self):
+        self.assertRewrites([
+            ('fetch("/api/submissions?page="+a)', 'fetch("/events/contest/api/submissions?page="+a)'),
+            ("var home = '/problems';", "var home = '/events/contest/problems';"),
+            ('const u = `/img/${name}.png`;', 'const u = `/events/contest/img/${name}.png`;'),
+            ('if (b == "/x")', 'if (b == "/events/contest/x")'),
+            # Already prefixed, or a bare "/" (e.g. a path separator)
+            ('fetch("/events/contest/api")', 'fetch("/events/contest/api")'),
+            ('x.split("/")', 'x.split("/")'),
+        ])
+
+    def test_css(self):
+        self.assertRewrites([
+            ('.a{background:url(/bg.jpg)}', '.a{background:url(/events/contest/bg.jpg)}'),
+            ('.b{background:url( "/i.svg" )}', '.b{background:url("/events/contest/i.svg")}'),
+            (".c{background:url('/j.png')}", ".c{background:url('/events/contest/j.png')}"),
+        ])
+
+    def test_external_and_protocol_relative_urls_are_unchanged(self):
+        self.assertRewrites([(text, text) for text in [
+            '<a href="https://example.com/a">',
+            '<script src="//cdn.example.com/lib.js"></script>',
+            '<img srcset="//cdn.example.com/a.png 1x">',
+            '.a{background:url(//cdn.example.com/bg.png)}',
+            'fetch("//cdn.example.com/data.json")',
+            '<a href="http://localhost:9090/other">',
+        ]])
+
+    def test_location(self):
+        samples = [
+            ('/login', '/events/contest/login'),
+            ('http://localhost:8080/done?x=1', '/events/contest/done?x=1'),
+            ('http://localhost:8080', '/events/contest/'),
+            ('https://sso.example.com/auth', 'https://sso.example.com/auth'),
+            ('//cdn.example.com/a', '//cdn.example.com/a'),
+            ('next', 'next'),
+        ]
+        for location, expected in samples:
+            with self.subTest(location=location):
+                self.assertEqual(rewrite_location(location, self.PREFIX, 8080), expected)
+
+
+class FakeUpstream:
+    """Enough of a streamed requests.Response for events.views.event_proxy."""
+
+    def __init__(self, status=200, headers=None, chunks=(), error=None):
+        self.status_code = status
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.url = 'http://localhost:8080/'
+        self.chunks, self.error = list(chunks), error
+        self.closed = False
+        self.raw = mock.Mock()
+        self.raw.headers.getlist.return_value = []
+        self.raw.stream.side_effect = self.stream
+
+    def stream(self, amount, decode_content=True):
+        yield from self.chunks
+        if self.error:
+            raise self.error
+
+    @property
+    def text(self):
+        # requests hands the body decoded, whatever its Content-Encoding
+        return b''.join(self.chunks).decode()
+
+    def close(self):
+        self.closed = True
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class ProxyResponseTests(TestCase):
+    PAGE = ('<a href="/problems">Problèmes</a>' * 20).encode()
+
+    def setUp(self):
+        routes.forget()
+        rewrite.rewrite_cache.clear()
+        self.event = Event.objects.create(title='Contest', summary='Résumé', server_port=8080, is_active=True)
+        self.session = mock.Mock()
+        self.enterContext(mock.patch('events.backends.session_for', return_value=self.session))
+
+    def proxy(self, upstream, path='', **headers):
+        self.session.request.return_value = upstream
+        return self.client.get(f'/events/{self.event.slug}/{path}', **headers)
+
+    def page(self, **headers):
+        return FakeUpstream(headers={
+            'Content-Type': 'text/html', 'Content-Encoding': 'gzip', 'Content-Length': '99', 'ETag': '"v1"', **headers,
+        }, chunks=[self.PAGE])
+
+    def test_rewritten_body_is_compressed_for_the_client(self):
+        response = self.proxy(self.page(), HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(response['ETag'], 'W/"v1-gzip"')
+        # Set by Django for the new body, not the backend's
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertIn(b'href="/events/contest/problems"', gzip.decompress(response.content))
+
+        response = self.proxy(self.page(), HTTP_ACCEPT_ENCODING='identity')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response['ETag'], 'W/"v1-identity"')
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_rewritten_etags_are_mapped_back_for_the_backend(self):
+        response = self.proxy(FakeUpstream(304, {'ETag': '"v1"'}),
+                              HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH='W/"v1-gzip"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], 'W/"v1-gzip"')
+        sent = self.session.request.call_args.kwargs['headers']
+        self.assertEqual(sent['IF-NONE-MATCH'], '"v1"')
+
+    def test_bodies_not_rewritten_keep_their_encoding_and_etag(self):
+        self.event.rewrite_urls = False
+        self.event.save()
+        compressed = gzip.compress(self.PAGE)
+        upstream = FakeUpstream(headers={
+            'Content-Type': 'text/html', 'Content-Encoding': 'gzip',
+            'Content-Length': str(len(compressed)), 'ETag': '"v1"',
+        }, chunks=[compressed])
+        response = self.proxy(upstream, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Length'], str(len(compressed)))
+        self.assertEqual(response['ETag'], '"v1"')
+        self.assertEqual(b''.join(response.streaming_content), compressed)
+        self.assertEqual(self.session.request.call_args.kwargs['headers']['Accept-Encoding'], 'gzip')
+
+    def test_binary_bodies_are_streamed(self):
+        chunks = [bytes(range(256)) * 256] * 4
+        upstream = FakeUpstream(headers={'Content-Type': 'image/png'}, chunks=chunks)
+        response = self.proxy(upstream, 'logo.png')
+        self.assertTrue(response.streaming)
+        self.assertFalse(upstream.closed)
+        self.assertEqual(b''.join(response.streaming_content), b''.join(chunks))
+        self.assertTrue(upstream.closed)
+
+    def test_large_text_bodies_are_streamed_untouched(self):
+        body = b'fetch("/api");' * 100
+        upstream = FakeUpstream(headers={
+            'Content-Type': 'application/javascript', 'Content-Length': str(len(body)),
+        }, chunks=[body])
+        with override_settings(EVENT_PROXY_REWRITE_MAX_BYTES=len(body) - 1):
+            response = self.proxy(upstream, 'app.js')
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), body)
+
+    def test_connection_released_when_the_client_disconnects(self):
+        upstream = FakeUpstream(headers={'Content-Type': 'video/mp4'}, chunks=[b'frame'] * 10)
+        response = self.proxy(upstream, 'clip.mp4')
+        response.close()
+        self.assertTrue(upstream.closed)
+
+    def test_interrupted_upstream_aborts_the_body(self):
+        upstream = FakeUpstream(headers={'Content-Type': 'video/mp4'}, chunks=[b'frame'],
+                                error=ProtocolError('Connection broken'))
+        response = self.proxy(upstream, 'clip.mp4')
+        chunks = iter(response.streaming_content)
+        self.assertEqual(next(chunks), b'frame')
+        with self.assertLogs('events.views', 'ERROR'), self.assertRaises(ProtocolError):
+            next(chunks)
+        self.assertTrue(upstream.closed)
+
+
+class ResponseCachePolicyTests(SimpleTestCase):
+    def setUp(self):
+        self.get = RequestFactory().get('/events/contest/app.js')
+
+    def test_freshness(self):
+        self.assertEqual(freshness_lifetime({'Cache-Control': 'max-age=60, s-maxage=300'}), 300)
+        self.assertEqual(freshness_lifetime({'Cache-Control': 'max-age=60', 'Age': '20'}), 40)
+        self.assertEqual(freshness_lifetime({'Cache-Control': 'no-cache, max-age=60'}), 0)
+        self.assertEqual(freshness_lifetime({
+            'Date': 'Sun, 18 Oct 2026 07:00:00 GMT', 'Expires': 'Sun, 18 Oct 2026 07:10:00 GMT',
+        }), 600)
+
+    def test_storable(self):
+        self.assertEqual(storable_lifetime(self.get, 200, {'Cache-Control': 'max-age=60'}), 60)
+        self.assertEqual(storable_lifetime(self.get, 200, {'ETag': '"v1"'}), 0)
+        self.assertIsNone(storable_lifetime(self.get, 200, {}))
+        self.assertIsNone(storable_lifetime(self.get, 200, {'Cache-Control': 'private, max-age=60'}))
+        self.assertIsNone(storable_lifetime(self.get, 200, {'Cache-Control': 'max-age=60', 'Vary': 'Cookie'}))
+        self.assertIsNone(storable_lifetime(self.get, 404, {'Cache-Control': 'max-age=60'}))
+        post = RequestFactory().post('/events/contest/submit')
+        self.assertIsNone(storable_lifetime(post, 200, {'Cache-Control': 'max-age=60'}))
+
+    def test_conditional_request_answered_locally(self):
+        entry = CachedResponse({'Content-Type': 'text/javascript', 'ETag': '"v1"'}, b'x', lifetime=60)
+        request = RequestFactory().get('/events/contest/app.js', HTTP_IF_NONE_MATCH='"v1"')
+        self.assertEqual(entry.to_response(request).status_code, 304)
+        self.assertEqual(entry.to_response(self.get).content, b'x')
+
+
+class CompressionNegotiationTests(SimpleTestCase):
+    def request(self, accept_encoding):
+        return RequestFactory().get('/events/contest/app.js', HTTP_ACCEPT_ENCODING=accept_encoding)
+
+    def test_upstream_accept_encoding(self):
+        request = self.request('gzip, deflate, zstd;q=0.5, identity')
+        self.assertEqual(compression.upstream_accept_encoding(request, decodable_only=False), 'deflate, gzip, zstd')
+        self.assertEqual(compression.upstream_accept_encoding(request, decodable_only=True), 'deflate, gzip')
+        self.assertEqual(compression.upstream_accept_encoding(RequestFactory().get('/'), decodable_only=False), 'identity')
+
+    def test_choose_encoding(self):
+        self.assertEqual(compression.choose_encoding(self.request('deflate, gzip')), 'gzip')
+        self.assertIsNone(compression.choose_encoding(self.request('gzip;q=0, deflate')))
+        self.assertIsNone(compression.choose_encoding(self.request('')))
+
+
+@override_settings(MEDIA_ACCEL='')
+class MediaServingTests(TemporaryMediaRootMixin, SimpleTestCase):
+    PATH = 'calculum/events/2026/01/clip.mp4'
+
+    def setUp(self):
+        super().setUp()
+        file = self.media_root / self.PATH
+        file.parent.mkdir(parents=True)
+        file.write_bytes(bytes(range(256)) * 4)
+        self.factory = RequestFactory()
+
+    def get(self, path=PATH, **headers):
+        return serve_media(self.factory.get(f'/media/{path}', headers=headers), path)
+
+    def test_full_file_with_validators(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(256)) * 4)
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(self.get(If_None_Match=response['ETag']).status_code, 304)
+
+    def test_byte_ranges(self):
+        response = self.get(Range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(10, 20)))
+        self.assertEqual(self.get(Range='bytes=-4')['Content-Range'], 'bytes 1020-1023/1024')
+        self.assertEqual(self.get(Range='bytes=1000-')['Content-Length'], '24')
+        self.assertEqual(self.get(Range='bytes=2000-').status_code, 416)
+        # A stale If-Range gets the whole (changed) file
+        self.assertEqual(self.get(Range='bytes=0-1', If_Range='"old"').status_code, 200)
+
+    def test_ranges_of_an_empty_file_cannot_be_satisfied(self):
+        (self.media_root / 'calculum/events/2026/01/empty.mp4').touch()
+        for header in ('bytes=-4', 'bytes=0-'):
+            response = self.get('calculum/events/2026/01/empty.mp4', Range=header)
+            self.assertEqual(response.status_code, 416)
+            self.assertEqual(response['Content-Range'], 'bytes */0')
+
+    def test_accel_redirect_and_missing_files(self):
+        with override_settings(MEDIA_ACCEL='x-accel-redirect', MEDIA_ACCEL_PREFIX='/protected-media/'):
+            response = self.get()
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.PATH}')
+        self.assertEqual(response.content, b'')
+        for path in ('missing.jpg', '../secret', 'calculum/events'):
+            with self.assertRaises(Http404):
+                self.get(path)
+
+
+@override_settings(STORAGES=TEST_STORAGES, MEDIA_THUMBNAIL_WIDTHS=(320, 640))
+class MediaDerivativeTests(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = Event.objects.create(title='Finale', summary='...')
+
+    def add_media(self, name, content=b'data'):
+        path = self.media_root / 'calculum/events/2026/01' / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        return Media(event=self.event, file=f'calculum/events/2026/01/{name}')
+
+    def test_kind_and_background_job_on_new_files_only(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            image = self.add_media('photo.jpg')
+            image.save()
+        self.assertEqual(image.kind, 'image')
+        self.assertEqual(len(callbacks), 1)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Media.objects.get(pk=image.pk).save()
+            video = self.add_media('clip.webm')
+            video.save()
+        self.assertEqual(callbacks, [])
+        self.assertEqual(video.kind, 'video')
+
+    def test_template_uses_kind_and_srcset(self):
+        video = self.add_media('clip.mov')
+        video.save()
+        image = self.add_media('photo.jpg')
+        image.save()
+        Media.objects.filter(pk=image.pk).update(width=800, height=600, derivatives=[
+            {'width': 320, 'height': 240, 'format': 'webp', 'name': 'calculum/events/2026/01/derived/photo-320w.webp'},
+            {'width': 320, 'height': 240, 'format': 'jpeg', 'name': 'calculum/events/2026/01/derived/photo-320w.jpg'},
+        ])
+        response = self.client.get('/events/')
+        self.assertContains(response, 'type="video/quicktime"')
+        self.assertContains(response, 'srcset="/media/calculum/events/2026/01/derived/photo-320w.webp 320w"')
+        self.assertContains(response, 'srcset="/media/calculum/events/2026/01/derived/photo-320w.jpg 320w, '
+                                      '/media/calculum/events/2026/01/photo.jpg 800w"')
+        self.assertContains(response, 'width="800" height="600"')
+
+    def test_cleanup_keeps_derivatives(self):
+        image = self.add_media('photo.jpg')
+        image.derivatives = [{'width': 320, 'height': 240, 'format': 'webp',
+                              'name': 'calculum/events/2026/01/derived/photo-320w.webp'}]
+        image.save()
+        self.add_media('derived/photo-320w.webp')
+        self.add_media('derived/orphan-320w.webp')
+        stdout = StringIO()
+        call_command('cleanup_media_files', '--dry-run', '--legacy', stdout=stdout)
+        self.assertIn('orphan-320w.webp', stdout.getvalue())
+        self.assertNotIn('photo-320w.webp', stdout.getvalue())
+
+    @skipUnless(thumbnails.Image, 'Pillow is not installed')
+    def test_generate_resizes_narrower_widths(self):
+        buffer = BytesIO()
+        thumbnails.Image.new('RGB', (500, 250), 'red').save(buffer, 'PNG')
+        image = self.add_media('photo.png', buffer.getvalue())
+        image.save()
+        self.assertTrue(thumbnails.generate(image))
+        image.refresh_from_db()
+        self.assertEqual((image.width, image.height), (500, 250))
+        self.assertEqual([(d['width'], d['height'], d['format']) for d in image.derivatives],
+                         [(320, 160, 'webp'), (320, 160, 'jpeg')])
+        for name in image.derivative_names():
+            self.assertTrue((self.media_root / name).exists())
+
+
+@override_settings(STORAGES=TEST_STORAGES, MEDIA_BLOB_GRACE_SECONDS=0)
+class BlobStorageTests(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = Event.objects.create(title='Finale', summary='...')
+
+    def upload(self, name, content):
+        return Media.objects.create(event=self.event, file=SimpleUploadedFile(name, content))
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.upload('photo.JPG', b'same bytes')
+        second = self.upload('copy.jpg', b'same bytes')
+        digest = hashlib.sha256(b'same bytes').hexdigest()
+        self.assertEqual(first.file.name, f'calculum/blobs/{digest[:2]}/{digest[2:4]}/{digest}.jpg')
+        self.assertEqual(second.file.name, first.file.name)
+        self.assertEqual(second.kind, 'image')
+        self.assertEqual(Blob.objects.get().medias.count(), 2)
+        self.assertEqual(len([p for p in self.media_root.rglob('*') if p.is_file()]), 1)
+
+    def test_cleanup_sweeps_unreferenced_blobs_only(self):
+        kept = self.upload('a.mp4', b'kept')
+        dropped = self.upload('b.mp4', b'dropped')
+        dropped.delete()
+        call_command('cleanup_media_files', stdout=StringIO())
+        self.assertEqual(list(Blob.objects.values_list('name', flat=True)), [kept.file.name])
+        self.assertTrue((self.media_root / kept.file.name).exists())
+        self.assertFalse((self.media_root / dropped.file.name).exists())
+
+    def test_blob_row_is_kept_when_its_file_cannot_be_removed(self):
+        self.upload('b.mp4', b'dropped').delete()
+        with mock.patch('events.management.commands.cleanup_media_files.os.remove', side_effect=PermissionError):
+            call_command('cleanup_media_files', stdout=StringIO())
+        self.assertEqual(Blob.objects.count(), 1)
+
+    def test_upload_writes_the_file_again_when_the_row_exists(self):
+        first = self.upload('a.mp4', b'same bytes')
+        # As if a sweep had removed the file after the upload saw it
+        (self.media_root / first.file.name).unlink()
+        second = self.upload('b.mp4', b'same bytes')
+        self.assertEqual((self.media_root / second.file.name).read_bytes(), b'same bytes')
+
+    def test_recent_blobs_are_kept(self):
+        self.upload('b.mp4', b'just uploaded').delete()
+        with override_settings(MEDIA_BLOB_GRACE_SECONDS=3600):
+            call_command('cleanup_media_files', stdout=StringIO())
+        self.assertEqual(Blob.objects.count(), 1)
+
+    def test_legacy_sweep_quarantines_and_reports(self):
+        for name in ('2026/01/kept.jpg', '2026/01/old.jpg', '2025/12/derived/old-320w.webp'):
+            path = self.media_root / 'calculum/events' / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b'12345')
+        Media.objects.bulk_create([Media(event=self.event, file='calculum/events/2026/01/kept.jpg')])
+        quarantine = self.media_root.parent / f'{self.media_root.name}-quarantine'
+        self.addCleanup(shutil.rmtree, quarantine, ignore_errors=True)
+        stdout = StringIO()
+        call_command('cleanup_media_files', '--legacy', '--quarantine', str(quarantine), '--report', '-',
+                     stdout=stdout, stderr=StringIO())
+
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(report['legacy']['scanned'], 3)
+        self.assertEqual(sorted(o['name'] for o in report['legacy']['orphans']),
+                         ['calculum/events/2025/12/derived/old-320w.webp', 'calculum/events/2026/01/old.jpg'])
+        self.assertEqual(report['legacy']['bytes'], 10)
+        self.assertEqual(report['legacy']['removed_directories'],
+                         ['calculum/events/2025/12/derived', 'calculum/events/2025/12', 'calculum/events/2025'])
+        self.assertTrue((quarantine / 'calculum/events/2026/01/old.jpg').exists())
+        self.assertTrue((self.media_root / 'calculum/events/2026/01/kept.jpg').exists())
+        self.assertFalse((self.media_root / 'calculum/events/2026/01/old.jpg').exists())
+
+    def test_legacy_files_are_moved_into_blobs(self):
+        legacy = self.media_root / 'calculum/events/2026/01/old.jpg'
+        legacy.parent.mkdir(parents=True)
+        legacy.write_bytes(b'old photo')
+        Media.objects.bulk_create([Media(event=self.event, file='calculum/events/2026/01/old.jpg')])
+        call_command('store_media_as_blobs', stdout=StringIO())
+        media = Media.objects.get()
+        self.assertTrue(media.file.name.startswith('calculum/blobs/'))
+        self.assertEqual(media.file.read(), b'old photo')
+        self.assertEqual(list(media.blobs.values_list('name', flat=True)), [media.file.name])
@@ -0,0 +1,80 @@
+"""
+Resized copies of uploaded images, for srcset on the events page.
+
+For every width in MEDIA_THUMBNAIL_WIDTHS narrower than the original, a
+WebP and a JPEG copy are saved to the original's storage. In the
+content-addressed storage (events.storage) they become blobs like any
+upload: identical copies are stored once, and those no longer used are
+swept by cleanup_media_files. In other storages they go under derived/
+next to the original, and rebuilding deletes the previous copies.
+
+Needs Pillow; without it, images are shown as uploaded.
+"""
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional dependency
+    Image = None
+
+# (format in Media.derivatives, Pillow format, extension)
+FORMATS = (('webp', 'WEBP', 'webp'), ('jpeg', 'JPEG', 'jpg'))
+QUALITY = 80
+
+
+def derivative_name(name: str, width: int, extension: str) -> str:
+    directory, _, filename = name.rpartition('/')
+    stem = filename.rsplit('.', 1)[0]
+    return f'{directory}/derived/{stem}-{width}w.{extension}'
+
+
+def _encode(image, pillow_format) -> bytes:
+    if pillow_format == 'JPEG' or image.mode not in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGB')
+    else:
+        image = image.convert('RGBA')
+    buffer = io.BytesIO()
+    image.save(buffer, pillow_format, quality=QUALITY)
+    return buffer.getvalue()
+
+
+def generate(media) -> bool:
+    """Rebuild the derivatives of an image Media and store its dimensions.
+
+    Returns False when there is nothing to do (not an image, no Pillow).
+    """
+    from events.models import Media
+
+    if Image is None or media.kind != 'image' or not media.file:
+        return False
+    storage = media.file.storage
+    derivatives = []
+    with media.file.open('rb') as f, Image.open(f) as original:
+        image = ImageOps.exif_transpose(original)
+        width, height = image.size
+        for target in sorted(set(settings.MEDIA_THUMBNAIL_WIDTHS)):
+            if target >= width:
+                break
+            target_height = max(1, round(height * target / width))
+            resized = image.resize((target, target_height), Image.Resampling.LANCZOS)
+            for fmt, pillow_format, extension in FORMATS:
+                name = storage.save(
+                    derivative_name(media.file.name, target, extension),
+                    ContentFile(_encode(resized, pillow_format)),
+                )
+                derivatives.append({'width': target, 'height': target_height, 'format': fmt, 'name': name})
+
+    if not getattr(storage, 'content_addressed', False):
+        for name in set(media.derivative_names()) - {d['name'] for d in derivatives}:
+            storage.delete(name)
+    media.width, media.height, media.derivatives = width, height, derivatives
+    # update() rather than save(): saving would queue this job again
+    Media.objects.filter(pk=media.pk).update(
+        width=width, height=height, derivatives=derivatives, updated_at=timezone.now()
+    )
+    media.sync_blobs()
+    return True
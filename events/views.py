@@ -1,10 +1,21 @@
-from django.shortcuts import render, get_object_or_404
-from django.http import HttpRequest, HttpResponse
+from django.conf import settings
+from django.shortcuts import render
+from django.utils.cache import patch_vary_headers
+from django.http import Http404, HttpRequest, HttpResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from events.models import Event
+from board.conditional import conditional_page
+from events import backends, compression, routes
+from events.models import Event, Media
+from events.rendering import RENDER_VERSION
+from events.response_cache import (
+    CachedResponse, bypasses_cache, cache_key, response_cache, storable_lifetime, wants_revalidation,
+)
+from events.rewrite import (
+    client_etag, rewrite_cache, rewrite_location, rewrite_urls, rewritten_etag, should_rewrite, upstream_etags,
+)
 import requests as http_requests
 import logging
-import re
+from urllib3.exceptions import HTTPError as Urllib3Error
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +24,14 @@ _HOP_BY_HOP = frozenset({
     'te', 'trailers', 'transfer-encoding', 'upgrade',
 })
 
+# Bytes relayed per write when streaming upstream bodies to the client
+_CHUNK_SIZE = 64 * 1024
 
+
+@conditional_page(
+    lambda request: [Event.objects.all(), Media.objects.all()],
+    lambda request: [RENDER_VERSION],
+)
 def events(request: HttpRequest) -> HttpResponse:
     visible = Event.objects.prefetch_related('medias').filter(hidden=False).order_by('-start')
     return render(request, 'events.html', context={'events': visible})
@@ -22,7 +40,10 @@ def events(request: HttpRequest) -> HttpResponse:
 @csrf_exempt
 def event_proxy(request: HttpRequest, slug: str, path: str = '') -> HttpResponse:
     """Reverse proxy — every HTTP method goes through Django."""
-    event = get_object_or_404(Event, slug=slug)
+    # Resolved from memory: no query per asset once the worker is warm
+    event = routes.route_for(slug)
+    if event is None:
+        raise Http404('No Event matches the given query.')
 
     if not event.server_port:
         return _error(request, event, 'Serveur non configuré',
@@ -39,15 +60,34 @@ def event_proxy(request: HttpRequest, slug: str, path: str = '') -> HttpResponse
         target += f'?{qs}'
 
     headers = _build_headers(request)
+    # Bodies that may be rewritten have to be decodable here; everything else
+    # is relayed in whatever encoding the client accepts
+    headers['Accept-Encoding'] = compression.upstream_accept_encoding(request, decodable_only=event.rewrite_urls)
+
+    # Optional HTTP cache: fresh entries are served without contacting the
+    # backend, stale ones are revalidated with their own validators
+    response_key = entry = None
+    if event.cache_responses and not bypasses_cache(request):
+        response_key = cache_key(event, target, headers['Accept-Encoding'])
+        entry = response_cache.get(response_key)
+        if entry is not None:
+            if entry.is_fresh() and not wants_revalidation(request):
+                return entry.to_response(request)
+            headers = {k: v for k, v in headers.items()
+                       if k.lower() not in ('if-none-match', 'if-modified-since')}
+            headers.update(entry.validators())
+    if event.rewrite_urls:
+        _map_client_etags(headers)
 
     try:
-        upstream = http_requests.request(
+        upstream = backends.session_for(event.server_port).request(
             method=request.method,
             url=target,
             data=request.body or None,
             headers=headers,
             allow_redirects=False,
             timeout=30,
+            stream=True,
         )
     except http_requests.ConnectionError:
         return _error(request, event, 'Erreur de connexion',
@@ -57,37 +97,84 @@ def event_proxy(request: HttpRequest, slug: str, path: str = '') -> HttpResponse
         return _error(request, event, 'Erreur serveur',
                       f"Erreur inattendue pour « {event.title} ».", 502)
 
+    if entry is not None and upstream.status_code == 304:
+        upstream.close()
+        revalidated = upstream.headers
+        if event.rewrite_urls:
+            # The entry keeps its own (possibly rewritten) ETag
+            revalidated = {k: v for k, v in revalidated.items() if k.lower() != 'etag'}
+        entry.revalidated(revalidated)
+        return entry.to_response(request)
+
+    lifetime = storable_lifetime(request, upstream.status_code, upstream.headers) if response_key else None
     rewrite = event.rewrite_urls
 
     # Redirects — rewrite Location
     if upstream.status_code in (301, 302, 303, 307, 308):
         location = upstream.headers.get('Location', '')
         if rewrite:
-            backend_origin = re.compile(rf'^https?://localhost:{event.server_port}')
-            location = backend_origin.sub('', location)
-            if not location:
-                location = prefix + '/'
-            elif location.startswith('/'):
-                location = prefix + location
+            location = rewrite_location(location, prefix, event.server_port)
         resp = HttpResponse(status=upstream.status_code)
         resp['Location'] = location
         _forward_cookies(upstream, resp, prefix)
+        upstream.close()
         return resp
 
-    # Body — rewrite URLs in text responses (skip if backend handles its own base URL)
+    # Body — only text that needs URL rewriting is buffered; everything else
+    # (downloads, archives, images, oversized bodies, or any body when the
+    # backend handles its own base URL) is relayed chunk by chunk as it
+    # arrives, still compressed as the backend sent it
     ct = upstream.headers.get('Content-Type', '')
-    body = _rewrite_body(upstream, ct, prefix, event.server_port) if rewrite else upstream.content
+    # A 304 has no body to rewrite
+    rewritten = (rewrite and upstream.status_code != 304
+                 and should_rewrite(ct, upstream.headers.get('Content-Length')))
+    rewrite_key = None
+    if rewritten:
+        # An unchanged asset (same ETag) is rewritten once per worker
+        etag = upstream.headers.get('ETag') if upstream.status_code == 200 else None
+        rewrite_key = (target, prefix, etag) if etag else None
+        body = rewrite_cache.get(rewrite_key) if rewrite_key else None
+        if body is not None:
+            _discard_body(upstream)
+        else:
+            try:
+                text = upstream.text
+            except http_requests.RequestException as exc:
+                logger.error('Proxy %s %s → %s', request.method, target, exc)
+                return _error(request, event, 'Erreur serveur',
+                              f"Erreur inattendue pour « {event.title} ».", 502)
+            finally:
+                upstream.close()
+            body = rewrite_urls(text, prefix, event.server_port)
+            if rewrite_key:
+                rewrite_cache.set(rewrite_key, body)
+        resp = HttpResponse(body, status=upstream.status_code, content_type=ct)
+    else:
+        keep = None
+        if lifetime is not None:
+            def keep(content):
+                _store(response_key, resp, content, lifetime)
+        resp = StreamingHttpResponse(_StreamedBody(upstream, keep), status=upstream.status_code, content_type=ct)
 
-    resp = HttpResponse(body, status=upstream.status_code, content_type=ct)
-
-    # Forward safe response headers (skip hop-by-hop + headers Django manages)
+    # Forward safe response headers (skip hop-by-hop + headers Django manages);
+    # the encoding and length only still apply to bodies relayed untouched
+    skipped = _HOP_BY_HOP | {'content-type', 'set-cookie'}
+    if rewritten:
+        skipped |= {'content-encoding', 'content-length'}
     for key, value in upstream.headers.items():
-        if key.lower() not in _HOP_BY_HOP | {
-            'content-type', 'content-encoding', 'content-length', 'set-cookie',
-        }:
+        if key.lower() not in skipped:
             resp[key] = value
 
+    if rewritten:
+        _compress(request, resp, rewrite_key)
+    elif rewrite and upstream.status_code == 304 and resp.has_header('ETag'):
+        # The client holds a rewritten copy: confirm the ETag it sent
+        etag = client_etag(request.headers.get('If-None-Match', ''), resp['ETag'])
+        if etag:
+            resp['ETag'] = etag
     _forward_cookies(upstream, resp, prefix)
+    if lifetime is not None and not resp.streaming:
+        _store(response_key, resp, resp.content, lifetime)
     return resp
 
 
@@ -142,38 +229,100 @@ def _forward_cookies(upstream, resp: HttpResponse, prefix: str):
         resp.set_cookie(**kw)
 
 
-def _rewrite_body(upstream, ct: str, prefix: str, port: int):
-    """Pick the right rewriter based on Content-Type."""
-    if 'text/html' in ct:
-        return _rewrite_urls(upstream.text, prefix, port)
-    if 'javascript' in ct:
-        return _rewrite_urls(upstream.text, prefix, port)
-    if 'text/css' in ct:
-        return _rewrite_urls(upstream.text, prefix, port)
-    return upstream.content
+class _StreamedBody:
+    """An upstream body relayed by StreamingHttpResponse. Django closes it
+    with the response, which releases the connection even when the client
+    went away before the first chunk."""
 
+    def __init__(self, upstream, keep=None):
+        self.upstream = upstream
+        self.keep = keep
 
-def _rewrite_urls(text: str, prefix: str, port: int) -> str:
-    """
-    Rewrite URLs in any text content (HTML, JS, CSS).
-    1. Replace absolute backend URLs (http(s)://localhost:PORT/...) with prefixed paths
-    2. Replace root-relative paths (/...) with prefixed paths
+    def __iter__(self):
+        return _stream_body(self.upstream, self.keep)
+
+    def close(self):
+        self.upstream.close()
+
+
+def _stream_body(upstream, keep=None):
+    """Yield the upstream body in chunks, releasing the connection at the end.
+    The body is not decoded: it keeps the backend's Content-Encoding.
+
+    If `keep` is given and the whole body fits in a cache entry, it is
+    called with the complete body once the last chunk was sent.
+
+    An interrupted upstream is logged and the error raised again: the
+    status line is already sent, so the server has to abort the response
+    for the client to see that the body is incomplete.
     """
-    # Step 1: absolute backend URLs → prefixed path
-    text = re.sub(rf'https?://localhost:{port}(/[^"\s\'<>)]*)', rf'{prefix}\1', text)
-    text = re.sub(rf'https?://localhost:{port}(["\'])', rf'{prefix}/\1', text)
-    # Step 2: HTML attributes with root-relative paths
-    text = re.sub(r'((?:href|src|action)\s*=\s*")(/[^"]*)"', rf'\1{prefix}\2"', text)
-    text = re.sub(r"((?:href|src|action)\s*=\s*')(/[^']*?)'", rf"\1{prefix}\2'", text)
-    # Step 3: CSS url()
-    text = re.sub(r"url\(\s*'(/[^']*?)'\s*\)", rf"url('{prefix}\1')", text)
-    text = re.sub(r'url\(\s*"(/[^"]*?)"\s*\)', rf'url("{prefix}\1")', text)
-    text = re.sub(r'url\(\s*(/[^)\s]+)\s*\)', rf'url({prefix}\1)', text)
-    # Step 4: JS string literals with root-relative paths (not already prefixed)
-    text = re.sub(r"'(/(?!events/)[^'\n]+)'", rf"'{prefix}\1'", text)
-    text = re.sub(r'"(/(?!events/)[^"\n]+)"', rf'"{prefix}\1"', text)
-    text = re.sub(r'`(/(?!events/)[^`\n]+)`', rf'`{prefix}\1`', text)
-    return text
+    chunks, size = [], 0
+    try:
+        for chunk in upstream.raw.stream(_CHUNK_SIZE, decode_content=False):
+            if keep is not None:
+                size += len(chunk)
+                if size > settings.EVENT_PROXY_CACHE_MAX_ENTRY_BYTES:
+                    keep, chunks = None, None
+                else:
+                    chunks.append(chunk)
+            yield chunk
+        if keep is not None:
+            keep(b''.join(chunks))
+    except Urllib3Error as exc:
+        logger.error('Proxy stream from %s interrupted: %s', upstream.url, exc)
+        raise
+    finally:
+        upstream.close()
+
+
+def _map_client_etags(headers: dict):
+    """Send the backend its own ETags instead of those given to rewritten bodies."""
+    for name in list(headers):
+        if name.lower() == 'if-none-match':
+            value = upstream_etags(headers[name])
+            if value:
+                headers[name] = value
+            else:
+                del headers[name]
+
+
+def _compress(request, resp: HttpResponse, rewrite_key=None):
+    """Compress a rewritten body for this client; the compressed bytes of a
+    cached rewrite are cached as well."""
+    patch_vary_headers(resp, ('Accept-Encoding',))
+    encoding = compression.choose_encoding(request)
+    if len(resp.content) < compression.MIN_SIZE:
+        encoding = None
+    if encoding is not None:
+        key = (rewrite_key, encoding) if rewrite_key else None
+        content = rewrite_cache.get(key) if key else None
+        if content is None:
+            content = compression.compress(resp.content, encoding)
+            if key:
+                rewrite_cache.set(key, content)
+        resp.content = content
+        resp['Content-Encoding'] = encoding
+    if resp.has_header('ETag'):
+        # One weak validator per representation, never the backend's
+        resp['ETag'] = rewritten_etag(resp['ETag'], encoding)
+
+
+def _store(key, resp, body: bytes, lifetime: int):
+    """Keep a complete response in the per-worker HTTP cache."""
+    if len(body) <= settings.EVENT_PROXY_CACHE_MAX_ENTRY_BYTES:
+        response_cache.set(key, CachedResponse(resp.items(), body, lifetime))
+
+
+def _discard_body(upstream):
+    """Drain an unneeded body without decoding it so the connection is reused."""
+    try:
+        for _ in upstream.raw.stream(_CHUNK_SIZE, decode_content=False):
+            pass
+        upstream.raw.release_conn()
+    except Exception:
+        pass
+    finally:
+        upstream.close()
 
 
 def _error(request, event, title, message, status):
@@ -0,0 +1,47 @@
+"""
+Pre-render the public pages to PRERENDER_DIR (see info.prerender).
+
+Run it once after deploying (collectstatic first: pages link to the hashed
+static files); admin changes then trigger new prerenders by themselves.
+
+Usage:
+    python manage.py prerender
+    python manage.py prerender --clear   # stop serving pre-rendered pages
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from info import prerender
+
+
+class Command(BaseCommand):
+    help = 'Write the public pages as static HTML (with .gz/.br copies) served while fresh'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete the pre-rendered pages, so every request is rendered again',
+        )
+
+    def handle(self, *args, **options):
+        if prerender.root() is None:
+            raise CommandError('Prerendering is disabled (PRERENDER_DIR is empty).')
+        if options['clear']:
+            prerender.clear()
+            self.stdout.write(self.style.SUCCESS('Pre-rendered pages deleted.'))
+            return
+
+        start = time.monotonic()
+        try:
+            manifest = prerender.write_pages(prerender.page_urls())
+        except ValueError as e:
+            raise CommandError(str(e))
+        for url, page in manifest['pages'].items():
+            sizes = ', '.join(f'{encoding} {size / 1024:.1f} KB' for encoding, size in page['sizes'].items())
+            self.stdout.write(f'  {url}: {sizes}')
+        self.stdout.write(self.style.SUCCESS(
+            f"Pre-rendered {len(manifest['pages'])} pages in {time.monotonic() - start:.2f}s "
+            f"to {prerender.root()}."
+        ))
@@ -0,0 +1,70 @@
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+from events.compression import accepted_encodings
+from info import prerender
+
+# Best first; identity is always written
+_ENCODINGS = ('br', 'gzip')
+
+
+class PrerenderedPagesMiddleware:
+    """Serve fresh pre-rendered pages (info.prerender) from disk, without
+    rendering or querying the database; everything else goes through."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._manifest = None
+        self._manifest_mtime = None
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if request.method in ('GET', 'HEAD'):
+            response = self.prerendered(request)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def manifest(self, directory):
+        """The manifest, read again only when the file changed."""
+        try:
+            mtime = (directory / prerender.MANIFEST).stat().st_mtime_ns
+        except OSError:
+            return None
+        if mtime != self._manifest_mtime:
+            self._manifest = prerender.read_manifest(directory)
+            self._manifest_mtime = mtime
+        return self._manifest
+
+    def prerendered(self, request):
+        directory = prerender.root()
+        if directory is None:
+            return None
+        manifest = self.manifest(directory)
+        if manifest is None:
+            return None
+        url = request.path_info
+        if request.META.get('QUERY_STRING'):
+            url += '?' + request.META['QUERY_STRING']
+        page = manifest['pages'].get(url)
+        if page is None or not prerender.is_fresh(directory, manifest):
+            return None
+
+        accepted = accepted_encodings(request)
+        encoding = next((e for e in _ENCODINGS if e in accepted and e in page['files']), 'identity')
+        # One validator per representation
+        etag = page['etag'] if encoding == 'identity' else f'{page["etag"][:-1]}-{encoding}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            try:
+                content = (directory / page['files'][encoding]).read_bytes()
+            except OSError:
+                # Replaced by a newer prerender since the manifest was read
+                return None
+            response = HttpResponse(content, content_type='text/html; charset=utf-8')
+            if encoding != 'identity':
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        if page['cache_control']:
+            response['Cache-Control'] = page['cache_control']
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
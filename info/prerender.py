@@ -0,0 +1,256 @@
+"""
+Pre-rendered public pages, served without touching the database.
+
+`manage.py prerender` renders the pages that only change when an admin
+edits something (PAGES, plus /meets?session=N for every session) and writes
+each one under PRERENDER_DIR as HTML with .gz and (when the optional
+`brotli` package is installed) .br copies, compressed once at the highest
+level. manifest.json maps each URL to its files.
+
+PrerenderedPagesMiddleware answers GET/HEAD requests for those exact URLs
+from disk while the pages are fresh: nothing is rendered and no query is
+made. Freshness is checked with two stats, no database:
+  - the `stale` file is touched (after commit) whenever a model shown on
+    these pages changes (info.signals, and board.cache for bulk writes);
+    pages rendered before that are stale, and Django renders them as usual
+    until the next prerender;
+  - the manifest records a build id (template files, the static files
+    manifest and the renderer versions), so a deploy never serves pages
+    linking to old assets or rendered by older libraries.
+
+Changes also queue a new prerender in the background of the worker that
+made them. Nothing happens until the command has been run once: without a
+manifest, the middleware and the signals do nothing. /meets without
+?session= depends on today's date, so it is left to the page cache of
+board.cache.
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.urls import resolve
+
+from events.compression import brotli
+
+PAGES = ('/', '/noob', '/cheatsheet', '/events/')
+
+MANIFEST = 'manifest.json'
+STALE = 'stale'
+
+# Render again when the pages went stale while being rendered, at most this often
+_MAX_ATTEMPTS = 3
+
+# Libraries used by the renderers (events.rendering, cheatsheet.highlighting)
+_RENDERER_PACKAGES = ('markdown', 'pygments')
+
+
+def root():
+    return Path(settings.PRERENDER_DIR) if settings.PRERENDER_DIR else None
+
+
+def page_urls():
+    from board.models import Session
+
+    return list(PAGES) + [f'/meets?session={pk}' for pk in Session.objects.values_list('pk', flat=True)]
+
+
+def _package_version(name):
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def build_id() -> str:
+    """Changes with the templates, the static files and the renderers (so, on
+    deploys and upgrades); computed once per process."""
+    from cheatsheet.highlighting import HIGHLIGHT_VERSION
+    from events.rendering import RENDER_VERSION
+
+    renderers = [RENDER_VERSION, HIGHLIGHT_VERSION] + [_package_version(name) for name in _RENDERER_PACKAGES]
+    paths = [Path(settings.STATIC_ROOT) / 'staticfiles.json']
+    for template_dir in settings.TEMPLATES[0]['DIRS']:
+        paths.extend(sorted(Path(template_dir).rglob('*.html')))
+    stats = []
+    for path in paths:
+        try:
+            st = path.stat()
+            stats.append([str(path), st.st_size, st.st_mtime_ns])
+        except OSError:
+            stats.append([str(path), None, None])
+    return hashlib.sha1(json.dumps([renderers, stats]).encode()).hexdigest()[:12]
+
+
+def read_manifest(directory):
+    try:
+        return json.loads((directory / MANIFEST).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def is_fresh(directory, manifest) -> bool:
+    if manifest is None or manifest['build_id'] != build_id():
+        return False
+    try:
+        changed_at = (directory / STALE).stat().st_mtime_ns
+    except FileNotFoundError:
+        return True
+    return changed_at < manifest['rendered_at']
+
+
+def is_enabled() -> bool:
+    """True once pages have been pre-rendered."""
+    directory = root()
+    return directory is not None and (directory / MANIFEST).exists()
+
+
+def mark_stale():
+    if is_enabled():
+        (root() / STALE).touch()
+
+
+def invalidate():
+    """Mark the pages stale and queue a new prerender, once the current
+    transaction has committed (so the prerender sees the change)."""
+    if is_enabled():
+        transaction.on_commit(_invalidate_now)
+
+
+def _invalidate_now():
+    from info.tasks import queue_prerender
+
+    mark_stale()
+    queue_prerender()
+
+
+def _host():
+    """A host the site answers to, for the requests made by render()."""
+    for host in settings.ALLOWED_HOSTS:
+        if host and host != '*' and not host.startswith('.'):
+            return host
+    return 'localhost'
+
+
+def _make_request(url):
+    """An anonymous GET request for `url`, as the WSGI server would build it."""
+    parts = urlsplit(url)
+    request = WSGIRequest({
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': parts.path or '/',
+        'QUERY_STRING': parts.query,
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': _host(),
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(),
+    })
+    request.user = AnonymousUser()
+    return request
+
+
+def render(url):
+    """Response of `url`, straight from its view (no middleware, anonymous user)."""
+    request = _make_request(url)
+    match = resolve(request.path_info)
+    response = match.func(request, *match.args, **match.kwargs)
+    if response.status_code != 200:
+        raise ValueError(f'{url} answered {response.status_code}')
+    return response
+
+
+def _file_name(url):
+    name = url.strip('/').replace('?', '-').replace('=', '-') or 'index'
+    return f'{name}.html'
+
+
+def _write_atomic(path: Path, data: bytes):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def write_pages(urls):
+    """Render `urls` into a new build directory, then switch the manifest to
+    it; returns the manifest."""
+    directory = root()
+    directory.mkdir(parents=True, exist_ok=True)
+    # Changes made from here on leave these pages stale
+    rendered_at = time.time_ns()
+    build = Path(tempfile.mkdtemp(dir=directory, prefix=f'build-{rendered_at}-'))
+    pages = {}
+    try:
+        for url in urls:
+            response = render(url)
+            html = response.content
+            name = _file_name(url)
+            (build / name).write_bytes(html)
+            encodings = {'identity': name}
+            gzipped = gzip.compress(html, compresslevel=9, mtime=0)
+            if len(gzipped) < len(html):
+                (build / f'{name}.gz').write_bytes(gzipped)
+                encodings['gzip'] = f'{name}.gz'
+            if brotli:
+                (build / f'{name}.br').write_bytes(brotli.compress(html, quality=11))
+                encodings['br'] = f'{name}.br'
+            pages[url] = {
+                # The view's own validators (board.conditional), so both paths agree
+                'etag': response.get('ETag') or f'"{hashlib.sha1(html).hexdigest()[:16]}"',
+                'cache_control': response.get('Cache-Control'),
+                'files': {encoding: f'{build.name}/{file}' for encoding, file in encodings.items()},
+                'sizes': {encoding: (build / file).stat().st_size for encoding, file in encodings.items()},
+            }
+    except BaseException:
+        shutil.rmtree(build, ignore_errors=True)
+        raise
+    manifest = {'rendered_at': rendered_at, 'build_id': build_id(), 'pages': pages}
+    _write_atomic(directory / MANIFEST, json.dumps(manifest, indent=1).encode())
+
+    # Requests that read the previous manifest fall back to rendering. Builds
+    # started later (by another worker) are still being written: kept
+    for old in directory.glob('build-*'):
+        if _started_at(old) < rendered_at:
+            shutil.rmtree(old, ignore_errors=True)
+    return manifest
+
+
+def _started_at(build: Path) -> int:
+    return int(build.name.split('-')[1])
+
+
+def clear():
+    directory = root()
+    if directory is not None:
+        (directory / MANIFEST).unlink(missing_ok=True)
+        for old in directory.glob('build-*'):
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def refresh():
+    """Render the pages again until they are fresh (background task)."""
+    directory = root()
+    for _ in range(_MAX_ATTEMPTS):
+        manifest = read_manifest(directory)
+        if manifest is None or is_fresh(directory, manifest):
+            return
+        write_pages(page_urls())
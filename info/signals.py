@@ -0,0 +1,34 @@
+"""
+Makes the pre-rendered pages (info.prerender) stale when something they
+show changes, and queues a new prerender. Both wait for the commit, so a
+prerender never reads the data from before the change.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from info import prerender
+
+# Models (and M2M tables) shown on the pre-rendered pages
+SHOWN_MODELS = frozenset({
+    'auth.user',
+    'board.session', 'board.meet', 'board.problem',
+    'board.meet_managers', 'board.problem_meets', 'board.problem_categories',
+    'cheatsheet.algorithm', 'cheatsheet.algorithmcategory',
+    'events.event', 'events.media',
+    # Resized copies are recorded with update(), then linked to their blobs
+    'events.media_blobs',
+})
+
+
+@receiver(post_save)
+@receiver(post_delete)
+@receiver(m2m_changed)
+def content_changed(sender, update_fields=None, action=None, **kwargs):
+    if sender._meta.label_lower not in SHOWN_MODELS:
+        return
+    # Logins only touch last_login, which no page displays
+    if update_fields == frozenset({'last_login'}):
+        return
+    if action is not None and not action.startswith('post_'):
+        return
+    prerender.invalidate()
@@ -0,0 +1,13 @@
+"""
+Background prerendering, on the same per-worker queues as board.tasks.
+"""
+from board.tasks import BackgroundQueue
+
+# No cooldown: every admin change must end up pre-rendered
+prerender_queue = BackgroundQueue('prerender', cooldown=0)
+
+
+def queue_prerender():
+    from info import prerender
+
+    return prerender_queue.enqueue('pages', prerender.refresh)
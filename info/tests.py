@@ -1,3 +1,88 @@
-from django.test import TestCase
+import gzip
+import tempfile
+from datetime import date
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from board.models import Meet
+from cheatsheet.models import Algorithm
+from info import prerender
+from project.testing import TEST_STORAGES
+
+@override_settings(BACKGROUND_TASKS_ENABLED=False, STORAGES=TEST_STORAGES)
+class PrerenderTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(PRERENDER_DIR=directory.name))
+        self.algo = Algorithm.objects.create(title='Dijkstra', code='pass')
+        self.meet = Meet.objects.create(date=date(2026, 10, 1))
+        call_command('prerender', stdout=StringIO())
+
+    def assertRendered(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(queries, f'{url} was served from disk')
+        return response
+
+    def test_fresh_pages_are_served_without_queries(self):
+        dynamic = prerender.render('/cheatsheet')
+        with self.assertNumQueries(0):
+            response = self.client.get('/cheatsheet', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content), dynamic.content)
+        self.assertEqual(response['ETag'], dynamic['ETag'][:-1] + '-gzip"')
+        self.assertEqual(response['Cache-Control'], dynamic['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/meets?session={self.meet.session_id}')
+        self.assertNotIn('Content-Encoding', response)
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/meets?session={self.meet.session_id}', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_other_urls_are_rendered(self):
+        self.assertRendered(f'/meets?session={self.meet.session_id}&x=1')
+
+    def test_changes_make_pages_stale_until_rendered_again(self):
+        with mock.patch('info.tasks.queue_prerender') as queue, self.captureOnCommitCallbacks(execute=True):
+            self.algo.title = 'Bellman-Ford'
+            self.algo.save()
+        queue.assert_called_once()
+        self.assertContains(self.assertRendered('/cheatsheet'), 'Bellman-Ford')
+
+        prerender.refresh()
+        with self.assertNumQueries(0):
+            response = self.client.get('/cheatsheet')
+        self.assertContains(response, 'Bellman-Ford')
+
+    def test_pages_from_another_build_are_not_served(self):
+        with mock.patch('info.prerender.build_id', return_value='deployed'):
+            self.assertRendered('/')
+
+    def test_build_id_follows_the_renderers(self):
+        built = prerender.build_id()
+        self.addCleanup(prerender.build_id.cache_clear)
+        for patch in (mock.patch('events.rendering.RENDER_VERSION', 'next'),
+                      mock.patch('cheatsheet.highlighting.HIGHLIGHT_VERSION', 'next'),
+                      mock.patch('info.prerender._package_version', return_value='99.0')):
+            prerender.build_id.cache_clear()
+            with patch:
+                self.assertNotEqual(prerender.build_id(), built)
+
+    def test_render_keeps_the_query_string(self):
+        other = Meet.objects.create(date=date(2025, 2, 1))
+        response = prerender.render(f'/meets?session={other.session_id}')
+        self.assertContains(response, 'Rencontre 01/02/2025')
+        self.assertNotContains(response, 'Rencontre 01/10/2026')
+
+    def test_clear(self):
+        call_command('prerender', '--clear', stdout=StringIO())
+        self.assertRendered('/')
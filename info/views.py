@@ -1,11 +1,14 @@
 
 from django.shortcuts import render
 from django.http import HttpRequest, HttpResponse
+from board.conditional import conditional_page
 from board.models import Session
 
+@conditional_page(lambda request: [Session.objects.all()])
 def presentation(request: HttpRequest) -> HttpResponse:
     last_session = Session.objects.order_by('-year', 'season').first()
     return render(request, 'presentation.html', {'last_session': last_session})
 
+@conditional_page(lambda request: [])
 def noob(request: HttpRequest) -> HttpResponse:
     return render(request, 'noob.html')
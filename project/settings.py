@@ -56,6 +56,20 @@ LOGGING = {
         },
     },
 }
+
+# Background scraping threads (board.tasks); disable to keep workers offline
+BACKGROUND_TASKS_ENABLED = _env_bool('BACKGROUND_TASKS', True)
+
+# On-disk HTTP cache for scraped pages (board.http_cache); set
+# SCRAPE_CACHE_DIR to an empty string to disable it
+SCRAPE_CACHE_DIR = os.environ.get('SCRAPE_CACHE_DIR', str(BASE_DIR / 'cache' / 'scraping'))
+SCRAPE_CACHE_MAX_AGE = int(os.environ.get('SCRAPE_CACHE_MAX_AGE', str(6 * 3600)))
+SCRAPE_CACHE_MAX_BYTES = int(os.environ.get('SCRAPE_CACHE_MAX_BYTES', str(200 * 1024 * 1024)))
+
+# Public pages written by `manage.py prerender` and served from there while
+# fresh (info.prerender); set PRERENDER_DIR to an empty string to disable it
+PRERENDER_DIR = os.environ.get('PRERENDER_DIR', str(BASE_DIR / 'cache' / 'pages'))
+
 domain = os.environ.get('DOMAIN', '').strip()
 
 ALLOWED_HOSTS = [domain]
@@ -90,6 +104,9 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Last, so the middleware above still adds its headers; none of it
+    # touches the database unless the session or user is used
+    'info.middleware.PrerenderedPagesMiddleware',
 ]
 
 ROOT_URLCONF = 'project.urls'
@@ -123,9 +140,47 @@ DATABASES = {
     )
 }
 
+# Database cache shared by all gunicorn workers, so signal-based invalidation
+# reaches every process (create with `manage.py createcachetable`)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'calculum_cache',
+    }
+}
+
+# Event reverse proxy: keep-alive connections per backend port and worker
+EVENT_PROXY_POOL_SIZE = int(os.environ.get('EVENT_PROXY_POOL_SIZE', '10'))
+EVENT_PROXY_IDLE_TIMEOUT = int(os.environ.get('EVENT_PROXY_IDLE_TIMEOUT', '60'))
+# Seconds a worker trusts its in-memory slug → port lookup; saves in the
+# same worker invalidate it immediately
+EVENT_PROXY_ROUTE_TTL = int(os.environ.get('EVENT_PROXY_ROUTE_TTL', '5'))
+# URL rewriting: content types rewritten, larger bodies streamed untouched,
+# and characters of rewritten bodies kept per worker (keyed by ETag)
+EVENT_PROXY_REWRITE_TYPES = ('text/html', 'javascript', 'text/css')
+EVENT_PROXY_REWRITE_MAX_BYTES = int(os.environ.get('EVENT_PROXY_REWRITE_MAX_BYTES', str(5 * 1024 * 1024)))
+EVENT_PROXY_REWRITE_CACHE_CHARS = int(os.environ.get('EVENT_PROXY_REWRITE_CACHE_CHARS', str(16 * 1024 * 1024)))
+# HTTP response cache for events with cache_responses: bytes kept per worker,
+# and largest single response stored
+EVENT_PROXY_CACHE_MAX_BYTES = int(os.environ.get('EVENT_PROXY_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+EVENT_PROXY_CACHE_MAX_ENTRY_BYTES = int(os.environ.get('EVENT_PROXY_CACHE_MAX_ENTRY_BYTES', str(4 * 1024 * 1024)))
+
 DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# Media served by events.media: files under these paths never change (blobs
+# are named by content hash, older uploads got unique names), so clients
+# may cache them for a year
+MEDIA_IMMUTABLE_PATTERNS = (r'calculum/blobs/', r'calculum/events/\d{4}/\d{2}/')
+# Unreferenced blobs younger than this are kept by cleanup_media_files: the
+# Media row of an upload is saved after its file
+MEDIA_BLOB_GRACE_SECONDS = int(os.environ.get('MEDIA_BLOB_GRACE_SECONDS', str(24 * 3600)))
+# Hand media transfers to the front server: '' (Django streams them),
+# 'x-accel-redirect' (nginx internal location at MEDIA_ACCEL_PREFIX) or 'x-sendfile'
+MEDIA_ACCEL = os.environ.get('MEDIA_ACCEL', '')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+# Widths of the resized WebP/JPEG copies made of uploaded images (events.thumbnails)
+MEDIA_THUMBNAIL_WIDTHS = (320, 640, 1280)
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
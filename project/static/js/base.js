@@ -1,9 +1,4 @@
-// Initialize syntax highlighting
 document.addEventListener('DOMContentLoaded', function() {
-	if (typeof hljs !== 'undefined') {
-		hljs.highlightAll();
-	}
-	
 	// Highlight active navigation link
 	const currentPath = window.location.pathname;
 	const navLinks = document.querySelectorAll('nav a');
@@ -20,11 +20,6 @@ document.addEventListener('DOMContentLoaded', function() {
 			
 			if (content.classList.contains('active')) {
 				toggleText.textContent = 'Masquer l\'algorithme';
-				// Re-highlight the code when shown
-				const codeBlock = content.querySelector('code');
-				if (codeBlock && typeof hljs !== 'undefined') {
-					hljs.highlightElement(codeBlock);
-				}
 			} else {
 				toggleText.textContent = 'Afficher l\'algorithme';
 			}
@@ -0,0 +1,25 @@
+"""
+Settings and helpers shared by the apps' tests.
+"""
+import tempfile
+from pathlib import Path
+
+from django.test import override_settings
+
+# Plain storages: the manifest static storage needs collectstatic to have run
+TEST_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+class TemporaryMediaRootMixin:
+    """Run each test with MEDIA_ROOT in a new temporary directory, available
+    as self.media_root and removed afterwards."""
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=directory.name))
+        self.media_root = Path(directory.name)
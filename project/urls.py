@@ -18,6 +18,7 @@ from django.contrib import admin
 from django.urls import include, path, re_path
 from django.views.static import serve
 from django.conf import settings
+from events.media import serve_media
 
 def favicon(request):
     return serve(request, 'favicon.ico', document_root=settings.STATIC_ROOT)
@@ -31,10 +32,8 @@ urlpatterns = [
     path('', include('info.urls')),
 ]
 
-# Serve media files in production
+# Serve media files in production (ranges, ETags, optional X-Accel-Redirect)
 if not settings.DEBUG:
     urlpatterns += [
-        re_path(r'^media/(?P<path>.*)$', serve, {
-            'document_root': settings.MEDIA_ROOT,
-        }),
+        re_path(r'^media/(?P<path>.*)$', serve_media),
     ]
\ No newline at end of file